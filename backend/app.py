@@ -9,6 +9,10 @@ from flask_cors import CORS
 from extensions import db, login_manager
 from config import config
 import os
+import sys
+
+# Módulos compartidos entre servicios (comun/, en la raíz del proyecto)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 def create_app(config_name=None):
@@ -28,6 +32,30 @@ def create_app(config_name=None):
     from routes import register_blueprints
     register_blueprints(app)
     
+    # Límites diarios de retiro (reconciliación al iniciar y a medianoche)
+    from core import limites
+    limites.init_app(app)
+    
+    # Pool y caché de verificación de PIN
+    from core import pines
+    pines.init_app(app)
+    
+    # Pool de procesos para verificar contraseñas en el login
+    from core import credenciales
+    credenciales.init_app(app)
+    
+    # Índice espacial de cajeros para /api/cajeros/cercanos
+    from core import cajeros
+    cajeros.init_app(app)
+    
+    # Asignador de códigos de retiro sin tarjeta
+    from core import codigos
+    codigos.init_app(app)
+    
+    # Barrido de códigos de retiro sin tarjeta vencidos
+    from core import expiracion
+    expiracion.init_app(app)
+    
     # Ruta raíz
     @app.route('/')
     def index():
@@ -0,0 +1,127 @@
+"""
+Benchmark de búsqueda de cajeros cercanos
+Inserta N cajeros sintéticos (agrupados alrededor de ciudades del Ecuador)
+y compara, para las mismas ubicaciones al azar:
+  - caja SQL: la consulta anterior de /cercanos (BETWEEN con delta = radio/111,
+              sin ordenar por distancia)
+  - índice:   core.cajeros, los k más cercanos por haversine
+
+Requiere la base configurada en .env (o DATABASE_URL). Ejecutar:
+    python benchmark_cajeros.py --cajeros 100000 --consultas 2000 --limpiar
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+from sqlalchemy import insert
+
+# Sin barrido de expiración en segundo plano durante la medición
+os.environ['EXPIRACION_RETIROS_WORKER'] = 'false'
+
+from app import create_app
+from extensions import db
+from models.cajero import Cajero
+from core.cajeros import IndiceCajeros
+
+NOMBRE_BENCHMARK = 'BENCHMARK CAJEROS'
+
+CIUDADES = [
+    (-0.1807, -78.4678), (-2.1709, -79.9224), (-2.9001, -79.0059), (-0.9677, -80.7089),
+    (-1.2491, -78.6168), (-3.9931, -79.2042), (0.3517, -78.1223), (-1.6636, -78.6546)
+]
+
+
+def insertar(cantidad, semilla):
+    aleatorio = random.Random(semilla)
+    filas = []
+    for i in range(cantidad):
+        lat, lon = aleatorio.choice(CIUDADES)
+        filas.append({
+            'latitud': round(lat + aleatorio.gauss(0, 0.15), 6),
+            'longitud': round(lon + aleatorio.gauss(0, 0.15), 6),
+            'activo': aleatorio.random() < 0.95,
+            'saldo': 20000,
+            'depositos': aleatorio.random() < 0.6,
+            'nombre': f'{NOMBRE_BENCHMARK} {i}',
+            'ciudad': 'Benchmark',
+            'provincia': 'Benchmark',
+            'direccion': 'Benchmark'
+        })
+        if len(filas) == 5000:
+            db.session.execute(insert(Cajero), filas)
+            filas = []
+    if filas:
+        db.session.execute(insert(Cajero), filas)
+    db.session.commit()
+
+
+def consulta_caja(lat, lon, radio_km):
+    delta = radio_km / 111
+    return Cajero.query.filter(
+        Cajero.activo == True,
+        Cajero.latitud.between(lat - delta, lat + delta),
+        Cajero.longitud.between(lon - delta, lon + delta)
+    ).all()
+
+
+def medir(nombre, funcion, puntos):
+    tiempos = []
+    resultados = 0
+    for lat, lon in puntos:
+        inicio = time.perf_counter()
+        resultados += len(funcion(lat, lon))
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    print(f"  {nombre:<22}{tiempos[len(tiempos) // 2]:9.3f}{tiempos[int(len(tiempos) * 0.95)]:9.3f}"
+          f"{statistics.mean(tiempos):10.3f}{len(puntos) / (sum(tiempos) / 1000):12.0f}"
+          f"{resultados / len(puntos):11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de cajeros cercanos')
+    parser.add_argument('--cajeros', type=int, default=100000)
+    parser.add_argument('--consultas', type=int, default=2000)
+    parser.add_argument('--radio', type=float, default=5, help='Radio de búsqueda (km)')
+    parser.add_argument('--limite', type=int, default=10, help='k cajeros más cercanos')
+    parser.add_argument('--celda', type=float, default=0.05, help='Tamaño de celda del índice (grados)')
+    parser.add_argument('--semilla', type=int, default=7)
+    parser.add_argument('--limpiar', action='store_true', help='Eliminar los cajeros generados al terminar')
+    args = parser.parse_args()
+
+    app = create_app('production')
+    with app.app_context():
+        inicio = time.perf_counter()
+        insertar(args.cajeros, args.semilla)
+        print(f"📍 {args.cajeros} cajeros insertados en {time.perf_counter() - inicio:.1f}s")
+
+        indice = IndiceCajeros(args.celda, ttl=3600)
+        inicio = time.perf_counter()
+        indice.recargar()
+        estado = indice.estado()
+        print(f"🗂️  Índice con {estado['cajeros']} cajeros activos en {estado['celdas']} celdas, "
+              f"construido en {time.perf_counter() - inicio:.1f}s\n")
+
+        aleatorio = random.Random(args.semilla + 1)
+        puntos = []
+        for _ in range(args.consultas):
+            lat, lon = aleatorio.choice(CIUDADES)
+            puntos.append((lat + aleatorio.gauss(0, 0.2), lon + aleatorio.gauss(0, 0.2)))
+
+        print(f"  {args.consultas} consultas, radio {args.radio:g} km, k={args.limite}\n")
+        print(f"  {'método':<22}{'p50 ms':>9}{'p95 ms':>9}{'media ms':>10}{'consultas/s':>12}{'resultados':>11}")
+        medir('caja SQL', lambda lat, lon: consulta_caja(lat, lon, args.radio), puntos)
+        medir('índice k vecinos', lambda lat, lon: indice.cercanos(lat, lon, args.limite, args.radio), puntos)
+        medir('índice + depósitos', lambda lat, lon: indice.cercanos(
+            lat, lon, args.limite, args.radio, lambda e: e.depositos), puntos)
+
+        if args.limpiar:
+            Cajero.query.filter(Cajero.nombre.like(f'{NOMBRE_BENCHMARK}%')).delete(synchronize_session=False)
+            db.session.commit()
+            print("\n🧹 Cajeros del benchmark eliminados")
+
+
+if __name__ == '__main__':
+    main()
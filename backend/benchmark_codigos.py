@@ -0,0 +1,113 @@
+"""
+Benchmark de códigos de retiro sin tarjeta
+Mide, con varios hilos:
+  - asignador: reservas/s del asignador en memoria (sin base de datos)
+  - generación: core.codigos.crear_retiro + commit por código
+  - canje:      búsqueda por código pendiente (FOR UPDATE) + marcar USADO
+
+Los códigos generados no debitan la cuenta (no pasan por el endpoint).
+Requiere PostgreSQL configurado en .env. Ejecutar:
+    python benchmark_codigos.py --cuenta 1 --hilos 8 --codigos 4000 --limpiar
+"""
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Sin barrido de expiración en segundo plano durante la medición
+os.environ['EXPIRACION_RETIROS_WORKER'] = 'false'
+
+from app import create_app
+from extensions import db
+from models.transaccion import RetiroSinTarjeta
+from core import codigos
+
+
+def en_hilos(hilos, trabajo, lotes):
+    """Ejecuta trabajo(lote) en un hilo por lote. Retorna la duración en segundos"""
+    lista = [threading.Thread(target=trabajo, args=(lote,)) for lote in lotes[:hilos]]
+    inicio = time.perf_counter()
+    for h in lista:
+        h.start()
+    for h in lista:
+        h.join()
+    return time.perf_counter() - inicio
+
+
+def imprimir(nombre, cantidad, duracion, extra=''):
+    print(f"  {nombre:<12}{cantidad:>8} en {duracion:7.2f}s  {cantidad / duracion:10.1f}/s  {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de códigos de retiro sin tarjeta')
+    parser.add_argument('--cuenta', type=int, required=True, help='Cuenta a la que se asignan los códigos')
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--codigos', type=int, default=4000)
+    parser.add_argument('--limpiar', action='store_true', help='Eliminar los retiros generados al terminar')
+    args = parser.parse_args()
+
+    app = create_app('production')
+    por_hilo = max(args.codigos // args.hilos, 1)
+
+    # Asignador en memoria: reservar y liberar
+    asignador = codigos.AsignadorCodigos(app.config.get('CODIGO_RETIRO_DIGITOS', 6))
+
+    def reservar(_):
+        for _ in range(por_hilo * 10):
+            asignador.liberar(asignador.reservar(10))
+
+    duracion = en_hilos(args.hilos, reservar, list(range(args.hilos)))
+    imprimir('asignador', por_hilo * 10 * args.hilos, duracion)
+
+    # Generación
+    codigos.estadisticas.reiniciar()
+    generados = [[] for _ in range(args.hilos)]
+
+    def generar(lista):
+        with app.app_context():
+            for _ in range(por_hilo):
+                retiro = codigos.crear_retiro(args.cuenta, 1, datetime.utcnow() + timedelta(minutes=10))
+                db.session.commit()
+                lista.append((retiro.id_retiro, retiro.codigo))
+            db.session.remove()
+
+    duracion = en_hilos(args.hilos, generar, generados)
+    total = sum(len(lista) for lista in generados)
+    colisiones = codigos.estadisticas.to_dict()
+    imprimir('generación', total, duracion,
+             f"(colisiones en memoria {colisiones['colisiones_memoria']}, en bd {colisiones['colisiones_bd']})")
+
+    # Canje
+    fallidos = []
+
+    def canjear(lista):
+        with app.app_context():
+            for _, codigo in lista:
+                retiro = codigos.buscar_pendiente(codigo, bloquear=True)
+                if retiro is None:
+                    fallidos.append(codigo)
+                    db.session.rollback()
+                    continue
+                retiro.estado = RetiroSinTarjeta.ESTADO_USADO
+                retiro.fecha_uso = datetime.utcnow()
+                db.session.commit()
+            db.session.remove()
+
+    duracion = en_hilos(args.hilos, canjear, generados)
+    imprimir('canje', total, duracion, f"({len(fallidos)} no encontrados)" if fallidos else '')
+
+    if args.limpiar:
+        with app.app_context():
+            ids = [id_retiro for lista in generados for id_retiro, _ in lista]
+            for i in range(0, len(ids), 1000):
+                RetiroSinTarjeta.query.filter(
+                    RetiroSinTarjeta.id_retiro.in_(ids[i:i + 1000])
+                ).delete(synchronize_session=False)
+            db.session.commit()
+            print(f"\n🧹 {len(ids)} retiros del benchmark eliminados")
+
+
+if __name__ == '__main__':
+    main()
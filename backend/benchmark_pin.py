@@ -0,0 +1,103 @@
+"""
+Benchmark de verificación de PIN
+Compara verificaciones por segundo (y por núcleo) de:
+  - antes:   check_password_hash con el método por defecto de werkzeug (el
+             mismo de las contraseñas), como hacía Tarjeta.check_pin
+  - después: core.pines con PIN_HASH_METODO, sin caché
+  - caché:   core.pines con la verificación ya en caché (reintentos del cajero)
+
+No usa la base de datos. Ejecutar:
+    python benchmark_pin.py --hilos 8 --operaciones 400
+    python benchmark_pin.py --metodo pbkdf2:sha256:10000
+"""
+
+import argparse
+import os
+import threading
+import time
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Sin barrido de expiración en segundo plano durante la medición
+os.environ['EXPIRACION_RETIROS_WORKER'] = 'false'
+
+from app import create_app
+from models.tarjeta import Tarjeta
+from core import pines
+
+PIN = '1234'
+
+
+def medir(nombre, funcion, hilos, operaciones, nucleos):
+    por_hilo = max(operaciones // hilos, 1)
+    errores = []
+
+    def trabajador():
+        for _ in range(por_hilo):
+            if not funcion():
+                errores.append(1)
+
+    lista = [threading.Thread(target=trabajador) for _ in range(hilos)]
+    inicio = time.perf_counter()
+    for h in lista:
+        h.start()
+    for h in lista:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    total = por_hilo * hilos
+    por_segundo = total / duracion
+    print(f"  {nombre:<10} {total:>7} verif. en {duracion:7.2f}s  "
+          f"{por_segundo:10.1f}/s  {por_segundo / nucleos:9.1f}/s por núcleo"
+          + (f"  ({len(errores)} fallidas)" if errores else ""))
+    return por_segundo
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de verificación de PIN')
+    parser.add_argument('--hilos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--operaciones', type=int, default=400)
+    parser.add_argument('--metodo', help='Método de hash de PIN (por defecto PIN_HASH_METODO)')
+    args = parser.parse_args()
+
+    app = create_app('production')
+    if args.metodo:
+        app.config['PIN_HASH_METODO'] = args.metodo
+    nucleos = os.cpu_count() or 1
+
+    with app.app_context():
+        hash_anterior = generate_password_hash(PIN)
+        tarjeta = Tarjeta(id_tarjeta=1, pin_hash=hash_anterior)
+
+        print(f"🔐 PIN antes:   {hash_anterior.split('$', 1)[0]}")
+        print(f"🔐 PIN después: {pines.metodo_configurado()}")
+        print(f"   {args.hilos} hilos, {nucleos} núcleos\n")
+
+        antes = medir('antes', lambda: check_password_hash(hash_anterior, PIN),
+                      args.hilos, args.operaciones, nucleos)
+
+        # Primera verificación: migra el hash al método configurado
+        tarjeta.check_pin(PIN)
+        migrado = not pines.requiere_rehash(tarjeta.pin_hash)
+        print(f"  rehash al verificar: {'OK' if migrado else 'FALLO'}")
+
+        def contexto(funcion):
+            def envuelta():
+                with app.app_context():
+                    return funcion()
+            return envuelta
+
+        ttl = pines.cache.ttl
+        pines.cache.ttl = 0
+        pines.cache.limpiar()
+        despues = medir('después', contexto(lambda: tarjeta.check_pin(PIN)),
+                        args.hilos, args.operaciones, nucleos)
+        pines.cache.ttl = ttl
+        cacheado = medir('caché', contexto(lambda: tarjeta.check_pin(PIN)),
+                         args.hilos, args.operaciones * 100, nucleos)
+
+    print(f"\n📊 Mejora sin caché: x{despues / antes:.1f}   con caché: x{cacheado / antes:.1f}")
+
+
+if __name__ == '__main__':
+    main()
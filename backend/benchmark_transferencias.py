@@ -0,0 +1,117 @@
+"""
+Benchmark de estrés del motor de transferencias
+Varios hilos transfieren dinero al azar entre un grupo pequeño de cuentas
+"calientes" y se mide el throughput, los reintentos y los deadlocks.
+
+Al final se verifica que la suma de saldos del grupo no haya cambiado
+(una actualización perdida rompería este invariante).
+
+Requiere PostgreSQL configurado en .env. Ejecutar:
+    python benchmark_transferencias.py --cuentas 6,7 --hilos 8 --operaciones 2000 --limpiar
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+
+# Sin barrido de expiración en segundo plano durante la medición
+os.environ['EXPIRACION_RETIROS_WORKER'] = 'false'
+
+from app import create_app
+from extensions import db
+from models.cuenta import Cuenta
+from models.transaccion import Transaccion
+from core import transferencias as motor
+
+DESCRIPCION_BENCHMARK = 'BENCHMARK TRANSFERENCIAS'
+
+
+def suma_saldos(ids):
+    db.session.expire_all()
+    return sum(c.saldo_actual for c in Cuenta.query.filter(Cuenta.id_cuenta.in_(ids)))
+
+
+def trabajador(app, ids, operaciones, monto, resultados, lock):
+    completadas = rechazadas = errores = 0
+    with app.app_context():
+        for _ in range(operaciones):
+            origen, destino = random.sample(ids, 2)
+            try:
+                motor.transferir(origen, destino, monto, DESCRIPCION_BENCHMARK)
+                completadas += 1
+            except motor.TransferenciaError:
+                rechazadas += 1
+            except Exception:
+                db.session.rollback()
+                errores += 1
+        db.session.remove()
+
+    with lock:
+        resultados['completadas'] += completadas
+        resultados['rechazadas'] += rechazadas
+        resultados['errores'] += errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del motor de transferencias')
+    parser.add_argument('--cuentas', required=True, help='IDs de cuentas calientes separados por coma (mínimo 2)')
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--operaciones', type=int, default=2000, help='Transferencias totales')
+    parser.add_argument('--monto', type=float, default=1.00)
+    parser.add_argument('--limpiar', action='store_true', help='Eliminar las transacciones generadas al terminar')
+    args = parser.parse_args()
+
+    ids = [int(i) for i in args.cuentas.split(',')]
+    if len(ids) < 2:
+        parser.error('Se requieren al menos 2 cuentas')
+
+    app = create_app('production')
+
+    with app.app_context():
+        saldo_inicial = suma_saldos(ids)
+
+    motor.estadisticas.reiniciar()
+    resultados = {'completadas': 0, 'rechazadas': 0, 'errores': 0}
+    lock = threading.Lock()
+    por_hilo = args.operaciones // args.hilos
+
+    hilos = [
+        threading.Thread(target=trabajador, args=(app, ids, por_hilo, args.monto, resultados, lock))
+        for _ in range(args.hilos)
+    ]
+
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    with app.app_context():
+        saldo_final = suma_saldos(ids)
+
+        if args.limpiar:
+            Transaccion.query.filter_by(descripcion=DESCRIPCION_BENCHMARK).delete()
+            db.session.commit()
+
+    print("=" * 60)
+    print("  Benchmark de transferencias")
+    print("=" * 60)
+    print(f"  Cuentas calientes:   {ids}")
+    print(f"  Hilos:               {args.hilos}")
+    print(f"  Duración:            {duracion:.2f} s")
+    print(f"  Completadas:         {resultados['completadas']}")
+    print(f"  Rechazadas:          {resultados['rechazadas']}")
+    print(f"  Errores:             {resultados['errores']}")
+    print(f"  Throughput:          {resultados['completadas'] / duracion:.1f} transf/s")
+    for campo, valor in motor.estadisticas.to_dict().items():
+        print(f"  {campo + ':':<21}{valor}")
+    print(f"  Suma de saldos:      {saldo_inicial} -> {saldo_final}")
+    print("  Invariante:          " + ("OK" if saldo_inicial == saldo_final else "ROTO (actualización perdida)"))
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
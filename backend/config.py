@@ -24,6 +24,58 @@ class Config:
     # Configuración de sesión
     SESSION_TYPE = 'filesystem'
 
+    # Motor de transferencias (reintentos ante deadlock/serialización)
+    TRANSFERENCIA_MAX_REINTENTOS = int(os.environ.get('TRANSFERENCIA_MAX_REINTENTOS', 3))
+    TRANSFERENCIA_ESPERA_BASE = float(os.environ.get('TRANSFERENCIA_ESPERA_BASE', 0.01))
+    TRANSFERENCIA_LOTE_MAX = int(os.environ.get('TRANSFERENCIA_LOTE_MAX', 10000))
+
+    # Débitos por lote de pagos de servicios (outbox de la API de Servicios)
+    DEBITOS_LOTE_MAX = int(os.environ.get('DEBITOS_LOTE_MAX', 1000))
+
+    # Historial de transacciones
+    HISTORIAL_LIMITE_MAX = int(os.environ.get('HISTORIAL_LIMITE_MAX', 500))
+    HISTORIAL_EXPORTAR_LOTE = int(os.environ.get('HISTORIAL_EXPORTAR_LOTE', 1000))
+
+    # Snapshots diarios de saldo
+    SALDOS_RANGO_MAX_DIAS = int(os.environ.get('SALDOS_RANGO_MAX_DIAS', 366))
+
+    # Límites diarios de retiro (activar LIMITES_VERIFICAR_BD con más de un worker)
+    LIMITES_RECONCILIAR = os.environ.get('LIMITES_RECONCILIAR', 'true').lower() == 'true'
+    LIMITES_VERIFICAR_BD = os.environ.get('LIMITES_VERIFICAR_BD', 'false').lower() == 'true'
+
+    # PIN de tarjetas (método de hash de werkzeug, pool y caché de verificación)
+    PIN_HASH_METODO = os.environ.get('PIN_HASH_METODO', 'pbkdf2:sha256:20000')
+    PIN_POOL_TRABAJADORES = int(os.environ.get('PIN_POOL_TRABAJADORES', os.cpu_count() or 1))
+    PIN_POOL_MAX_PENDIENTES = int(os.environ.get('PIN_POOL_MAX_PENDIENTES', 64))
+    PIN_CACHE_TTL = int(os.environ.get('PIN_CACHE_TTL', 300))
+    PIN_CACHE_MAX = int(os.environ.get('PIN_CACHE_MAX', 10000))
+
+    # Login (verificación de contraseña en pool de procesos)
+    LOGIN_POOL_PROCESOS = int(os.environ.get('LOGIN_POOL_PROCESOS', os.cpu_count() or 1))
+    LOGIN_POOL_MAX_PENDIENTES = int(os.environ.get('LOGIN_POOL_MAX_PENDIENTES', 16))
+    LOGIN_HASH_TIMEOUT = float(os.environ.get('LOGIN_HASH_TIMEOUT', 10))
+
+    # Códigos de retiro sin tarjeta
+    CODIGO_RETIRO_DIGITOS = int(os.environ.get('CODIGO_RETIRO_DIGITOS', 6))
+    CODIGO_RETIRO_MAX_INTENTOS = int(os.environ.get('CODIGO_RETIRO_MAX_INTENTOS', 10))
+
+    # Expiración de retiros sin tarjeta (expirar_retiros.py, o un hilo en el servidor con EXPIRACION_RETIROS_WORKER=true)
+    EXPIRACION_RETIROS_WORKER = os.environ.get('EXPIRACION_RETIROS_WORKER', 'false').lower() == 'true'
+    EXPIRACION_RETIROS_INTERVALO = float(os.environ.get('EXPIRACION_RETIROS_INTERVALO', 60))
+    EXPIRACION_RETIROS_LOTE = int(os.environ.get('EXPIRACION_RETIROS_LOTE', 1000))
+
+    # Cajeros (índice espacial de cercanos y umbral de efectivo bajo)
+    CAJEROS_CELDA_GRADOS = float(os.environ.get('CAJEROS_CELDA_GRADOS', 0.05))
+    CAJEROS_INDICE_TTL = int(os.environ.get('CAJEROS_INDICE_TTL', 300))
+    CAJEROS_CERCANOS_MAX = int(os.environ.get('CAJEROS_CERCANOS_MAX', 50))
+    CAJEROS_ZONA_HORARIA = os.environ.get('CAJEROS_ZONA_HORARIA', 'America/Guayaquil')
+    CAJEROS_EFECTIVO_UMBRAL = float(os.environ.get('CAJEROS_EFECTIVO_UMBRAL', 2000))
+
+    # Idempotency-Key (horas que se guardan las respuestas y segundos que una
+    # solicitud en proceso retiene su clave si el proceso cae a mitad)
+    IDEMPOTENCIA_TTL_HORAS = int(os.environ.get('IDEMPOTENCIA_TTL_HORAS', 24))
+    IDEMPOTENCIA_PROCESO_SEGUNDOS = int(os.environ.get('IDEMPOTENCIA_PROCESO_SEGUNDOS', 60))
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
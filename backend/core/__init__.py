@@ -0,0 +1 @@
+"""Lógica de negocio compartida del Backend"""
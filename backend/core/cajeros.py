@@ -0,0 +1,377 @@
+"""
+Índice espacial en memoria de los cajeros activos
+
+Los cajeros se agrupan en una grilla de celdas de CAJEROS_CELDA_GRADOS
+grados (lat/lon). La búsqueda de los k más cercanos recorre anillos de
+celdas alrededor de la celda del punto, calcula la distancia haversine de
+cada candidato y se detiene cuando ningún cajero fuera de los anillos ya
+vistos puede estar más cerca que el k-ésimo encontrado (o fuera del radio).
+
+Actualización:
+- Al confirmarse un cambio de Cajero hecho con el ORM (alta, edición, baja o
+  desactivación) se actualizan solo sus entradas.
+- Al confirmarse un retiro se actualiza el efectivo del cajero en su entrada.
+- Cada CAJEROS_INDICE_TTL segundos se reconstruye completo desde la base,
+  para recoger cambios de otros procesos o con UPDATE masivos.
+
+Efectivo: el retiro descuenta el monto con un único UPDATE condicional
+(saldo >= monto) al final de la transacción. La fila del cajero queda
+bloqueada solo hasta el commit y dos retiros simultáneos en el mismo cajero
+nunca entregan más efectivo del que tiene. El efectivo que guarda el índice
+sirve para descartar cajeros en la búsqueda; el que manda es el de la base.
+"""
+
+import heapq
+import math
+import threading
+import time
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models.cajero import Cajero
+
+RADIO_TIERRA_KM = 6371.0
+KM_POR_GRADO = RADIO_TIERRA_KM * math.pi / 180
+
+# Días en dias_operacion: L M X J V S D (lunes = 0, como datetime.weekday)
+DIAS = 'LMXJVSD'
+
+
+def dias_semana(texto):
+    """
+    Días de la semana de dias_operacion ('L-D', 'L-V', 'L-V,S', 'L,X,V').
+    Retorna None si el texto está vacío o no se reconoce (sin restricción).
+    """
+    if not texto:
+        return None
+    dias = set()
+    for parte in texto.upper().replace(' ', '').split(','):
+        extremos = parte.split('-')
+        if len(extremos) > 2 or any(len(d) != 1 or d not in DIAS for d in extremos):
+            return None
+        dia, fin = DIAS.index(extremos[0]), DIAS.index(extremos[-1])
+        # Un rango puede cruzar el fin de semana: 'V-L'
+        dias.add(dia)
+        while dia != fin:
+            dia = (dia + 1) % 7
+            dias.add(dia)
+    return frozenset(dias)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class Entrada:
+    """Cajero tal como lo guarda el índice"""
+
+    __slots__ = ('id', 'latitud', 'longitud', 'depositos', 'saldo', 'apertura', 'cierre', 'dias', 'datos')
+
+    def __init__(self, cajero):
+        self.id = cajero.id_cajero
+        self.latitud = float(cajero.latitud)
+        self.longitud = float(cajero.longitud)
+        self.depositos = bool(cajero.depositos)
+        self.saldo = float(cajero.saldo or 0)
+        self.apertura = cajero.hora_apertura
+        self.cierre = cajero.hora_cierre
+        self.dias = dias_semana(cajero.dias_operacion)
+        self.datos = cajero.to_dict()
+
+    def abierto(self, momento):
+        """True si el cajero opera en `momento` (datetime local)"""
+        if self.dias is not None and momento.weekday() not in self.dias:
+            return False
+        if self.apertura is None or self.cierre is None or self.apertura == self.cierre:
+            return True
+        hora = momento.time()
+        if self.apertura < self.cierre:
+            return self.apertura <= hora < self.cierre
+        # Horario que cruza la medianoche (22:00 - 06:00)
+        return hora >= self.apertura or hora < self.cierre
+
+
+class IndiceCajeros:
+    """Grilla lat/lon de cajeros activos con búsqueda de k vecinos más cercanos"""
+
+    def __init__(self, celda_grados=0.05, ttl=300):
+        self.celda_grados = celda_grados
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._recarga = threading.Lock()
+        self._celdas = None
+        self._por_id = {}
+        self._extension = None
+        self._cargado_en = 0.0
+        self.recargas = 0
+        self.actualizaciones = 0
+
+    def _celda(self, latitud, longitud):
+        return (math.floor(latitud / self.celda_grados), math.floor(longitud / self.celda_grados))
+
+    def recargar(self):
+        """Reconstruye el índice con los cajeros activos de la base"""
+        celdas = {}
+        por_id = {}
+        for cajero in Cajero.query.filter(Cajero.activo == True).yield_per(5000):
+            entrada = Entrada(cajero)
+            por_id[entrada.id] = entrada
+            celdas.setdefault(self._celda(entrada.latitud, entrada.longitud), []).append(entrada)
+
+        with self._lock:
+            self._celdas = celdas
+            self._por_id = por_id
+            self._extension = self._calcular_extension(celdas)
+            self._cargado_en = time.monotonic()
+            self.recargas += 1
+
+    @staticmethod
+    def _calcular_extension(celdas):
+        if not celdas:
+            return None
+        filas = [i for i, _ in celdas]
+        columnas = [j for _, j in celdas]
+        return (min(filas), max(filas), min(columnas), max(columnas))
+
+    def invalidar(self):
+        with self._lock:
+            self._celdas = None
+
+    def _vigente(self):
+        with self._lock:
+            celdas, extension = self._celdas, self._extension
+            vencido = time.monotonic() - self._cargado_en > self.ttl
+        if celdas is None or vencido:
+            # Una sola recarga a la vez; los demás esperan y usan la nueva
+            with self._recarga:
+                with self._lock:
+                    vigente = self._celdas is not None and time.monotonic() - self._cargado_en <= self.ttl
+                if not vigente:
+                    self.recargar()
+            with self._lock:
+                celdas, extension = self._celdas, self._extension
+        return celdas, extension
+
+    def aplicar(self, cambios):
+        """
+        Aplica cambios confirmados {id_cajero: Entrada | None}.
+        None quita el cajero (eliminado o inactivo). Cada celda tocada se
+        reemplaza por una lista nueva: las búsquedas en curso no la ven a medias.
+        """
+        with self._lock:
+            if self._celdas is None:
+                return
+            for id_cajero, entrada in cambios.items():
+                anterior = self._por_id.pop(id_cajero, None)
+                if anterior is not None:
+                    clave = self._celda(anterior.latitud, anterior.longitud)
+                    restantes = [e for e in self._celdas.get(clave, ()) if e.id != id_cajero]
+                    if restantes:
+                        self._celdas[clave] = restantes
+                    else:
+                        self._celdas.pop(clave, None)
+                if entrada is not None:
+                    clave = self._celda(entrada.latitud, entrada.longitud)
+                    self._celdas[clave] = self._celdas.get(clave, []) + [entrada]
+                    self._por_id[id_cajero] = entrada
+            self._extension = self._calcular_extension(self._celdas)
+            self.actualizaciones += len(cambios)
+
+    def actualizar_saldos(self, saldos):
+        """Actualiza el efectivo de los cajeros {id_cajero: saldo} ya confirmado"""
+        with self._lock:
+            entradas = [(self._por_id.get(id_cajero), saldo) for id_cajero, saldo in saldos.items()]
+        for entrada, saldo in entradas:
+            if entrada is not None:
+                entrada.saldo = float(saldo)
+                entrada.datos['saldo_disponible'] = float(saldo)
+
+    def _anillo(self, fila, columna, radio):
+        """Celdas a distancia de Chebyshev exactamente `radio` de (fila, columna)"""
+        if radio == 0:
+            yield (fila, columna)
+            return
+        for j in range(columna - radio, columna + radio + 1):
+            yield (fila - radio, j)
+            yield (fila + radio, j)
+        for i in range(fila - radio + 1, fila + radio):
+            yield (i, columna - radio)
+            yield (i, columna + radio)
+
+    def _cota_km(self, latitud, anillo):
+        """
+        Distancia mínima desde el punto a cualquier cajero fuera de los anillos
+        0..anillo. El lado más corto de la celda es el de longitud, que se
+        encoge con cos(latitud); se usa la latitud más alejada del ecuador que
+        alcanza el siguiente anillo. El factor 0.99 cubre la diferencia entre
+        el arco del paralelo y la distancia haversine.
+        """
+        latitud_max = min(90.0, abs(latitud) + (anillo + 1) * self.celda_grados)
+        return 0.99 * anillo * self.celda_grados * KM_POR_GRADO * math.cos(math.radians(latitud_max))
+
+    def cercanos(self, latitud, longitud, k=10, radio_km=None, filtro=None):
+        """
+        Los k cajeros más cercanos que cumplen `filtro(entrada)`, dentro de
+        `radio_km` si se indica. Retorna [(distancia_km, Entrada)] ordenada.
+        """
+        celdas, extension = self._vigente()
+        if not celdas or k <= 0:
+            return []
+
+        fila, columna = self._celda(latitud, longitud)
+        fila_min, fila_max, columna_min, columna_max = extension
+        ultimo_anillo = max(fila - fila_min, fila_max - fila, columna - columna_min, columna_max - columna, 0)
+
+        # Max-heap de tamaño k: (-distancia, id, entrada)
+        mejores = []
+        for anillo in range(ultimo_anillo + 1):
+            for clave in self._anillo(fila, columna, anillo):
+                for entrada in celdas.get(clave, ()):
+                    distancia = haversine_km(latitud, longitud, entrada.latitud, entrada.longitud)
+                    if radio_km is not None and distancia > radio_km:
+                        continue
+                    if len(mejores) == k and distancia >= -mejores[0][0]:
+                        continue
+                    if filtro is not None and not filtro(entrada):
+                        continue
+                    if len(mejores) < k:
+                        heapq.heappush(mejores, (-distancia, entrada.id, entrada))
+                    else:
+                        heapq.heapreplace(mejores, (-distancia, entrada.id, entrada))
+
+            cota = self._cota_km(latitud, anillo)
+            if radio_km is not None and cota > radio_km:
+                break
+            if len(mejores) == k and cota >= -mejores[0][0]:
+                break
+
+        return sorted(((-d, e) for d, _, e in mejores), key=lambda par: (par[0], par[1].id))
+
+    def estado(self):
+        with self._lock:
+            cargado = self._celdas is not None
+            return {
+                'cargado': cargado,
+                'cajeros': len(self._por_id) if cargado else 0,
+                'celdas': len(self._celdas) if cargado else 0,
+                'celda_grados': self.celda_grados,
+                'edad_segundos': round(time.monotonic() - self._cargado_en, 1) if cargado else None,
+                'ttl': self.ttl,
+                'recargas': self.recargas,
+                'actualizaciones': self.actualizaciones
+            }
+
+
+indice = IndiceCajeros()
+
+
+class CajeroError(Exception):
+    """El cajero no puede atender el retiro (se devuelve al cliente)"""
+
+    def __init__(self, mensaje, codigo=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.codigo = codigo
+
+
+def cajero_para_retiro(id_cajero, monto):
+    """
+    Valida que el cajero exista, esté activo y tenga efectivo para `monto`.
+    Es una comprobación temprana (sin bloqueo); la definitiva es dispensar().
+    """
+    if isinstance(id_cajero, bool):
+        raise CajeroError('id_cajero inválido')
+    try:
+        id_cajero = int(id_cajero)
+    except (TypeError, ValueError):
+        raise CajeroError('id_cajero inválido')
+
+    cajero = db.session.get(Cajero, id_cajero)
+    if not cajero:
+        raise CajeroError('Cajero no encontrado', 404)
+    if not cajero.activo:
+        raise CajeroError('Cajero fuera de servicio')
+    if (cajero.saldo or 0) < monto:
+        raise CajeroError('El cajero no tiene efectivo suficiente para este monto')
+    return cajero
+
+
+def dispensar(id_cajero, monto):
+    """
+    Descuenta `monto` del efectivo del cajero con un UPDATE condicional y
+    retorna el saldo resultante. Llamar al final de la transacción del
+    retiro, justo antes del commit (después de bloquear la cuenta).
+    """
+    saldo = db.session.execute(
+        update(Cajero).where(
+            Cajero.id_cajero == id_cajero,
+            Cajero.activo == True,
+            Cajero.saldo >= monto
+        ).values(
+            saldo=Cajero.saldo - monto
+        ).returning(Cajero.saldo).execution_options(synchronize_session=False)
+    ).scalar()
+
+    if saldo is None:
+        raise CajeroError('El cajero no tiene efectivo suficiente o está fuera de servicio')
+
+    db.session.info.setdefault('cajeros_saldo', {})[id_cajero] = saldo
+    return saldo
+
+
+def _registrar_cambios(session, flush_context):
+    # session.dirty incluye objetos con atributos asignados sin cambio neto
+    modificados = (obj for obj in session.dirty if session.is_modified(obj))
+    for obj in chain(session.new, modificados):
+        if isinstance(obj, Cajero):
+            cambios = session.info.setdefault('cajeros_cambios', {})
+            cambios[obj.id_cajero] = Entrada(obj) if obj.activo else None
+    for obj in session.deleted:
+        if isinstance(obj, Cajero):
+            session.info.setdefault('cajeros_cambios', {})[obj.id_cajero] = None
+
+
+def _despues_commit(session):
+    cambios = session.info.pop('cajeros_cambios', None)
+    if cambios:
+        indice.aplicar(cambios)
+    saldos = session.info.pop('cajeros_saldo', None)
+    if saldos:
+        indice.actualizar_saldos(saldos)
+
+
+def _despues_rollback(session):
+    session.info.pop('cajeros_cambios', None)
+    session.info.pop('cajeros_saldo', None)
+
+
+def init_app(app):
+    """Configura el índice y su actualización al confirmar cambios de cajeros"""
+    global indice
+    indice = IndiceCajeros(
+        app.config.get('CAJEROS_CELDA_GRADOS', 0.05),
+        app.config.get('CAJEROS_INDICE_TTL', 300)
+    )
+
+    if not event.contains(Session, 'after_flush', _registrar_cambios):
+        event.listen(Session, 'after_flush', _registrar_cambios)
+        event.listen(Session, 'after_commit', _despues_commit)
+        event.listen(Session, 'after_rollback', _despues_rollback)
+
+
+def ahora_local(zona):
+    """datetime actual en la zona horaria de los cajeros (hora local si no se reconoce)"""
+    if zona:
+        try:
+            from zoneinfo import ZoneInfo
+            return datetime.now(ZoneInfo(zona)).replace(tzinfo=None)
+        except Exception:
+            pass
+    return datetime.now()
@@ -0,0 +1,153 @@
+"""
+Asignación de códigos de retiro sin tarjeta
+
+Los códigos (CODIGO_RETIRO_DIGITOS dígitos, con `secrets`) solo tienen que
+ser únicos entre los retiros PENDIENTE: el índice único parcial de
+database/migrations/0006 reemplaza a la restricción UNIQUE sobre todos los
+códigos, que con el tiempo agotaba el espacio de 10^6 con códigos ya usados
+o expirados. El canje busca por ese mismo índice (código + PENDIENTE), que
+solo contiene los códigos vigentes.
+
+Dos niveles evitan colisiones:
+- En el proceso, un conjunto de códigos reservados entre la generación y el
+  commit: dos solicitudes simultáneas no eligen el mismo código.
+- En la base, el índice único parcial: el INSERT corre en un SAVEPOINT y,
+  si choca con un código pendiente de otro proceso, se reintenta con otro.
+"""
+
+import secrets
+import threading
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models.transaccion import RetiroSinTarjeta
+
+
+class CodigosAgotados(Exception):
+    """No se encontró un código libre en el número de intentos permitido"""
+
+
+class EstadisticasCodigos:
+    """Contadores de asignación de códigos, seguros entre hilos"""
+
+    CAMPOS = ('generados', 'colisiones_memoria', 'colisiones_bd', 'agotados')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores = dict.fromkeys(self.CAMPOS, 0)
+
+    def registrar(self, campo, cantidad=1):
+        with self._lock:
+            self._valores[campo] += cantidad
+
+    def reiniciar(self):
+        with self._lock:
+            self._valores = dict.fromkeys(self.CAMPOS, 0)
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self._valores)
+
+
+estadisticas = EstadisticasCodigos()
+
+
+class AsignadorCodigos:
+    """Códigos numéricos aleatorios con reserva en memoria hasta el commit"""
+
+    def __init__(self, digitos=6):
+        self.digitos = digitos
+        self._espacio = 10 ** digitos
+        self._lock = threading.Lock()
+        self._reservados = set()
+
+    def reservar(self, intentos):
+        """Retorna un código no reservado por otra solicitud de este proceso"""
+        for _ in range(intentos):
+            codigo = str(secrets.randbelow(self._espacio)).zfill(self.digitos)
+            with self._lock:
+                if codigo not in self._reservados:
+                    self._reservados.add(codigo)
+                    return codigo
+            estadisticas.registrar('colisiones_memoria')
+        return None
+
+    def liberar(self, *codigos):
+        with self._lock:
+            self._reservados.difference_update(codigos)
+
+    def reservados(self):
+        with self._lock:
+            return len(self._reservados)
+
+
+asignador = AsignadorCodigos()
+
+
+def crear_retiro(id_cuenta, monto, fecha_expiracion):
+    """
+    Agrega a la sesión un RetiroSinTarjeta PENDIENTE con un código libre y
+    lo inserta (flush). El código queda reservado hasta el commit o rollback
+    de la sesión. Lanza CodigosAgotados si no encuentra código libre.
+    """
+    intentos = current_app.config.get('CODIGO_RETIRO_MAX_INTENTOS', 10)
+
+    for _ in range(intentos):
+        codigo = asignador.reservar(intentos)
+        if codigo is None:
+            break
+        db.session.info.setdefault('codigos_reservados', []).append(codigo)
+
+        retiro = RetiroSinTarjeta(
+            id_cuenta=id_cuenta,
+            codigo=codigo,
+            monto=monto,
+            fecha_expiracion=fecha_expiracion,
+            estado=RetiroSinTarjeta.ESTADO_PENDIENTE
+        )
+        try:
+            with db.session.begin_nested():
+                db.session.add(retiro)
+        except IntegrityError:
+            # Otro proceso tiene ese código pendiente
+            estadisticas.registrar('colisiones_bd')
+            continue
+
+        estadisticas.registrar('generados')
+        return retiro
+
+    estadisticas.registrar('agotados')
+    raise CodigosAgotados('No hay códigos de retiro disponibles, intente nuevamente')
+
+
+def buscar_pendiente(codigo, bloquear=False):
+    """Retiro PENDIENTE con ese código (búsqueda por el índice único parcial)"""
+    consulta = RetiroSinTarjeta.query.filter_by(
+        codigo=codigo,
+        estado=RetiroSinTarjeta.ESTADO_PENDIENTE
+    )
+    if bloquear:
+        consulta = consulta.with_for_update()
+    return consulta.first()
+
+
+def _liberar_reservas(session, transaccion):
+    # after_transaction_end también se emite al cerrar un SAVEPOINT (begin_nested): solo cuenta la transacción externa
+    if transaccion.parent is not None:
+        return
+    codigos = session.info.pop('codigos_reservados', None)
+    if codigos:
+        asignador.liberar(*codigos)
+
+
+def init_app(app):
+    """Configura el asignador y la liberación de reservas al terminar la transacción"""
+    global asignador
+    asignador = AsignadorCodigos(app.config.get('CODIGO_RETIRO_DIGITOS', 6))
+
+    if not event.contains(Session, 'after_transaction_end', _liberar_reservas):
+        event.listen(Session, 'after_transaction_end', _liberar_reservas)
@@ -0,0 +1,35 @@
+"""
+Verificación de contraseñas de banca en línea fuera del hilo de la petición
+
+La derivación de clave de las contraseñas (scrypt/pbkdf2 de werkzeug) corre
+en un pool de procesos acotado. Cuando la cola está llena, el login falla de
+inmediato con PoolSaturado (429) en lugar de ocupar todos los hilos del
+servidor y dejar sin atender las demás consultas.
+"""
+
+import os
+
+from werkzeug.security import check_password_hash
+
+from core.pool import PoolAcotado
+
+pool = PoolAcotado('login', os.cpu_count() or 1, 16, procesos=True)
+
+
+def init_app(app):
+    """Configura el pool de login según la configuración de la app"""
+    global pool
+    pool.cerrar()
+    pool = PoolAcotado(
+        'login',
+        app.config.get('LOGIN_POOL_PROCESOS') or os.cpu_count() or 1,
+        app.config.get('LOGIN_POOL_MAX_PENDIENTES', 16),
+        procesos=True
+    )
+
+
+def verificar_password(persona, password, timeout=None):
+    """Equivalente a persona.check_password ejecutado en el pool de login"""
+    if not persona.password_hash:
+        return False
+    return pool.ejecutar(check_password_hash, persona.password_hash, password, timeout=timeout)
@@ -0,0 +1,153 @@
+"""
+Débitos por lote de pagos de servicios
+
+La API de Servicios envía por lotes los débitos de su outbox (un item por
+pago con cuenta). Cada débito crea una Transaccion de tipo PAGO_SERVICIO
+cuya referencia es el comprobante del pago. La referencia es única entre los
+pagos de servicio (database/migrations/0004), así un reenvío del mismo lote
+tras un timeout devuelve la transacción ya creada en lugar de debitar dos
+veces.
+
+Las cuentas se bloquean igual que en el motor de transferencias (una
+consulta, orden ascendente) y el lote se reintenta ante deadlock.
+"""
+
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from extensions import db
+from models.transaccion import Transaccion
+from core.saldos import registrar_movimiento
+from core.transferencias import bloquear_cuentas, con_reintentos
+
+
+def _validar_item(item):
+    """Valida la forma de un débito del lote. Retorna (datos, error)"""
+    if not isinstance(item, dict):
+        return None, 'Item inválido'
+
+    for campo in ('id_cuenta', 'monto', 'referencia'):
+        if campo not in item:
+            return None, f'Campo requerido: {campo}'
+
+    try:
+        id_cuenta = int(item['id_cuenta'])
+        monto = Decimal(str(item['monto']))
+    except (ArithmeticError, TypeError, ValueError):
+        return None, 'Datos inválidos'
+
+    if not monto.is_finite() or monto <= 0:
+        return None, 'El monto debe ser mayor a cero'
+
+    referencia = str(item['referencia'])[:50]
+    if not referencia:
+        return None, 'Referencia inválida'
+
+    descripcion = item.get('descripcion') or 'Pago de servicio'
+    return (id_cuenta, monto, referencia, descripcion), None
+
+
+def _ejecutar(items, resultados):
+    cuentas = bloquear_cuentas(id_cuenta for _, (id_cuenta, _, _, _) in items)
+
+    # Con las cuentas bloqueadas, un débito concurrente con la misma referencia ya terminó
+    referencias = [referencia for _, (_, _, referencia, _) in items]
+    existentes = {
+        t.referencia: t for t in Transaccion.query.filter(
+            Transaccion.tipo_transaccion == Transaccion.TIPO_PAGO_SERVICIO,
+            Transaccion.referencia.in_(referencias)
+        )
+    }
+
+    debitos = {}
+    movimientos = {}
+    filas = []
+    aplicados = []
+    for indice, (id_cuenta, monto, referencia, descripcion) in items:
+        if referencia in existentes:
+            transaccion = existentes[referencia]
+            resultados[indice] = {
+                'indice': indice,
+                'success': True,
+                'id_transaccion': transaccion.id_transaccion,
+                'referencia': referencia,
+                'duplicado': True
+            }
+            continue
+
+        cuenta = cuentas.get(id_cuenta)
+        if not cuenta:
+            resultados[indice] = {'indice': indice, 'success': False, 'error': 'Cuenta no encontrada'}
+        elif cuenta.estado != 'ACTIVA':
+            resultados[indice] = {'indice': indice, 'success': False, 'error': 'Cuenta no activa'}
+        elif cuenta.saldo_disponible < monto:
+            resultados[indice] = {'indice': indice, 'success': False, 'error': 'Saldo insuficiente'}
+        else:
+            cuenta.saldo_actual -= monto
+            debitos[id_cuenta] = debitos.get(id_cuenta, 0) + monto
+            movimientos[id_cuenta] = movimientos.get(id_cuenta, 0) + 1
+            aplicados.append(indice)
+            filas.append({
+                'id_cuenta_origen': id_cuenta,
+                'tipo_transaccion': Transaccion.TIPO_PAGO_SERVICIO,
+                'monto': monto,
+                'descripcion': descripcion,
+                'referencia': referencia
+            })
+
+    for id_cuenta, cantidad in movimientos.items():
+        registrar_movimiento(cuentas[id_cuenta], debito=debitos[id_cuenta], movimientos=cantidad)
+
+    if filas:
+        insertadas = db.session.execute(
+            insert(Transaccion).returning(
+                Transaccion.id_transaccion,
+                Transaccion.referencia,
+                sort_by_parameter_order=True
+            ),
+            filas
+        ).all()
+
+        for indice, fila in zip(aplicados, insertadas):
+            resultados[indice] = {
+                'indice': indice,
+                'success': True,
+                'id_transaccion': fila.id_transaccion,
+                'referencia': fila.referencia,
+                'duplicado': False
+            }
+
+    db.session.commit()
+    return len(filas)
+
+
+def debitar_lote(items):
+    """
+    Aplica un lote de débitos de pagos de servicios en una sola transacción.
+    Cada item se acepta o rechaza por separado (saldo, cuenta); un item con
+    una referencia ya debitada retorna la transacción existente.
+    Retorna (resultados, reintentos); resultados sigue el orden de `items`.
+    """
+    resultados = [None] * len(items)
+    validos = []
+    vistos = {}
+
+    for indice, item in enumerate(items):
+        datos, error = _validar_item(item)
+        if error:
+            resultados[indice] = {'indice': indice, 'success': False, 'error': error}
+        elif datos[2] in vistos:
+            resultados[indice] = {
+                'indice': indice, 'success': False,
+                'error': f'Referencia repetida en el lote (item {vistos[datos[2]]})'
+            }
+        else:
+            vistos[datos[2]] = indice
+            validos.append((indice, datos))
+
+    reintentos = 0
+    if validos:
+        _, reintentos = con_reintentos(_ejecutar, validos, resultados)
+
+    return resultados, reintentos
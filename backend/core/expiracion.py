@@ -0,0 +1,145 @@
+"""
+Expiración de códigos de retiro sin tarjeta
+
+Un barrido marca EXPIRADO, por lotes de EXPIRACION_RETIROS_LOTE, los
+retiros PENDIENTE cuya fecha_expiracion ya pasó. Cada lote es un único
+UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED LIMIT n) en su
+propia transacción: no espera a un código que se está canjeando en ese
+momento y varios procesos pueden barrer a la vez sin pisarse. Así el
+índice de pendientes (database/migrations/0006) solo guarda códigos vigentes.
+En la misma transacción se liberan las retenciones de fondos de esos códigos.
+
+La fecha se compara con datetime.utcnow(), igual que al generar el código.
+El barrido corre con `python expirar_retiros.py` o, si se activa
+EXPIRACION_RETIROS_WORKER (desactivado por defecto), en un hilo del servidor.
+No se inicia por defecto porque create_app() también lo llaman los scripts de
+verificación y benchmark y cada worker de gunicorn.
+"""
+
+import logging
+import threading
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import func, select, update
+
+from extensions import db
+from models.transaccion import RetiroSinTarjeta
+from models.retencion import RetencionFondos
+from core import retenciones
+
+logger = logging.getLogger(__name__)
+
+
+class EstadisticasExpiracion:
+    """Contadores de los barridos, seguros entre hilos"""
+
+    CAMPOS = ('barridos', 'lotes', 'expirados', 'errores')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores = dict.fromkeys(self.CAMPOS, 0)
+        self.ultimo_barrido = None
+
+    def registrar(self, campo, cantidad=1):
+        with self._lock:
+            self._valores[campo] += cantidad
+            if campo == 'barridos':
+                self.ultimo_barrido = datetime.utcnow()
+
+    def to_dict(self):
+        with self._lock:
+            datos = dict(self._valores)
+            datos['ultimo_barrido'] = self.ultimo_barrido.isoformat() if self.ultimo_barrido else None
+            return datos
+
+
+estadisticas = EstadisticasExpiracion()
+
+
+def expirar_lote(ahora, lote):
+    """Expira hasta `lote` retiros vencidos en una transacción. Retorna los ids expirados"""
+    vencidos = select(RetiroSinTarjeta.id_retiro).where(
+        RetiroSinTarjeta.estado == RetiroSinTarjeta.ESTADO_PENDIENTE,
+        RetiroSinTarjeta.fecha_expiracion < ahora
+    ).order_by(RetiroSinTarjeta.fecha_expiracion).limit(lote).with_for_update(skip_locked=True)
+
+    try:
+        ids = db.session.execute(
+            update(RetiroSinTarjeta).where(
+                RetiroSinTarjeta.id_retiro.in_(vencidos.scalar_subquery()),
+                # Un canje pudo confirmarse entre el SELECT y el UPDATE
+                RetiroSinTarjeta.estado == RetiroSinTarjeta.ESTADO_PENDIENTE
+            ).values(
+                estado=RetiroSinTarjeta.ESTADO_EXPIRADO
+            ).returning(RetiroSinTarjeta.id_retiro).execution_options(synchronize_session=False)
+        ).scalars().all()
+        # El monto retenido de esos códigos vuelve al disponible de sus cuentas
+        retenciones.liberar_retiros(ids, RetencionFondos.ESTADO_EXPIRADA)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    estadisticas.registrar('lotes')
+    estadisticas.registrar('expirados', len(ids))
+    return ids
+
+
+def expirar_pendientes(lote=None, ahora=None):
+    """Expira todos los retiros vencidos, lote por lote. Retorna cuántos expiró"""
+    lote = lote or current_app.config.get('EXPIRACION_RETIROS_LOTE', 1000)
+    ahora = ahora or datetime.utcnow()
+
+    total = 0
+    while True:
+        ids = expirar_lote(ahora, lote)
+        total += len(ids)
+        if len(ids) < lote:
+            break
+
+    estadisticas.registrar('barridos')
+    return total
+
+
+def contar_pendientes(ahora=None):
+    """Retiros PENDIENTE vigentes y ya vencidos (a la espera del barrido)"""
+    ahora = ahora or datetime.utcnow()
+    vigentes, vencidos = db.session.execute(
+        select(
+            func.count().filter(RetiroSinTarjeta.fecha_expiracion >= ahora),
+            func.count().filter(RetiroSinTarjeta.fecha_expiracion < ahora)
+        ).where(RetiroSinTarjeta.estado == RetiroSinTarjeta.ESTADO_PENDIENTE)
+    ).one()
+    return {'pendientes_vigentes': vigentes, 'pendientes_vencidos': vencidos}
+
+
+def _bucle(app, intervalo, detener):
+    while not detener.is_set():
+        with app.app_context():
+            try:
+                expirar_pendientes()
+            except Exception:
+                db.session.rollback()
+                estadisticas.registrar('errores')
+                logger.exception('No se pudieron expirar los retiros sin tarjeta')
+            finally:
+                db.session.remove()
+        detener.wait(intervalo)
+
+
+def iniciar_worker(app):
+    """Lanza el barrido periódico en un hilo daemon. Retorna el Event que lo detiene"""
+    detener = threading.Event()
+    hilo = threading.Thread(
+        target=_bucle, args=(app, app.config.get('EXPIRACION_RETIROS_INTERVALO', 60), detener),
+        name='expiracion-retiros', daemon=True
+    )
+    hilo.start()
+    return detener
+
+
+def init_app(app):
+    """Inicia el barrido dentro del proceso si EXPIRACION_RETIROS_WORKER está activo"""
+    if app.config.get('EXPIRACION_RETIROS_WORKER'):
+        app.extensions['expiracion_retiros'] = iniciar_worker(app)
@@ -0,0 +1,99 @@
+"""
+Historial de transacciones con paginación por keyset
+
+El orden del historial es (fecha_hora DESC, id_transaccion DESC). El cursor
+codifica la última fila entregada y la página siguiente se obtiene con
+(fecha_hora, id_transaccion) < (cursor), que el índice resuelve sin OFFSET.
+"""
+
+import base64
+from datetime import datetime
+
+from sqlalchemy import select, tuple_, union_all
+from sqlalchemy.orm import aliased
+
+from extensions import db
+from models.transaccion import Transaccion
+
+
+def codificar_cursor(transaccion):
+    """Genera el cursor opaco que apunta a la transacción indicada"""
+    valor = f'{transaccion.fecha_hora.isoformat()}|{transaccion.id_transaccion}'
+    return base64.urlsafe_b64encode(valor.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Retorna (fecha_hora, id_transaccion). Lanza ValueError si es inválido"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valor = base64.urlsafe_b64decode(cursor + relleno).decode()
+        fecha, id_transaccion = valor.split('|')
+        return datetime.fromisoformat(fecha), int(id_transaccion)
+    except Exception:
+        raise ValueError('Cursor inválido')
+
+
+def _condiciones(tipo=None, desde=None, hasta=None, cursor=None):
+    condiciones = []
+
+    if tipo:
+        condiciones.append(Transaccion.tipo_transaccion == tipo.upper())
+    if desde:
+        condiciones.append(Transaccion.fecha_hora >= desde)
+    if hasta:
+        condiciones.append(Transaccion.fecha_hora <= hasta)
+    if cursor:
+        fecha, id_transaccion = decodificar_cursor(cursor)
+        condiciones.append(
+            tuple_(Transaccion.fecha_hora, Transaccion.id_transaccion) <
+            tuple_(fecha, id_transaccion)
+        )
+
+    return condiciones
+
+
+def consulta_historial(id_cuenta=None, tipo=None, desde=None, hasta=None, cursor=None):
+    """
+    Construye la consulta ordenada del historial con los filtros indicados.
+
+    Con `id_cuenta`, en lugar de `origen = X OR destino = X` (que no puede usar
+    un solo índice ordenado) se hace UNION ALL de dos ramas, cada una servida
+    por IDX_TRANS_CUENTA_O_FECHA / IDX_TRANS_CUENTA_D_FECHA; PostgreSQL las
+    combina con Merge Append sin ordenar todo el historial.
+    """
+    condiciones = _condiciones(tipo, desde, hasta, cursor)
+
+    if id_cuenta:
+        como_origen = select(Transaccion).where(
+            Transaccion.id_cuenta_origen == id_cuenta, *condiciones
+        )
+        # La segunda rama excluye lo que ya trae la primera (origen = destino)
+        como_destino = select(Transaccion).where(
+            Transaccion.id_cuenta_destino == id_cuenta,
+            Transaccion.id_cuenta_origen.is_distinct_from(id_cuenta),
+            *condiciones
+        )
+        modelo = aliased(Transaccion, union_all(como_origen, como_destino).subquery())
+        query = db.session.query(modelo)
+    else:
+        modelo = Transaccion
+        query = Transaccion.query.filter(*condiciones)
+
+    return query.order_by(
+        modelo.fecha_hora.desc(),
+        modelo.id_transaccion.desc()
+    )
+
+
+def pagina_historial(limite, **filtros):
+    """
+    Obtiene una página del historial.
+    Retorna (transacciones, siguiente_cursor); el cursor es None en la última página.
+    """
+    filas = consulta_historial(**filtros).limit(limite + 1).all()
+
+    if len(filas) > limite:
+        filas = filas[:limite]
+        return filas, codificar_cursor(filas[-1])
+
+    return filas, None
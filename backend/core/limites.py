@@ -0,0 +1,204 @@
+"""
+Límites diarios de retiro con contador en memoria
+
+En lugar de sumar las transacciones del día en cada retiro, se mantiene un
+acumulado por tarjeta y por cuenta que se reserva de forma atómica antes del
+commit y se libera si el retiro falla. El contador se reconstruye desde la
+base de datos al iniciar la aplicación y a cada medianoche (UTC, igual que
+Transaccion.fecha_hora).
+
+Nota: el contador vive en el proceso y solo es exacto con un único worker.
+Con varios workers cada uno lleva su propio acumulado y cada uno aplicaría el
+límite completo (una tarjeta podría retirar N veces su límite); la
+reconciliación solo corre al iniciar y a medianoche. Para ese caso se activa
+LIMITES_VERIFICAR_BD: antes de reservar se leen de la base los retiros del
+día de la cuenta y la tarjeta. La fila de la cuenta ya está bloqueada
+(FOR UPDATE) en ese momento y todo retiro de la cuenta o de sus tarjetas
+pasa por ese bloqueo, así el total leído es exacto.
+"""
+
+import threading
+from datetime import datetime, timedelta, time
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import func
+
+from extensions import db
+from models.transaccion import Transaccion
+
+CERO = Decimal('0')
+
+
+def hoy():
+    return datetime.utcnow().date()
+
+
+def clave_tarjeta(id_tarjeta):
+    return ('tarjeta', id_tarjeta)
+
+
+def clave_cuenta(id_cuenta):
+    return ('cuenta', id_cuenta)
+
+
+class ContadorDiario:
+    """Acumulado de retiros del día por clave, seguro entre hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fecha = hoy()
+        self._totales = {}
+
+    def _rotar(self):
+        fecha = hoy()
+        if fecha != self._fecha:
+            self._fecha = fecha
+            self._totales = {}
+
+    def reservar(self, consumos):
+        """
+        Reserva todos los consumos [(clave, monto, limite)] o ninguno.
+        Retorna None si se reservaron, o la clave cuyo límite se excede.
+        """
+        with self._lock:
+            self._rotar()
+            for clave, monto, limite in consumos:
+                if limite is not None and self._totales.get(clave, CERO) + monto > limite:
+                    return clave
+            for clave, monto, _ in consumos:
+                self._totales[clave] = self._totales.get(clave, CERO) + monto
+            return None
+
+    def liberar(self, consumos):
+        """Revierte una reserva (el retiro no llegó a confirmarse)"""
+        with self._lock:
+            self._rotar()
+            for clave, monto, _ in consumos:
+                restante = self._totales.get(clave, CERO) - monto
+                self._totales[clave] = max(restante, CERO)
+
+    def total(self, clave):
+        with self._lock:
+            self._rotar()
+            return self._totales.get(clave, CERO)
+
+    def cargar(self, fecha, totales):
+        """
+        Combina los totales reconciliados de `fecha` con el acumulado. La
+        consulta corrió fuera del lock: las reservas hechas mientras tanto ya
+        están en el acumulado, por eso se conserva el mayor de ambos.
+        """
+        with self._lock:
+            self._rotar()
+            if fecha != self._fecha:
+                self._fecha = fecha
+                self._totales = {}
+            for clave, total in totales.items():
+                self._totales[clave] = max(self._totales.get(clave, CERO), total)
+
+    def fijar(self, fecha, totales):
+        """Reemplaza el acumulado de esas claves con totales exactos leídos de la base"""
+        with self._lock:
+            self._rotar()
+            if fecha != self._fecha:
+                return
+            self._totales.update(totales)
+
+
+contador = ContadorDiario()
+
+
+def consumos_retiro(cuenta, monto, tarjeta=None):
+    """Arma la lista de consumos [(clave, monto, limite)] de un retiro"""
+    consumos = [(clave_cuenta(cuenta.id_cuenta), monto, cuenta.limite_diario)]
+
+    if tarjeta is not None and tarjeta.debito is not None:
+        consumos.append(
+            (clave_tarjeta(tarjeta.id_tarjeta), monto, tarjeta.debito.limite_diario_retiro)
+        )
+
+    return consumos
+
+
+def _retiros_del_dia(fecha):
+    return db.session.query(func.sum(Transaccion.monto)).filter(
+        Transaccion.tipo_transaccion == Transaccion.TIPO_RETIRO,
+        Transaccion.estado == 'COMPLETADA',
+        Transaccion.fecha_hora >= datetime.combine(fecha, time.min)
+    )
+
+
+def totales_bd(fecha, claves):
+    """Retiros confirmados de `fecha` de cada clave (cuenta o tarjeta)"""
+    columnas = {'cuenta': Transaccion.id_cuenta_origen, 'tarjeta': Transaccion.id_tarjeta}
+    return {
+        clave: _retiros_del_dia(fecha).filter(columnas[clave[0]] == clave[1]).scalar() or CERO
+        for clave in claves
+    }
+
+
+def reservar(consumos):
+    """
+    Reserva los consumos en el contador (ver ContadorDiario.reservar). Con
+    LIMITES_VERIFICAR_BD primero toma de la base los totales del día: debe
+    llamarse con la cuenta bloqueada.
+    """
+    if current_app.config.get('LIMITES_VERIFICAR_BD'):
+        fecha = hoy()
+        contador.fijar(fecha, totales_bd(fecha, [clave for clave, _, limite in consumos if limite is not None]))
+    return contador.reservar(consumos)
+
+
+def reconciliar():
+    """Recalcula el acumulado del día desde las transacciones de retiro"""
+    fecha = hoy()
+    base = _retiros_del_dia(fecha)
+
+    totales = {}
+    por_tarjeta = base.add_columns(Transaccion.id_tarjeta).filter(
+        Transaccion.id_tarjeta.isnot(None)
+    ).group_by(Transaccion.id_tarjeta)
+    for total, id_tarjeta in por_tarjeta:
+        totales[clave_tarjeta(id_tarjeta)] = total
+
+    por_cuenta = base.add_columns(Transaccion.id_cuenta_origen).filter(
+        Transaccion.id_cuenta_origen.isnot(None)
+    ).group_by(Transaccion.id_cuenta_origen)
+    for total, id_cuenta in por_cuenta:
+        totales[clave_cuenta(id_cuenta)] = total
+
+    contador.cargar(fecha, totales)
+    return len(totales)
+
+
+def _programar_medianoche(app):
+    ahora = datetime.utcnow()
+    siguiente = datetime.combine(ahora.date() + timedelta(days=1), time.min)
+    timer = threading.Timer((siguiente - ahora).total_seconds() + 1, _reconciliar_programado, args=(app,))
+    timer.daemon = True
+    timer.start()
+
+
+def _reconciliar_programado(app):
+    try:
+        with app.app_context():
+            reconciliar()
+    except Exception as e:
+        app.logger.warning(f'No se pudo reconciliar límites diarios: {e}')
+    finally:
+        _programar_medianoche(app)
+
+
+def init_app(app):
+    """Reconciliar al iniciar y programar la reconciliación de medianoche"""
+    if not app.config.get('LIMITES_RECONCILIAR', True):
+        return
+
+    try:
+        with app.app_context():
+            reconciliar()
+    except Exception as e:
+        app.logger.warning(f'No se pudo reconciliar límites diarios: {e}')
+
+    _programar_medianoche(app)
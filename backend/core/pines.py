@@ -0,0 +1,133 @@
+"""
+Hash y verificación de PIN de tarjetas
+
+El PIN usa su propio método de hash (PIN_HASH_METODO, formato de werkzeug,
+p. ej. 'pbkdf2:sha256:20000'), más barato que el de las contraseñas de
+banca en línea. Al verificar un PIN guardado con otro método o costo, se
+vuelve a hashear con el método configurado (migración transparente). Ese
+rehash es opcional: si el pool está saturado se omite y se reintenta en la
+siguiente verificación, sin rechazar un PIN válido.
+
+La derivación corre en un pool acotado (core.pool) y las verificaciones
+exitosas se recuerdan durante PIN_CACHE_TTL segundos. La clave de caché es
+un HMAC con SECRET_KEY de (tarjeta, hash guardado, PIN): nunca se guarda el
+PIN y un cambio de PIN invalida las entradas anteriores.
+"""
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from core.pool import PoolAcotado, PoolSaturado
+
+METODO_DEFECTO = 'pbkdf2:sha256:20000'
+
+
+class CacheVerificaciones:
+    """Verificaciones exitosas recientes con TTL y tamaño máximo (LRU)"""
+
+    def __init__(self, ttl, maximo):
+        self.ttl = ttl
+        self.maximo = maximo
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def vigente(self, clave):
+        with self._lock:
+            expira = self._entradas.get(clave)
+            if expira is None:
+                return False
+            if expira < time.monotonic():
+                del self._entradas[clave]
+                return False
+            self._entradas.move_to_end(clave)
+            return True
+
+    def guardar(self, clave):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entradas[clave] = time.monotonic() + self.ttl
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+pool = PoolAcotado('pin', os.cpu_count() or 1, 64)
+cache = CacheVerificaciones(300, 10000)
+_prefijos = {}
+
+
+def init_app(app):
+    """Configura el pool y la caché según la configuración de la app"""
+    global pool, cache
+    pool.cerrar()
+    pool = PoolAcotado(
+        'pin',
+        app.config.get('PIN_POOL_TRABAJADORES') or os.cpu_count() or 1,
+        app.config.get('PIN_POOL_MAX_PENDIENTES', 64)
+    )
+    cache = CacheVerificaciones(
+        app.config.get('PIN_CACHE_TTL', 300),
+        app.config.get('PIN_CACHE_MAX', 10000)
+    )
+
+
+def metodo_configurado():
+    return current_app.config.get('PIN_HASH_METODO') or METODO_DEFECTO
+
+
+def _prefijo(metodo):
+    """Prefijo completo que werkzeug guarda para `metodo` (incluye costos por defecto)"""
+    if metodo not in _prefijos:
+        _prefijos[metodo] = generate_password_hash('', method=metodo).split('$', 1)[0]
+    return _prefijos[metodo]
+
+
+def hash_pin(pin):
+    return generate_password_hash(str(pin), method=metodo_configurado())
+
+
+def requiere_rehash(pin_hash):
+    return pin_hash.split('$', 1)[0] != _prefijo(metodo_configurado())
+
+
+def _clave_cache(tarjeta, pin):
+    mensaje = f'{tarjeta.id_tarjeta}|{tarjeta.pin_hash}|{pin}'.encode()
+    secreto = current_app.config['SECRET_KEY'].encode()
+    return hmac.new(secreto, mensaje, hashlib.sha256).digest()
+
+
+def verificar_pin(tarjeta, pin):
+    """
+    Verifica el PIN de la tarjeta. Si el hash guardado usa un método distinto
+    al configurado, actualiza tarjeta.pin_hash (se persiste con el commit del
+    llamador). Lanza PoolSaturado si el pool de hash está lleno al verificar.
+    """
+    pin = str(pin)
+
+    if cache.vigente(_clave_cache(tarjeta, pin)):
+        return True
+
+    if not pool.ejecutar(check_password_hash, tarjeta.pin_hash, pin):
+        return False
+
+    if requiere_rehash(tarjeta.pin_hash):
+        try:
+            tarjeta.pin_hash = pool.ejecutar(generate_password_hash, pin, metodo_configurado())
+        except PoolSaturado:
+            # Sin caché: la próxima verificación vuelve a intentar el rehash
+            return True
+
+    cache.guardar(_clave_cache(tarjeta, pin))
+    return True
@@ -0,0 +1,88 @@
+"""
+Pool de trabajadores acotado para trabajo de CPU (derivación de claves)
+
+El pool limita cuántas tareas pueden estar en ejecución o en cola. Si se
+alcanza el límite, `ejecutar` falla de inmediato con PoolSaturado en lugar
+de encolar sin fin y dejar a los hilos del servidor esperando.
+
+Con `procesos=True` las tareas corren en procesos separados (la función y
+sus argumentos deben poder serializarse con pickle).
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class PoolSaturado(Exception):
+    """El pool tiene su cola llena; el llamador debe responder 503/429"""
+
+    def __init__(self, nombre):
+        super().__init__(f'Servicio ocupado ({nombre}), intente nuevamente')
+        self.nombre = nombre
+
+
+class PoolAcotado:
+    """Ejecutor con número máximo de tareas pendientes (en cola + en ejecución)"""
+
+    def __init__(self, nombre, trabajadores, max_pendientes, procesos=False):
+        self.nombre = nombre
+        self.trabajadores = trabajadores
+        self.max_pendientes = max_pendientes
+        self.procesos = procesos
+        self.pendientes = 0
+        self.rechazadas = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _obtener_executor(self):
+        # Se crea al primer uso para no arrancar hilos/procesos al importar el módulo
+        if self._executor is None:
+            if self.procesos:
+                # spawn: no se hereda el estado (hilos, conexiones) del servidor
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.trabajadores,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.trabajadores,
+                    thread_name_prefix=self.nombre
+                )
+        return self._executor
+
+    def _liberar(self, _futuro=None):
+        with self._lock:
+            self.pendientes -= 1
+
+    def ejecutar(self, funcion, *args, timeout=None):
+        """Ejecuta `funcion(*args)` en el pool y espera el resultado"""
+        with self._lock:
+            if self.pendientes >= self.max_pendientes:
+                self.rechazadas += 1
+                raise PoolSaturado(self.nombre)
+            self.pendientes += 1
+            try:
+                futuro = self._obtener_executor().submit(funcion, *args)
+            except Exception:
+                self.pendientes -= 1
+                raise
+
+        futuro.add_done_callback(self._liberar)
+        return futuro.result(timeout=timeout)
+
+    def estado(self):
+        with self._lock:
+            return {
+                'trabajadores': self.trabajadores,
+                'procesos': self.procesos,
+                'pendientes': self.pendientes,
+                'max_pendientes': self.max_pendientes,
+                'rechazadas': self.rechazadas
+            }
+
+    def cerrar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
@@ -0,0 +1,85 @@
+"""
+Resumen de una persona para el frontend (backend-for-frontend)
+
+Dashboard, cuentas, transferir y retiro sin tarjeta necesitan las mismas
+cuentas; este resumen las entrega junto con sus tarjetas y los últimos
+movimientos en dos consultas:
+
+1. persona LEFT JOIN cuentas activas LEFT JOIN tarjetas (una fila por tarjeta)
+2. últimos movimientos de esas cuentas, UNION ALL por cuenta origen y por
+   cuenta destino (mismo esquema que core.historial)
+"""
+
+from sqlalchemy import and_, or_, select, union_all
+from sqlalchemy.orm import aliased
+
+from extensions import db
+from models.persona import Persona
+from models.cuenta import Cuenta
+from models.tarjeta import Tarjeta
+from models.transaccion import Transaccion
+
+
+def _cuentas_con_tarjetas(id_persona):
+    """Retorna (existe_persona, [cuenta_dict con 'tarjetas'])"""
+    filas = db.session.execute(
+        select(Persona.id, Cuenta, Tarjeta).select_from(Persona).outerjoin(
+            Cuenta, and_(Cuenta.id_persona == Persona.id, Cuenta.estado == 'ACTIVA')
+        ).outerjoin(
+            Tarjeta, Tarjeta.id_cuenta == Cuenta.id_cuenta
+        ).where(
+            Persona.id == id_persona
+        ).order_by(Cuenta.id_cuenta, Tarjeta.id_tarjeta)
+    ).all()
+
+    cuentas = {}
+    for _, cuenta, tarjeta in filas:
+        if cuenta is None:
+            continue
+        if cuenta.id_cuenta not in cuentas:
+            cuentas[cuenta.id_cuenta] = dict(cuenta.to_dict(), tarjetas=[])
+        if tarjeta is not None:
+            cuentas[cuenta.id_cuenta]['tarjetas'].append(tarjeta.to_dict())
+
+    return bool(filas), list(cuentas.values())
+
+
+def _ultimos_movimientos(ids_cuentas, limite):
+    if not ids_cuentas or limite <= 0:
+        return []
+
+    como_origen = select(Transaccion).where(Transaccion.id_cuenta_origen.in_(ids_cuentas))
+    # Una transferencia entre cuentas propias ya viene en la primera rama
+    como_destino = select(Transaccion).where(
+        Transaccion.id_cuenta_destino.in_(ids_cuentas),
+        or_(Transaccion.id_cuenta_origen.is_(None), Transaccion.id_cuenta_origen.not_in(ids_cuentas))
+    )
+    modelo = aliased(Transaccion, union_all(como_origen, como_destino).subquery())
+
+    return db.session.query(modelo).order_by(
+        modelo.fecha_hora.desc(),
+        modelo.id_transaccion.desc()
+    ).limit(limite).all()
+
+
+def resumen_persona(id_persona, movimientos=10):
+    """
+    Cuentas activas (con tarjetas), últimos movimientos y totales de la persona.
+    Retorna None si la persona no existe.
+    """
+    existe, cuentas = _cuentas_con_tarjetas(id_persona)
+    if not existe:
+        return None
+
+    transacciones = _ultimos_movimientos([c['id'] for c in cuentas], movimientos)
+
+    return {
+        'id_persona': id_persona,
+        'cuentas': cuentas,
+        'transacciones': [t.to_dict() for t in transacciones],
+        'totales': {
+            'cuentas': len(cuentas),
+            'tarjetas': sum(len(c['tarjetas']) for c in cuentas),
+            'saldo_total': round(sum(c['saldo_actual'] for c in cuentas), 2)
+        }
+    }
@@ -0,0 +1,110 @@
+"""
+Retenciones de fondos
+
+Al generar un código de retiro sin tarjeta se retiene su monto en la cuenta:
+se registra una fila ACTIVA en retencion_fondos y se suma a
+cuenta.saldo_retenido. El saldo disponible (Cuenta.saldo_disponible) es
+saldo_actual - saldo_retenido: una resta sobre la fila de la cuenta, sin
+sumar retenciones. Todo débito (transferencias, retiros, pagos) valida
+contra el disponible.
+
+La retención se cierra al canjear el código (USADA), al cancelarlo
+(CANCELADA) o al expirar (EXPIRADA), y en ese momento se descuenta de
+saldo_retenido. Las funciones que reciben una cuenta la esperan bloqueada
+(FOR UPDATE) y no hacen commit: corren dentro de la transacción del retiro.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from extensions import db
+from models.cuenta import Cuenta
+from models.retencion import RetencionFondos
+
+
+class RetencionError(Exception):
+    """La retención no se puede registrar (se devuelve al cliente)"""
+
+    def __init__(self, mensaje, codigo=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.codigo = codigo
+
+
+def retener(cuenta, monto, id_retiro=None, fecha_expiracion=None):
+    """Retiene `monto` del disponible de la cuenta (bloqueada). Retorna la RetencionFondos"""
+    monto = Decimal(monto)
+    if cuenta.saldo_disponible < monto:
+        raise RetencionError('Saldo insuficiente')
+
+    retencion = RetencionFondos(
+        id_cuenta=cuenta.id_cuenta,
+        id_retiro=id_retiro,
+        monto=monto,
+        estado=RetencionFondos.ESTADO_ACTIVA,
+        fecha_expiracion=fecha_expiracion
+    )
+    db.session.add(retencion)
+    cuenta.saldo_retenido = (cuenta.saldo_retenido or 0) + monto
+    return retencion
+
+
+def liberar_retiro(cuenta, id_retiro, estado):
+    """
+    Cierra la retención activa del retiro con `estado` y devuelve su monto
+    al disponible de la cuenta (bloqueada). Retorna el monto liberado.
+    """
+    retencion = RetencionFondos.query.filter_by(
+        id_retiro=id_retiro,
+        estado=RetencionFondos.ESTADO_ACTIVA
+    ).first()
+    if retencion is None:
+        return Decimal('0')
+
+    retencion.estado = estado
+    retencion.fecha_liberacion = datetime.utcnow()
+    cuenta.saldo_retenido = (cuenta.saldo_retenido or 0) - retencion.monto
+    return retencion.monto
+
+
+def liberar_retiros(ids_retiro, estado):
+    """
+    Cierra en bloque las retenciones activas de varios retiros (barrido de
+    expiración): un UPDATE de las retenciones y uno por cuenta afectada, en
+    orden de id_cuenta como el resto de bloqueos de cuentas. Retorna cuántas cerró.
+    """
+    if not ids_retiro:
+        return 0
+
+    filas = db.session.execute(
+        update(RetencionFondos).where(
+            RetencionFondos.id_retiro.in_(ids_retiro),
+            RetencionFondos.estado == RetencionFondos.ESTADO_ACTIVA
+        ).values(
+            estado=estado,
+            fecha_liberacion=datetime.utcnow()
+        ).returning(RetencionFondos.id_cuenta, RetencionFondos.monto).execution_options(synchronize_session=False)
+    ).all()
+
+    por_cuenta = defaultdict(Decimal)
+    for id_cuenta, monto in filas:
+        por_cuenta[id_cuenta] += monto
+
+    for id_cuenta in sorted(por_cuenta):
+        db.session.execute(
+            update(Cuenta).where(Cuenta.id_cuenta == id_cuenta).values(
+                saldo_retenido=Cuenta.saldo_retenido - por_cuenta[id_cuenta]
+            ).execution_options(synchronize_session=False)
+        )
+    return len(filas)
+
+
+def activas(id_cuenta):
+    """Retenciones activas de la cuenta, de la más reciente a la más antigua"""
+    return RetencionFondos.query.filter_by(
+        id_cuenta=id_cuenta,
+        estado=RetencionFondos.ESTADO_ACTIVA
+    ).order_by(RetencionFondos.id_retencion.desc()).all()
@@ -0,0 +1,113 @@
+"""
+Snapshots diarios de saldo (tabla saldo_diario)
+
+Cada movimiento hace un upsert sobre (id_cuenta, fecha) dentro de la misma
+transacción que modifica el saldo. Como la fila de la cuenta está bloqueada
+en ese momento, el saldo resultante es el saldo de cierre del día hasta ese
+movimiento. Así, el saldo a una fecha es una lectura por índice y no una
+suma de todas las transacciones.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy.dialects.postgresql import insert
+
+from extensions import db
+from models.saldo import SaldoDiario
+
+CERO = Decimal('0')
+
+
+def registrar_movimiento(cuenta, credito=CERO, debito=CERO, movimientos=1, fecha=None):
+    """
+    Actualiza el snapshot del día con el saldo ya modificado de `cuenta`.
+    Debe llamarse con la cuenta bloqueada y antes del commit.
+    """
+    fecha = fecha or datetime.utcnow().date()
+
+    stmt = insert(SaldoDiario).values(
+        id_cuenta=cuenta.id_cuenta,
+        fecha=fecha,
+        saldo_cierre=cuenta.saldo_actual,
+        total_creditos=credito,
+        total_debitos=debito,
+        num_movimientos=movimientos
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SaldoDiario.id_cuenta, SaldoDiario.fecha],
+        set_={
+            'saldo_cierre': stmt.excluded.saldo_cierre,
+            'total_creditos': SaldoDiario.total_creditos + stmt.excluded.total_creditos,
+            'total_debitos': SaldoDiario.total_debitos + stmt.excluded.total_debitos,
+            'num_movimientos': SaldoDiario.num_movimientos + stmt.excluded.num_movimientos
+        }
+    )
+    db.session.execute(stmt)
+
+
+def saldo_en_fecha(cuenta, fecha):
+    """Saldo de cierre de la cuenta al final del día `fecha`"""
+    snapshot = SaldoDiario.query.filter(
+        SaldoDiario.id_cuenta == cuenta.id_cuenta,
+        SaldoDiario.fecha <= fecha
+    ).order_by(SaldoDiario.fecha.desc()).first()
+
+    if snapshot:
+        return snapshot.saldo_cierre
+
+    # Sin movimientos hasta esa fecha: el saldo es la apertura del primer día con movimientos
+    primero = SaldoDiario.query.filter(
+        SaldoDiario.id_cuenta == cuenta.id_cuenta,
+        SaldoDiario.fecha > fecha
+    ).order_by(SaldoDiario.fecha).first()
+
+    if primero:
+        return primero.saldo_apertura
+
+    return cuenta.saldo_actual or CERO
+
+
+def serie_saldos(cuenta, desde, hasta):
+    """
+    Serie diaria de saldos entre `desde` y `hasta` (inclusive). Los días sin
+    movimientos repiten el saldo del día anterior.
+    Retorna (dias, resumen).
+    """
+    snapshots = {
+        s.fecha: s for s in SaldoDiario.query.filter(
+            SaldoDiario.id_cuenta == cuenta.id_cuenta,
+            SaldoDiario.fecha.between(desde, hasta)
+        )
+    }
+
+    saldo_inicial = saldo_en_fecha(cuenta, desde - timedelta(days=1))
+    saldo = saldo_inicial
+    creditos = debitos = CERO
+    dias = []
+
+    fecha = desde
+    while fecha <= hasta:
+        snapshot = snapshots.get(fecha)
+        if snapshot:
+            saldo = snapshot.saldo_cierre
+            creditos += snapshot.total_creditos
+            debitos += snapshot.total_debitos
+            dias.append(snapshot.to_dict())
+        else:
+            dias.append({
+                'fecha': fecha.isoformat(),
+                'saldo_cierre': float(saldo),
+                'total_creditos': 0.0,
+                'total_debitos': 0.0,
+                'movimientos': 0
+            })
+        fecha += timedelta(days=1)
+
+    resumen = {
+        'saldo_inicial': float(saldo_inicial),
+        'saldo_final': float(saldo),
+        'total_creditos': float(creditos),
+        'total_debitos': float(debitos)
+    }
+    return dias, resumen
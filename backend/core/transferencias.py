@@ -0,0 +1,320 @@
+"""
+Motor de transferencias con bloqueo de filas
+
+Las cuentas involucradas se bloquean con SELECT ... FOR UPDATE siempre en
+orden ascendente de id_cuenta, de modo que dos transferencias cruzadas
+(A->B y B->A) nunca esperan una por la otra en orden inverso. Si aun así
+PostgreSQL aborta la transacción por deadlock o por fallo de serialización,
+la operación completa se reintenta con espera exponencial.
+"""
+
+import random
+import threading
+import time
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+
+from extensions import db
+from models.cuenta import Cuenta
+from models.transaccion import Transaccion
+from core.saldos import registrar_movimiento
+
+# SQLSTATE de PostgreSQL que ameritan reintentar la transacción completa
+SQLSTATE_DEADLOCK = '40P01'
+SQLSTATE_SERIALIZACION = '40001'
+SQLSTATE_REINTENTABLES = (SQLSTATE_DEADLOCK, SQLSTATE_SERIALIZACION)
+
+
+class TransferenciaError(Exception):
+    """Error de negocio en una transferencia (se devuelve al cliente)"""
+
+    def __init__(self, mensaje, codigo=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.codigo = codigo
+
+
+class EstadisticasTransferencia:
+    """Contadores de ejecución del motor, seguros entre hilos"""
+
+    CAMPOS = ('completadas', 'rechazadas', 'reintentos', 'deadlocks',
+              'fallos_serializacion', 'agotadas')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores = dict.fromkeys(self.CAMPOS, 0)
+
+    def registrar(self, campo, cantidad=1):
+        with self._lock:
+            self._valores[campo] += cantidad
+
+    def reiniciar(self):
+        with self._lock:
+            self._valores = dict.fromkeys(self.CAMPOS, 0)
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self._valores)
+
+
+estadisticas = EstadisticasTransferencia()
+
+
+def _sqlstate(error):
+    """Obtiene el SQLSTATE del error del driver (psycopg2)"""
+    return getattr(getattr(error, 'orig', None), 'pgcode', None)
+
+
+def con_reintentos(operacion, *args, **kwargs):
+    """
+    Ejecuta `operacion` dentro de una transacción y la reintenta si la base
+    de datos la aborta por deadlock o serialización.
+    Retorna (resultado, reintentos).
+    """
+    max_reintentos = current_app.config.get('TRANSFERENCIA_MAX_REINTENTOS', 3)
+    espera_base = current_app.config.get('TRANSFERENCIA_ESPERA_BASE', 0.01)
+
+    reintentos = 0
+    while True:
+        try:
+            return operacion(*args, **kwargs), reintentos
+        except DBAPIError as e:
+            db.session.rollback()
+            sqlstate = _sqlstate(e)
+            if sqlstate not in SQLSTATE_REINTENTABLES:
+                raise
+
+            if sqlstate == SQLSTATE_DEADLOCK:
+                estadisticas.registrar('deadlocks')
+            else:
+                estadisticas.registrar('fallos_serializacion')
+
+            if reintentos >= max_reintentos:
+                estadisticas.registrar('agotadas')
+                raise
+
+            reintentos += 1
+            estadisticas.registrar('reintentos')
+            # Espera exponencial con jitter para desincronizar a los competidores
+            time.sleep(espera_base * (2 ** reintentos) * random.uniform(0.5, 1.5))
+
+
+def bloquear_cuentas(ids):
+    """
+    Bloquea (FOR UPDATE) las cuentas indicadas en orden ascendente de id.
+    Retorna un diccionario {id_cuenta: Cuenta}.
+    """
+    ids = sorted(set(ids))
+    cuentas = Cuenta.query.filter(
+        Cuenta.id_cuenta.in_(ids)
+    ).order_by(Cuenta.id_cuenta).with_for_update().all()
+    return {c.id_cuenta: c for c in cuentas}
+
+
+def _ejecutar_transferencia(id_origen, id_destino, monto, descripcion):
+    cuentas = bloquear_cuentas([id_origen, id_destino])
+    origen = cuentas.get(id_origen)
+    destino = cuentas.get(id_destino)
+
+    if not origen:
+        raise TransferenciaError('Cuenta origen no encontrada', 404)
+
+    if not destino:
+        raise TransferenciaError('Cuenta destino no encontrada', 404)
+
+    if origen.saldo_disponible < monto:
+        raise TransferenciaError('Saldo insuficiente')
+
+    origen.saldo_actual -= monto
+    destino.saldo_actual += monto
+    registrar_movimiento(origen, debito=monto)
+    registrar_movimiento(destino, credito=monto)
+
+    transaccion = Transaccion(
+        id_cuenta_origen=origen.id_cuenta,
+        id_cuenta_destino=destino.id_cuenta,
+        tipo_transaccion=Transaccion.TIPO_TRANSFERENCIA,
+        monto=monto,
+        descripcion=descripcion,
+        referencia=Transaccion.generar_referencia()
+    )
+
+    db.session.add(transaccion)
+    db.session.commit()
+
+    return transaccion
+
+
+def transferir(id_origen, id_destino, monto, descripcion='Transferencia bancaria'):
+    """
+    Transfiere `monto` entre dos cuentas de forma segura ante concurrencia.
+    Retorna (transaccion, reintentos). Lanza TransferenciaError si la
+    operación no es válida.
+    """
+    monto = Decimal(str(monto))
+
+    if monto <= 0:
+        raise TransferenciaError('El monto debe ser mayor a cero')
+
+    if id_origen == id_destino:
+        raise TransferenciaError('La cuenta origen y destino deben ser distintas')
+
+    try:
+        resultado = con_reintentos(
+            _ejecutar_transferencia, id_origen, id_destino, monto, descripcion
+        )
+    except TransferenciaError:
+        db.session.rollback()
+        estadisticas.registrar('rechazadas')
+        raise
+
+    estadisticas.registrar('completadas')
+    return resultado
+
+
+def _validar_item_lote(item):
+    """Valida la forma de un item del lote. Retorna (datos, error)"""
+    if not isinstance(item, dict):
+        return None, 'Item inválido'
+
+    for campo in ('cuenta_origen', 'cuenta_destino', 'monto'):
+        if campo not in item:
+            return None, f'Campo requerido: {campo}'
+
+    try:
+        monto = Decimal(str(item['monto']))
+        origen = int(item['cuenta_origen'])
+        destino = int(item['cuenta_destino'])
+    except (ArithmeticError, TypeError, ValueError):
+        return None, 'Datos inválidos'
+
+    if not monto.is_finite() or monto <= 0:
+        return None, 'El monto debe ser mayor a cero'
+
+    if origen == destino:
+        return None, 'La cuenta origen y destino deben ser distintas'
+
+    descripcion = item.get('descripcion') or 'Transferencia bancaria'
+    return (origen, destino, monto, descripcion), None
+
+
+def _ejecutar_lote(items, resultados, atomico):
+    """
+    Aplica los items válidos del lote en una sola transacción: bloquea todas
+    las cuentas en una consulta, netea los saldos y hace un INSERT masivo.
+    """
+    ids = set()
+    for _, (origen, destino, _, _) in items:
+        ids.update((origen, destino))
+
+    cuentas = bloquear_cuentas(ids)
+    saldos = {id_cuenta: c.saldo_actual for id_cuenta, c in cuentas.items()}
+    retenidos = {id_cuenta: c.saldo_retenido or 0 for id_cuenta, c in cuentas.items()}
+
+    creditos = {}
+    debitos = {}
+    movimientos = {}
+    filas = []
+    aplicados = []
+    rechazados = {}
+    for indice, (origen, destino, monto, descripcion) in items:
+        if origen not in saldos:
+            rechazados[indice] = 'Cuenta origen no encontrada'
+        elif destino not in saldos:
+            rechazados[indice] = 'Cuenta destino no encontrada'
+        elif saldos[origen] - retenidos[origen] < monto:
+            rechazados[indice] = 'Saldo insuficiente'
+        else:
+            # El saldo se descuenta en orden, así cada item ve el efecto de los anteriores
+            saldos[origen] -= monto
+            saldos[destino] += monto
+            debitos[origen] = debitos.get(origen, 0) + monto
+            creditos[destino] = creditos.get(destino, 0) + monto
+            for id_cuenta in (origen, destino):
+                movimientos[id_cuenta] = movimientos.get(id_cuenta, 0) + 1
+            aplicados.append(indice)
+            filas.append({
+                'id_cuenta_origen': origen,
+                'id_cuenta_destino': destino,
+                'tipo_transaccion': Transaccion.TIPO_TRANSFERENCIA,
+                'monto': monto,
+                'descripcion': descripcion,
+                'referencia': Transaccion.generar_referencia()
+            })
+
+    for indice, error in rechazados.items():
+        resultados[indice] = {'indice': indice, 'success': False, 'error': error}
+
+    if atomico and rechazados:
+        db.session.rollback()
+        for indice in aplicados:
+            resultados[indice] = {
+                'indice': indice, 'success': False, 'error': 'Lote rechazado'
+            }
+        return 0
+
+    # Un solo UPDATE por cuenta con el neto de todos sus movimientos
+    for id_cuenta, cantidad in movimientos.items():
+        cuenta = cuentas[id_cuenta]
+        cuenta.saldo_actual = saldos[id_cuenta]
+        registrar_movimiento(
+            cuenta,
+            credito=creditos.get(id_cuenta, 0),
+            debito=debitos.get(id_cuenta, 0),
+            movimientos=cantidad
+        )
+
+    if filas:
+        insertadas = db.session.execute(
+            insert(Transaccion).returning(
+                Transaccion.id_transaccion,
+                Transaccion.referencia,
+                sort_by_parameter_order=True
+            ),
+            filas
+        ).all()
+
+        for indice, fila in zip(aplicados, insertadas):
+            resultados[indice] = {
+                'indice': indice,
+                'success': True,
+                'id_transaccion': fila.id_transaccion,
+                'referencia': fila.referencia
+            }
+
+    db.session.commit()
+    return len(filas)
+
+
+def transferir_lote(items, atomico=False):
+    """
+    Procesa un lote de transferencias en una sola transacción.
+    Con `atomico=True` el lote completo se rechaza si algún item falla.
+    Retorna (resultados, reintentos); resultados sigue el orden de `items`.
+    """
+    resultados = [None] * len(items)
+    validos = []
+
+    for indice, item in enumerate(items):
+        datos, error = _validar_item_lote(item)
+        if error:
+            resultados[indice] = {'indice': indice, 'success': False, 'error': error}
+        else:
+            validos.append((indice, datos))
+
+    if atomico and len(validos) < len(items):
+        for indice, _ in validos:
+            resultados[indice] = {'indice': indice, 'success': False, 'error': 'Lote rechazado'}
+        estadisticas.registrar('rechazadas', len(items))
+        return resultados, 0
+
+    reintentos = 0
+    if validos:
+        aplicadas, reintentos = con_reintentos(_ejecutar_lote, validos, resultados, atomico)
+        estadisticas.registrar('completadas', aplicadas)
+
+    estadisticas.registrar('rechazadas', sum(1 for r in resultados if not r['success']))
+    return resultados, reintentos
@@ -0,0 +1,54 @@
+"""
+Barrido de códigos de retiro sin tarjeta vencidos
+Marca EXPIRADO los retiros PENDIENTE cuya fecha de expiración ya pasó, por
+lotes. Es el mismo barrido que corre dentro del backend cuando
+EXPIRACION_RETIROS_WORKER=true; se pueden correr ambos a la vez.
+
+Ejecutar:
+    python expirar_retiros.py               # Bucle continuo cada EXPIRACION_RETIROS_INTERVALO segundos
+    python expirar_retiros.py --una-vez     # Expira lo vencido y termina
+    python expirar_retiros.py --estado      # Muestra los pendientes vigentes y vencidos
+"""
+
+import argparse
+import os
+import time
+
+# Este proceso ya es el barrido: no iniciar además el hilo del backend
+os.environ['EXPIRACION_RETIROS_WORKER'] = 'false'
+
+from app import create_app
+from core import expiracion
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Barrido de retiros sin tarjeta vencidos')
+    parser.add_argument('--una-vez', action='store_true', help='Expirar lo vencido y terminar')
+    parser.add_argument('--estado', action='store_true', help='Mostrar los pendientes y terminar')
+    parser.add_argument('--intervalo', type=float, help='Segundos entre barridos (por defecto EXPIRACION_RETIROS_INTERVALO)')
+    parser.add_argument('--lote', type=int, help='Retiros por lote (por defecto EXPIRACION_RETIROS_LOTE)')
+    args = parser.parse_args()
+
+    app = create_app('production')
+
+    with app.app_context():
+        if args.estado:
+            for estado, cantidad in expiracion.contar_pendientes().items():
+                print(f"  {estado:<22} {cantidad:>8}")
+            return
+
+        intervalo = args.intervalo or app.config.get('EXPIRACION_RETIROS_INTERVALO', 60)
+        print("⏳ Barrido de retiros sin tarjeta vencidos")
+
+        while True:
+            inicio = time.perf_counter()
+            expirados = expiracion.expirar_pendientes(args.lote)
+            if expirados:
+                print(f"  {expirados} retiros expirados en {time.perf_counter() - inicio:.2f}s")
+            if args.una_vez:
+                return
+            time.sleep(intervalo)
+
+
+if __name__ == '__main__':
+    main()
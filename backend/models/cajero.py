@@ -22,6 +22,12 @@ class Cajero(db.Model):
     hora_cierre = db.Column(db.Time, default=time(22, 0))
     dias_operacion = db.Column(db.String(20), default='L-D')
     
+    # Efectivo nunca negativo y feed de efectivo bajo (database/migrations/0005)
+    __table_args__ = (
+        db.CheckConstraint(saldo >= 0, name='ck_cajero_saldo_no_negativo'),
+        db.Index('idx_cajero_efectivo_bajo', saldo, postgresql_where=activo == True),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id_cajero,
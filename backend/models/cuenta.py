@@ -18,9 +18,15 @@ class Cuenta(db.Model):
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
     fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow)
     saldo_actual = db.Column(db.Numeric(18, 2), default=0)
+    # Suma de retenciones activas, mantenida en cada retención (database/migrations/0008)
+    saldo_retenido = db.Column(db.Numeric(18, 2), default=0, nullable=False)
     comision_mensual = db.Column(db.Numeric(10, 2), default=0)
     limite_diario = db.Column(db.Numeric(12, 2), default=5000)
     
+    __table_args__ = (
+        db.CheckConstraint(saldo_retenido >= 0, name='ck_cuenta_saldo_retenido'),
+    )
+    
     # Relaciones
     tarjetas = db.relationship('Tarjeta', backref='cuenta', lazy='dynamic')
     transacciones_origen = db.relationship('Transaccion', 
@@ -28,6 +34,11 @@ class Cuenta(db.Model):
     transacciones_destino = db.relationship('Transaccion',
         foreign_keys='Transaccion.id_cuenta_destino', backref='cuenta_destino', lazy='dynamic')
     
+    @property
+    def saldo_disponible(self):
+        """Saldo que se puede usar: saldo actual menos las retenciones activas"""
+        return (self.saldo_actual or 0) - (self.saldo_retenido or 0)
+    
     @staticmethod
     def generar_numero_cuenta():
         """Genera número de cuenta único"""
@@ -42,6 +53,8 @@ class Cuenta(db.Model):
             'tipo_cuenta': self.tipo_cuenta,
             'estado': self.estado,
             'saldo_actual': float(self.saldo_actual) if self.saldo_actual else 0,
+            'saldo_retenido': float(self.saldo_retenido) if self.saldo_retenido else 0,
+            'saldo_disponible': float(self.saldo_disponible),
             'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
             'limite_diario': float(self.limite_diario) if self.limite_diario else 5000,
             'id_persona': self.id_persona
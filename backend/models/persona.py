@@ -2,6 +2,8 @@
 
 from extensions import db
 from flask_login import UserMixin
+from sqlalchemy import or_
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
@@ -19,7 +21,7 @@ class Persona(db.Model, UserMixin):
     activo = db.Column(db.Boolean, default=True)
     
     # Relaciones
-    cuentas = db.relationship('Cuenta', backref='propietario', lazy='dynamic')
+    cuentas = db.relationship('Cuenta', backref='propietario', order_by='Cuenta.id_cuenta')
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -29,6 +31,50 @@ class Persona(db.Model, UserMixin):
             return False
         return check_password_hash(self.password_hash, password)
     
+    @staticmethod
+    def buscar_para_login(usuario):
+        """
+        Busca por correo o cédula en una sola consulta, cargando el subtipo
+        (natural o jurídica) para que to_dict() no haga consultas adicionales
+        """
+        return Persona.query.outerjoin(
+            PersonaNatural, PersonaNatural.id == Persona.id
+        ).options(
+            contains_eager(Persona.persona_natural),
+            joinedload(Persona.persona_juridica)
+        ).filter(
+            or_(Persona.correo == usuario, PersonaNatural.cedula == usuario)
+        ).first()
+    
+    @staticmethod
+    def consulta_serializable(tipo=None, include_cuentas=False):
+        """
+        Query de personas con lo que usa to_dict() ya cargado: el subtipo por
+        JOIN y las cuentas (si se piden) con una consulta adicional por lote.
+        `tipo` (NATURAL/JURIDICA) se filtra en SQL, antes del LIMIT.
+        """
+        query = Persona.query
+        
+        if tipo == 'NATURAL':
+            query = query.join(PersonaNatural, PersonaNatural.id == Persona.id).options(
+                contains_eager(Persona.persona_natural)
+            )
+        elif tipo == 'JURIDICA':
+            query = query.join(PersonaJuridica, PersonaJuridica.id == Persona.id).options(
+                contains_eager(Persona.persona_juridica),
+                joinedload(Persona.persona_natural)
+            )
+        else:
+            query = query.options(
+                joinedload(Persona.persona_natural),
+                joinedload(Persona.persona_juridica)
+            )
+        
+        if include_cuentas:
+            query = query.options(selectinload(Persona.cuentas))
+        
+        return query
+    
     def to_dict(self, include_cuentas=False):
         data = {
             'id': self.id,
@@ -0,0 +1,42 @@
+"""Modelo RetencionFondos - Fondos retenidos de una cuenta"""
+
+from extensions import db
+from datetime import datetime
+
+
+class RetencionFondos(db.Model):
+    """Monto reservado de una cuenta hasta que se usa, cancela o expira (database/migrations/0008)"""
+    __tablename__ = 'retencion_fondos'
+    
+    id_retencion = db.Column(db.Integer, primary_key=True)
+    id_cuenta = db.Column(db.Integer, db.ForeignKey('cuenta.id_cuenta'), nullable=False)
+    id_retiro = db.Column(db.Integer, db.ForeignKey('retiro_sin_tarjeta.id_retiro'), unique=True)
+    monto = db.Column(db.Numeric(18, 2), nullable=False)
+    estado = db.Column(db.String(20), default='ACTIVA', nullable=False)
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_expiracion = db.Column(db.DateTime)
+    fecha_liberacion = db.Column(db.DateTime)
+    
+    # Retenciones activas por cuenta
+    __table_args__ = (
+        db.Index('idx_retencion_cuenta_activa', id_cuenta,
+                 postgresql_where=estado == 'ACTIVA',
+                 sqlite_where=estado == 'ACTIVA'),
+    )
+    
+    ESTADO_ACTIVA = 'ACTIVA'
+    ESTADO_USADA = 'USADA'
+    ESTADO_CANCELADA = 'CANCELADA'
+    ESTADO_EXPIRADA = 'EXPIRADA'
+    
+    def to_dict(self):
+        return {
+            'id': self.id_retencion,
+            'id_cuenta': self.id_cuenta,
+            'id_retiro': self.id_retiro,
+            'monto': float(self.monto),
+            'estado': self.estado,
+            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
+            'fecha_expiracion': self.fecha_expiracion.isoformat() if self.fecha_expiracion else None,
+            'fecha_liberacion': self.fecha_liberacion.isoformat() if self.fecha_liberacion else None
+        }
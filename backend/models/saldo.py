@@ -0,0 +1,29 @@
+"""Modelo SaldoDiario - Snapshot diario de saldos"""
+
+from extensions import db
+
+
+class SaldoDiario(db.Model):
+    """Saldo de cierre de una cuenta en un día (database/migrations/0002)"""
+    __tablename__ = 'saldo_diario'
+    
+    id_cuenta = db.Column(db.Integer, db.ForeignKey('cuenta.id_cuenta'), primary_key=True)
+    fecha = db.Column(db.Date, primary_key=True)
+    saldo_cierre = db.Column(db.Numeric(18, 2), nullable=False)
+    total_creditos = db.Column(db.Numeric(18, 2), default=0, nullable=False)
+    total_debitos = db.Column(db.Numeric(18, 2), default=0, nullable=False)
+    num_movimientos = db.Column(db.Integer, default=0, nullable=False)
+    
+    @property
+    def saldo_apertura(self):
+        """Saldo al inicio del día (antes de sus movimientos)"""
+        return self.saldo_cierre - self.total_creditos + self.total_debitos
+    
+    def to_dict(self):
+        return {
+            'fecha': self.fecha.isoformat(),
+            'saldo_cierre': float(self.saldo_cierre),
+            'total_creditos': float(self.total_creditos),
+            'total_debitos': float(self.total_debitos),
+            'movimientos': self.num_movimientos
+        }
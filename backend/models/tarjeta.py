@@ -1,7 +1,7 @@
 """Modelo Tarjeta - Tarjetas de débito y crédito"""
 
 from extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from core import pines
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 import random
@@ -36,10 +36,10 @@ class Tarjeta(db.Model):
         return ''.join(random.choices(string.digits, k=3))
     
     def set_pin(self, pin):
-        self.pin_hash = generate_password_hash(str(pin))
+        self.pin_hash = pines.hash_pin(pin)
     
     def check_pin(self, pin):
-        return check_password_hash(self.pin_hash, str(pin))
+        return pines.verificar_pin(self, pin)
     
     def to_dict(self, ocultar_numero=True):
         numero = self.numero_tarjeta
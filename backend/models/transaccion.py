@@ -21,6 +21,16 @@ class Transaccion(db.Model):
     estado = db.Column(db.String(20), default='COMPLETADA')
     referencia = db.Column(db.String(50))
     
+    # Índices del historial por cuenta (database/migrations/0001)
+    __table_args__ = (
+        db.Index('idx_trans_cuenta_o_fecha', id_cuenta_origen, fecha_hora.desc(), id_transaccion.desc()),
+        db.Index('idx_trans_cuenta_d_fecha', id_cuenta_destino, fecha_hora.desc(), id_transaccion.desc()),
+        # Un débito por comprobante de pago de servicio (database/migrations/0004)
+        db.Index('idx_trans_pago_referencia', referencia, unique=True,
+                 postgresql_where=tipo_transaccion == 'PAGO_SERVICIO',
+                 sqlite_where=tipo_transaccion == 'PAGO_SERVICIO'),
+    )
+    
     # Tipos de transacción
     TIPO_DEPOSITO = 'DEPOSITO'
     TIPO_RETIRO = 'RETIRO'
@@ -54,7 +64,7 @@ class RetiroSinTarjeta(db.Model):
     
     id_retiro = db.Column(db.Integer, primary_key=True)
     id_cuenta = db.Column(db.Integer, db.ForeignKey('cuenta.id_cuenta'), nullable=False)
-    codigo = db.Column(db.String(10), unique=True, nullable=False)
+    codigo = db.Column(db.String(10), nullable=False)
     monto = db.Column(db.Numeric(10, 2), nullable=False)
     fecha_generacion = db.Column(db.DateTime, default=datetime.utcnow)
     fecha_expiracion = db.Column(db.DateTime, nullable=False)
@@ -64,17 +74,22 @@ class RetiroSinTarjeta(db.Model):
     
     cuenta = db.relationship('Cuenta', backref='retiros_sin_tarjeta')
     
+    # Código único solo entre los pendientes (database/migrations/0006)
+    __table_args__ = (
+        db.Index('idx_rst_codigo_pendiente', codigo, unique=True,
+                 postgresql_where=estado == 'PENDIENTE',
+                 sqlite_where=estado == 'PENDIENTE'),
+        # Barrido de expiración (database/migrations/0007)
+        db.Index('idx_rst_pendiente_expiracion', fecha_expiracion,
+                 postgresql_where=estado == 'PENDIENTE',
+                 sqlite_where=estado == 'PENDIENTE'),
+    )
+    
     ESTADO_PENDIENTE = 'PENDIENTE'
     ESTADO_USADO = 'USADO'
     ESTADO_EXPIRADO = 'EXPIRADO'
     ESTADO_CANCELADO = 'CANCELADO'
     
-    @staticmethod
-    def generar_codigo():
-        """Genera código de 6 dígitos"""
-        import random
-        return ''.join([str(random.randint(0, 9)) for _ in range(6)])
-    
     def to_dict(self):
         return {
             'id': self.id_retiro,
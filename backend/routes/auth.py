@@ -1,9 +1,14 @@
 """Rutas de Autenticación"""
 
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, jsonify, request, session, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from extensions import db, login_manager
-from models.persona import Persona, PersonaNatural
+from models.persona import Persona
+from core import credenciales
+from comun import metricas
+from core.pool import PoolSaturado
+import concurrent.futures
+import time
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -19,6 +24,14 @@ def login():
     Login con cédula/correo y contraseña
     Body: { "usuario": "cedula_o_correo", "password": "contraseña" }
     """
+    inicio = time.perf_counter()
+    try:
+        return _login()
+    finally:
+        metricas.histograma('login').observar(time.perf_counter() - inicio)
+
+
+def _login():
     try:
         data = request.get_json()
         
@@ -31,14 +44,8 @@ def login():
         usuario = data['usuario']
         password = data['password']
         
-        # Buscar por correo
-        persona = Persona.query.filter_by(correo=usuario).first()
-        
-        # Si no encuentra, buscar por cédula
-        if not persona:
-            pn = PersonaNatural.query.filter_by(cedula=usuario).first()
-            if pn:
-                persona = pn.persona
+        # Buscar por correo o cédula (una sola consulta)
+        persona = Persona.buscar_para_login(usuario)
         
         if not persona:
             return jsonify({
@@ -46,7 +53,13 @@ def login():
                 'error': 'Usuario no encontrado'
             }), 401
         
-        if not persona.check_password(password):
+        inicio_hash = time.perf_counter()
+        valida = credenciales.verificar_password(
+            persona, password, timeout=current_app.config['LOGIN_HASH_TIMEOUT']
+        )
+        metricas.histograma('login_hash').observar(time.perf_counter() - inicio_hash)
+        
+        if not valida:
             return jsonify({
                 'success': False,
                 'error': 'Contraseña incorrecta'
@@ -69,10 +82,29 @@ def login():
             }
         })
         
+    except PoolSaturado as e:
+        response = jsonify({'success': False, 'error': str(e)})
+        response.headers['Retry-After'] = '1'
+        return response, 429
+    except concurrent.futures.TimeoutError:
+        # Future.result(timeout) lanza concurrent.futures.TimeoutError (alias del builtin solo desde 3.11)
+        return jsonify({'success': False, 'error': 'Tiempo de espera agotado, intente nuevamente'}), 503
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@auth_bp.route('/metricas', methods=['GET'])
+def metricas_login():
+    """Histogramas de latencia del login y estado del pool de verificación"""
+    return jsonify({
+        'success': True,
+        'data': {
+            'latencias': metricas.resumen('login'),
+            'pool': credenciales.pool.estado()
+        }
+    })
+
+
 @auth_bp.route('/logout', methods=['POST'])
 @login_required
 def logout():
@@ -1,8 +1,8 @@
 """Rutas para Cajeros"""
 
-from flask import Blueprint, jsonify, request
-from extensions import db
+from flask import Blueprint, current_app, jsonify, request
 from models.cajero import Cajero
+from core import cajeros as indice_cajeros
 
 cajeros_bp = Blueprint('cajeros', __name__)
 
@@ -55,13 +55,19 @@ def obtener_cajero(id):
 @cajeros_bp.route('/cercanos', methods=['GET'])
 def buscar_cercanos():
     """
-    Busca cajeros cercanos a una ubicación
-    Query: ?lat=-0.1807&lon=-78.4678&radio=5
+    Busca los cajeros activos más cercanos a una ubicación, ordenados por
+    distancia (haversine) y dentro del radio indicado. Con `monto` se
+    descartan los cajeros sin efectivo suficiente para ese retiro.
+    Query: ?lat=-0.1807&lon=-78.4678&radio=5&limite=10&depositos=true&abierto=true&monto=100
     """
     try:
         lat = request.args.get('lat', type=float)
         lon = request.args.get('lon', type=float)
         radio_km = request.args.get('radio', 5, type=float)
+        limite = request.args.get('limite', 10, type=int)
+        depositos = request.args.get('depositos', 'false').lower() == 'true'
+        abierto = request.args.get('abierto', 'false').lower() == 'true'
+        monto = request.args.get('monto', type=float)
         
         if lat is None or lon is None:
             return jsonify({
@@ -69,20 +75,72 @@ def buscar_cercanos():
                 'error': 'Se requiere lat y lon'
             }), 400
         
-        # Búsqueda simple por rango (aproximado)
-        # En producción usar PostGIS para cálculos geoespaciales
-        delta = radio_km / 111  # Aproximación: 1 grado ≈ 111 km
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return jsonify({
+                'success': False,
+                'error': 'lat debe estar entre -90 y 90 y lon entre -180 y 180'
+            }), 400
+        
+        limite_max = current_app.config.get('CAJEROS_CERCANOS_MAX', 50)
+        if radio_km <= 0 or not 1 <= limite <= limite_max:
+            return jsonify({
+                'success': False,
+                'error': f'radio debe ser mayor que 0 y limite estar entre 1 y {limite_max}'
+            }), 400
+        
+        filtros = []
+        if monto:
+            filtros.append(lambda e: e.saldo >= monto)
+        if depositos:
+            filtros.append(lambda e: e.depositos)
+        if abierto:
+            ahora = indice_cajeros.ahora_local(current_app.config.get('CAJEROS_ZONA_HORARIA'))
+            filtros.append(lambda e: e.abierto(ahora))
+        
+        cercanos = indice_cajeros.indice.cercanos(
+            lat, lon, k=limite, radio_km=radio_km,
+            filtro=(lambda e: all(f(e) for f in filtros)) if filtros else None
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': [dict(e.datos, distancia_km=round(d, 3)) for d, e in cercanos],
+            'total': len(cercanos)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@cajeros_bp.route('/efectivo-bajo', methods=['GET'])
+def cajeros_efectivo_bajo():
+    """
+    Cajeros activos con efectivo por debajo del umbral, del más vacío al más lleno
+    (para programar la reposición de efectivo)
+    Query: ?umbral=2000&limite=100
+    """
+    try:
+        umbral = request.args.get('umbral', current_app.config.get('CAJEROS_EFECTIVO_UMBRAL', 2000), type=float)
+        limite = min(request.args.get('limite', 100, type=int), 500)
         
         cajeros = Cajero.query.filter(
             Cajero.activo == True,
-            Cajero.latitud.between(lat - delta, lat + delta),
-            Cajero.longitud.between(lon - delta, lon + delta)
-        ).all()
+            Cajero.saldo < umbral
+        ).order_by(Cajero.saldo, Cajero.id_cajero).limit(limite).all()
         
         return jsonify({
             'success': True,
             'data': [c.to_dict() for c in cajeros],
-            'total': len(cajeros)
+            'total': len(cajeros),
+            'umbral': umbral
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@cajeros_bp.route('/indice', methods=['GET'])
+def estado_indice():
+    """Estado del índice espacial de cajeros"""
+    return jsonify({
+        'success': True,
+        'data': indice_cajeros.indice.estado()
+    })
@@ -1,9 +1,11 @@
 """Rutas CRUD para Cuentas"""
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from extensions import db
 from models.cuenta import Cuenta, CuentaAhorros, CuentaCorriente
 from models.persona import Persona
+from core import saldos, retenciones
+from datetime import date, datetime, timedelta
 
 cuentas_bp = Blueprint('cuentas', __name__)
 
@@ -182,7 +184,10 @@ def crear_cuenta_corriente():
 
 @cuentas_bp.route('/<int:id>/saldo', methods=['GET'])
 def consultar_saldo(id):
-    """Consulta saldo de cuenta"""
+    """
+    Consulta saldo de cuenta
+    Query: ?fecha=2026-01-31 (opcional, saldo al cierre de ese día)
+    """
     try:
         cuenta = Cuenta.query.get(id)
         
@@ -192,14 +197,103 @@ def consultar_saldo(id):
                 'error': 'Cuenta no encontrada'
             }), 404
         
+        fecha = request.args.get('fecha')
+        
+        if fecha:
+            fecha = date.fromisoformat(fecha)
+            return jsonify({
+                'success': True,
+                'data': {
+                    'numero_cuenta': cuenta.numero_cuenta,
+                    'fecha': fecha.isoformat(),
+                    'saldo': float(saldos.saldo_en_fecha(cuenta, fecha)),
+                    'moneda': 'USD'
+                }
+            })
+        
         return jsonify({
             'success': True,
             'data': {
                 'numero_cuenta': cuenta.numero_cuenta,
                 'saldo_actual': float(cuenta.saldo_actual),
-                'saldo_disponible': float(cuenta.saldo_actual),  # Simplificado
+                'saldo_retenido': float(cuenta.saldo_retenido or 0),
+                'saldo_disponible': float(cuenta.saldo_disponible),
                 'moneda': 'USD'
             }
         })
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Fecha inválida (use YYYY-MM-DD)'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@cuentas_bp.route('/<int:id>/retenciones', methods=['GET'])
+def listar_retenciones(id):
+    """Retenciones de fondos activas de la cuenta (códigos de retiro sin tarjeta pendientes)"""
+    try:
+        cuenta = Cuenta.query.get(id)
+        
+        if not cuenta:
+            return jsonify({
+                'success': False,
+                'error': 'Cuenta no encontrada'
+            }), 404
+        
+        activas = retenciones.activas(id)
+        
+        return jsonify({
+            'success': True,
+            'data': [r.to_dict() for r in activas],
+            'total': len(activas),
+            'saldo_retenido': float(cuenta.saldo_retenido or 0)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@cuentas_bp.route('/<int:id>/saldos', methods=['GET'])
+def serie_saldos(id):
+    """
+    Serie diaria de saldos para gráficos y estados de cuenta
+    Query: ?desde=2026-01-01&hasta=2026-01-31 (por defecto los últimos 30 días)
+    """
+    try:
+        cuenta = Cuenta.query.get(id)
+        
+        if not cuenta:
+            return jsonify({
+                'success': False,
+                'error': 'Cuenta no encontrada'
+            }), 404
+        
+        hasta = request.args.get('hasta')
+        hasta = date.fromisoformat(hasta) if hasta else datetime.utcnow().date()
+        desde = request.args.get('desde')
+        desde = date.fromisoformat(desde) if desde else hasta - timedelta(days=29)
+        
+        if desde > hasta:
+            return jsonify({
+                'success': False,
+                'error': 'El rango de fechas es inválido'
+            }), 400
+        
+        max_dias = current_app.config.get('SALDOS_RANGO_MAX_DIAS', 366)
+        if (hasta - desde).days + 1 > max_dias:
+            return jsonify({
+                'success': False,
+                'error': f'El rango no puede superar {max_dias} días'
+            }), 400
+        
+        dias, resumen = saldos.serie_saldos(cuenta, desde, hasta)
+        
+        return jsonify({
+            'success': True,
+            'data': dias,
+            'resumen': resumen,
+            'desde': desde.isoformat(),
+            'hasta': hasta.isoformat()
+        })
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Fecha inválida (use YYYY-MM-DD)'}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -3,6 +3,7 @@
 from flask import Blueprint, jsonify, request
 from extensions import db
 from models.persona import Persona, PersonaNatural, PersonaJuridica
+from core.resumen import resumen_persona
 from datetime import datetime
 
 personas_bp = Blueprint('personas', __name__)
@@ -15,23 +16,19 @@ def listar_personas():
         tipo = request.args.get('tipo')  # NATURAL o JURIDICA
         activo = request.args.get('activo', 'true').lower() == 'true'
         limite = request.args.get('limite', 50, type=int)
+        include_cuentas = request.args.get('cuentas', 'false').lower() == 'true'
         
-        query = Persona.query
+        # El filtro por tipo se aplica en SQL (JOIN), antes del LIMIT
+        query = Persona.consulta_serializable(tipo, include_cuentas)
         
         if activo:
-            query = query.filter_by(activo=True)
-        
-        personas = query.limit(limite).all()
+            query = query.filter(Persona.activo.is_(True))
         
-        # Filtrar por tipo si se especifica
-        if tipo == 'NATURAL':
-            personas = [p for p in personas if p.persona_natural]
-        elif tipo == 'JURIDICA':
-            personas = [p for p in personas if p.persona_juridica]
+        personas = query.order_by(Persona.id).limit(limite).all()
         
         return jsonify({
             'success': True,
-            'data': [p.to_dict() for p in personas],
+            'data': [p.to_dict(include_cuentas=include_cuentas) for p in personas],
             'total': len(personas)
         })
     except Exception as e:
@@ -42,7 +39,10 @@ def listar_personas():
 def obtener_persona(id):
     """Obtiene una persona por ID"""
     try:
-        persona = Persona.query.get(id)
+        include_cuentas = request.args.get('cuentas', 'false').lower() == 'true'
+        persona = Persona.consulta_serializable(include_cuentas=include_cuentas).filter(
+            Persona.id == id
+        ).first()
         
         if not persona:
             return jsonify({
@@ -50,8 +50,6 @@ def obtener_persona(id):
                 'error': 'Persona no encontrada'
             }), 404
         
-        include_cuentas = request.args.get('cuentas', 'false').lower() == 'true'
-        
         return jsonify({
             'success': True,
             'data': persona.to_dict(include_cuentas=include_cuentas)
@@ -60,6 +58,31 @@ def obtener_persona(id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@personas_bp.route('/<int:id>/resumen', methods=['GET'])
+def obtener_resumen(id):
+    """
+    Cuentas activas con sus tarjetas, últimos movimientos y totales de la persona
+    (una sola respuesta para las páginas del frontend)
+    Query: ?movimientos=10
+    """
+    try:
+        movimientos = min(max(request.args.get('movimientos', 10, type=int), 0), 50)
+        resumen = resumen_persona(id, movimientos)
+        
+        if resumen is None:
+            return jsonify({
+                'success': False,
+                'error': 'Persona no encontrada'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': resumen
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @personas_bp.route('/natural', methods=['POST'])
 def crear_persona_natural():
     """
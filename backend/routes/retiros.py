@@ -5,7 +5,13 @@ from extensions import db
 from models.transaccion import Transaccion, RetiroSinTarjeta
 from models.cuenta import Cuenta
 from models.tarjeta import Tarjeta
-from models.cajero import Cajero
+from core.saldos import registrar_movimiento
+from core import limites
+from core.cajeros import CajeroError, cajero_para_retiro, dispensar
+from core import codigos, expiracion, retenciones
+from models.retencion import RetencionFondos
+from core.pool import PoolSaturado
+from comun.idempotencia import idempotente
 from decimal import Decimal
 from datetime import datetime, timedelta
 
@@ -13,6 +19,7 @@ retiros_bp = Blueprint('retiros', __name__)
 
 
 @retiros_bp.route('/con-tarjeta', methods=['POST'])
+@idempotente('backend:retiro_con_tarjeta')
 def retiro_con_tarjeta():
     """
     Retiro con tarjeta en cajero
@@ -21,7 +28,7 @@ def retiro_con_tarjeta():
     try:
         data = request.get_json()
         
-        campos = ['numero_tarjeta', 'pin', 'monto']
+        campos = ['numero_tarjeta', 'pin', 'monto', 'id_cajero']
         for campo in campos:
             if campo not in data:
                 return jsonify({
@@ -29,6 +36,15 @@ def retiro_con_tarjeta():
                     'error': f'Campo requerido: {campo}'
                 }), 400
         
+        monto = Decimal(str(data['monto']))
+        if monto <= 0:
+            return jsonify({
+                'success': False,
+                'error': 'El monto debe ser mayor a cero'
+            }), 400
+        
+        cajero = cajero_para_retiro(data['id_cajero'], monto)
+        
         tarjeta = Tarjeta.query.filter_by(numero_tarjeta=data['numero_tarjeta']).first()
         
         if not tarjeta:
@@ -49,40 +65,62 @@ def retiro_con_tarjeta():
                 'error': 'PIN incorrecto'
             }), 401
         
-        cuenta = tarjeta.cuenta
-        monto = Decimal(str(data['monto']))
+        cuenta = Cuenta.query.filter_by(id_cuenta=tarjeta.id_cuenta).with_for_update().first()
         
-        if cuenta.saldo_actual < monto:
+        if cuenta.saldo_disponible < monto:
             return jsonify({
                 'success': False,
                 'error': 'Saldo insuficiente'
             }), 400
         
-        # Procesar retiro
-        cuenta.saldo_actual -= monto
-        
-        transaccion = Transaccion(
-            id_cuenta_origen=cuenta.id_cuenta,
-            id_tarjeta=tarjeta.id_tarjeta,
-            id_cajero=data.get('id_cajero'),
-            tipo_transaccion=Transaccion.TIPO_RETIRO,
-            monto=monto,
-            descripcion='Retiro en cajero automático',
-            referencia=Transaccion.generar_referencia()
-        )
+        consumos = limites.consumos_retiro(cuenta, monto, tarjeta)
+        excedido = limites.reservar(consumos)
+        if excedido:
+            db.session.rollback()
+            origen = 'la tarjeta' if excedido[0] == 'tarjeta' else 'la cuenta'
+            return jsonify({
+                'success': False,
+                'error': f'Excede el límite diario de retiro de {origen}'
+            }), 400
         
-        db.session.add(transaccion)
-        db.session.commit()
+        try:
+            # Procesar retiro
+            cuenta.saldo_actual -= monto
+            registrar_movimiento(cuenta, debito=monto)
+            
+            transaccion = Transaccion(
+                id_cuenta_origen=cuenta.id_cuenta,
+                id_tarjeta=tarjeta.id_tarjeta,
+                id_cajero=cajero.id_cajero,
+                tipo_transaccion=Transaccion.TIPO_RETIRO,
+                monto=monto,
+                descripcion='Retiro en cajero automático',
+                referencia=Transaccion.generar_referencia()
+            )
+            
+            db.session.add(transaccion)
+            # Último paso: la fila del cajero queda bloqueada solo hasta el commit
+            dispensar(cajero.id_cajero, monto)
+            db.session.commit()
+        except Exception:
+            limites.contador.liberar(consumos)
+            raise
         
         return jsonify({
             'success': True,
             'message': 'Retiro exitoso',
             'data': {
                 'transaccion': transaccion.to_dict(),
-                'saldo_disponible': float(cuenta.saldo_actual)
+                'saldo_disponible': float(cuenta.saldo_disponible)
             }
         }), 201
         
+    except CajeroError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': e.mensaje}), e.codigo
+    except PoolSaturado as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -91,7 +129,8 @@ def retiro_con_tarjeta():
 @retiros_bp.route('/sin-tarjeta/generar', methods=['POST'])
 def generar_codigo_retiro():
     """
-    Genera código para retiro sin tarjeta
+    Genera código para retiro sin tarjeta y retiene el monto en la cuenta
+    hasta que el código se use, se cancele o expire
     Body: { "id_cuenta": 1, "monto": 100 }
     """
     try:
@@ -103,7 +142,14 @@ def generar_codigo_retiro():
                 'error': 'Se requiere id_cuenta y monto'
             }), 400
         
-        cuenta = Cuenta.query.get(data['id_cuenta'])
+        monto = Decimal(str(data['monto']))
+        if monto <= 0:
+            return jsonify({
+                'success': False,
+                'error': 'El monto debe ser mayor a cero'
+            }), 400
+        
+        cuenta = Cuenta.query.filter_by(id_cuenta=data['id_cuenta']).with_for_update().first()
         
         if not cuenta:
             return jsonify({
@@ -111,23 +157,16 @@ def generar_codigo_retiro():
                 'error': 'Cuenta no encontrada'
             }), 404
         
-        monto = Decimal(str(data['monto']))
-        
-        if cuenta.saldo_actual < monto:
+        if cuenta.saldo_disponible < monto:
             return jsonify({
                 'success': False,
                 'error': 'Saldo insuficiente'
             }), 400
         
-        # Crear código de retiro (válido por 10 minutos)
-        retiro = RetiroSinTarjeta(
-            id_cuenta=cuenta.id_cuenta,
-            codigo=RetiroSinTarjeta.generar_codigo(),
-            monto=monto,
-            fecha_expiracion=datetime.utcnow() + timedelta(minutes=10)
-        )
-        
-        db.session.add(retiro)
+        # Crear código de retiro (válido por 10 minutos) y retener el monto
+        expira = datetime.utcnow() + timedelta(minutes=10)
+        retiro = codigos.crear_retiro(cuenta.id_cuenta, monto, expira)
+        retenciones.retener(cuenta, monto, retiro.id_retiro, expira)
         db.session.commit()
         
         return jsonify({
@@ -137,10 +176,17 @@ def generar_codigo_retiro():
                 'codigo': retiro.codigo,
                 'monto': float(retiro.monto),
                 'expira': retiro.fecha_expiracion.isoformat(),
-                'minutos_valido': 10
+                'minutos_valido': 10,
+                'saldo_disponible': float(cuenta.saldo_disponible)
             }
         }), 201
         
+    except retenciones.RetencionError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': e.mensaje}), e.codigo
+    except codigos.CodigosAgotados as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -155,16 +201,14 @@ def ejecutar_retiro_sin_tarjeta():
     try:
         data = request.get_json()
         
-        if 'codigo' not in data:
+        if 'codigo' not in data or 'id_cajero' not in data:
             return jsonify({
                 'success': False,
-                'error': 'Se requiere código'
+                'error': 'Se requiere código e id_cajero'
             }), 400
         
-        retiro = RetiroSinTarjeta.query.filter_by(
-            codigo=data['codigo'],
-            estado=RetiroSinTarjeta.ESTADO_PENDIENTE
-        ).first()
+        # Bloquea el código: dos cajeros no pueden canjearlo a la vez
+        retiro = codigos.buscar_pendiente(data['codigo'], bloquear=True)
         
         if not retiro:
             return jsonify({
@@ -173,48 +217,74 @@ def ejecutar_retiro_sin_tarjeta():
             }), 404
         
         if datetime.utcnow() > retiro.fecha_expiracion:
+            cuenta = Cuenta.query.filter_by(id_cuenta=retiro.id_cuenta).with_for_update().first()
             retiro.estado = RetiroSinTarjeta.ESTADO_EXPIRADO
+            retenciones.liberar_retiro(cuenta, retiro.id_retiro, RetencionFondos.ESTADO_EXPIRADA)
             db.session.commit()
             return jsonify({
                 'success': False,
                 'error': 'Código expirado'
             }), 400
         
-        cuenta = retiro.cuenta
+        cajero = cajero_para_retiro(data['id_cajero'], retiro.monto)
+        
+        cuenta = Cuenta.query.filter_by(id_cuenta=retiro.id_cuenta).with_for_update().first()
+        # El monto retenido al generar el código vuelve al disponible y se debita ahora
+        retenciones.liberar_retiro(cuenta, retiro.id_retiro, RetencionFondos.ESTADO_USADA)
         
-        if cuenta.saldo_actual < retiro.monto:
+        if cuenta.saldo_disponible < retiro.monto:
+            # Deshace la liberación de la retención: el código sigue vigente
+            db.session.rollback()
             return jsonify({
                 'success': False,
                 'error': 'Saldo insuficiente'
             }), 400
         
-        # Procesar retiro
-        cuenta.saldo_actual -= retiro.monto
-        retiro.estado = RetiroSinTarjeta.ESTADO_USADO
-        retiro.fecha_uso = datetime.utcnow()
-        retiro.id_cajero_uso = data.get('id_cajero')
-        
-        transaccion = Transaccion(
-            id_cuenta_origen=cuenta.id_cuenta,
-            id_cajero=data.get('id_cajero'),
-            tipo_transaccion=Transaccion.TIPO_RETIRO,
-            monto=retiro.monto,
-            descripcion='Retiro sin tarjeta',
-            referencia=Transaccion.generar_referencia()
-        )
-        
-        db.session.add(transaccion)
-        db.session.commit()
+        consumos = limites.consumos_retiro(cuenta, retiro.monto)
+        if limites.reservar(consumos):
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'error': 'Excede el límite diario de retiro de la cuenta'
+            }), 400
+        
+        try:
+            # Procesar retiro
+            cuenta.saldo_actual -= retiro.monto
+            registrar_movimiento(cuenta, debito=retiro.monto)
+            retiro.estado = RetiroSinTarjeta.ESTADO_USADO
+            retiro.fecha_uso = datetime.utcnow()
+            retiro.id_cajero_uso = cajero.id_cajero
+            
+            transaccion = Transaccion(
+                id_cuenta_origen=cuenta.id_cuenta,
+                id_cajero=cajero.id_cajero,
+                tipo_transaccion=Transaccion.TIPO_RETIRO,
+                monto=retiro.monto,
+                descripcion='Retiro sin tarjeta',
+                referencia=Transaccion.generar_referencia()
+            )
+            
+            db.session.add(transaccion)
+            # Último paso: la fila del cajero queda bloqueada solo hasta el commit
+            dispensar(cajero.id_cajero, retiro.monto)
+            db.session.commit()
+        except Exception:
+            limites.contador.liberar(consumos)
+            raise
         
         return jsonify({
             'success': True,
             'message': 'Retiro exitoso',
             'data': {
                 'transaccion': transaccion.to_dict(),
-                'saldo_disponible': float(cuenta.saldo_actual)
+                'saldo_disponible': float(cuenta.saldo_disponible)
             }
         }), 201
         
+    except CajeroError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': e.mensaje}), e.codigo
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -223,16 +293,13 @@ def ejecutar_retiro_sin_tarjeta():
 @retiros_bp.route('/sin-tarjeta/cancelar', methods=['POST'])
 def cancelar_codigo():
     """
-    Cancela un código de retiro pendiente
+    Cancela un código de retiro pendiente y libera el monto retenido
     Body: { "codigo": "123456" }
     """
     try:
         data = request.get_json()
         
-        retiro = RetiroSinTarjeta.query.filter_by(
-            codigo=data.get('codigo'),
-            estado=RetiroSinTarjeta.ESTADO_PENDIENTE
-        ).first()
+        retiro = codigos.buscar_pendiente(data.get('codigo'), bloquear=True)
         
         if not retiro:
             return jsonify({
@@ -240,7 +307,9 @@ def cancelar_codigo():
                 'error': 'Código no encontrado o ya usado'
             }), 404
         
+        cuenta = Cuenta.query.filter_by(id_cuenta=retiro.id_cuenta).with_for_update().first()
         retiro.estado = RetiroSinTarjeta.ESTADO_CANCELADO
+        retenciones.liberar_retiro(cuenta, retiro.id_retiro, RetencionFondos.ESTADO_CANCELADA)
         db.session.commit()
         
         return jsonify({
@@ -249,4 +318,41 @@ def cancelar_codigo():
         })
         
     except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@retiros_bp.route('/sin-tarjeta/estadisticas', methods=['GET'])
+def estadisticas_codigos():
+    """Contadores del asignador de códigos de retiro sin tarjeta"""
+    return jsonify({
+        'success': True,
+        'data': dict(codigos.estadisticas.to_dict(), reservados=codigos.asignador.reservados())
+    })
+
+
+@retiros_bp.route('/sin-tarjeta/expiracion', methods=['GET'])
+def estado_expiracion():
+    """Retiros pendientes (vigentes y vencidos) y contadores del barrido de expiración"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': dict(expiracion.contar_pendientes(), barrido=expiracion.estadisticas.to_dict())
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@retiros_bp.route('/sin-tarjeta/expiracion/ejecutar', methods=['POST'])
+def ejecutar_expiracion():
+    """Expira ahora los retiros sin tarjeta vencidos"""
+    try:
+        expirados = expiracion.expirar_pendientes()
+        return jsonify({
+            'success': True,
+            'message': f'{expirados} retiros expirados',
+            'data': {'expirados': expirados}
+        })
+    except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
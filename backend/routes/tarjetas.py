@@ -4,6 +4,7 @@ from flask import Blueprint, jsonify, request
 from extensions import db
 from models.tarjeta import Tarjeta, TarjetaDebito, TarjetaCredito
 from models.cuenta import Cuenta
+from core.pool import PoolSaturado
 from datetime import date
 from dateutil.relativedelta import relativedelta
 
@@ -201,5 +202,7 @@ def cambiar_pin(id):
             'success': True,
             'message': 'PIN actualizado'
         })
+    except PoolSaturado as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
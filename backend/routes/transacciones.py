@@ -1,51 +1,124 @@
 """Rutas para Transacciones"""
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
 from extensions import db
 from models.transaccion import Transaccion
 from models.cuenta import Cuenta
+from core import transferencias as motor
+from core import historial
+from core.debitos import debitar_lote
+from core.saldos import registrar_movimiento
+from comun.idempotencia import idempotente
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import datetime
+import csv
+import io
+import json
 
 transacciones_bp = Blueprint('transacciones', __name__)
 
+FORMATOS_EXPORTACION = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+COLUMNAS_CSV = [
+    'id', 'fecha_hora', 'tipo', 'monto', 'descripcion', 'estado', 'referencia',
+    'id_cuenta_origen', 'id_cuenta_destino', 'id_tarjeta', 'id_cajero'
+]
+
+
+def _filtros_historial():
+    """Lee los filtros comunes del historial desde la query string"""
+    fecha_desde = request.args.get('desde')
+    fecha_hasta = request.args.get('hasta')
+    
+    return {
+        'id_cuenta': request.args.get('cuenta', type=int),
+        'tipo': request.args.get('tipo'),
+        'desde': datetime.fromisoformat(fecha_desde) if fecha_desde else None,
+        'hasta': datetime.fromisoformat(fecha_hasta) if fecha_hasta else None
+    }
+
 
 @transacciones_bp.route('', methods=['GET'])
 def listar_transacciones():
-    """Lista transacciones"""
+    """
+    Lista transacciones paginadas por cursor
+    Query: ?cuenta=1&tipo=&desde=&hasta=&limite=50&cursor=<siguiente_cursor>
+    """
     try:
-        id_cuenta = request.args.get('cuenta', type=int)
-        tipo = request.args.get('tipo')
-        fecha_desde = request.args.get('desde')
-        fecha_hasta = request.args.get('hasta')
         limite = request.args.get('limite', 50, type=int)
+        limite = max(1, min(limite, current_app.config.get('HISTORIAL_LIMITE_MAX', 500)))
         
-        query = Transaccion.query
-        
-        if id_cuenta:
-            query = query.filter(
-                (Transaccion.id_cuenta_origen == id_cuenta) |
-                (Transaccion.id_cuenta_destino == id_cuenta)
-            )
-        if tipo:
-            query = query.filter_by(tipo_transaccion=tipo.upper())
-        if fecha_desde:
-            query = query.filter(Transaccion.fecha_hora >= datetime.fromisoformat(fecha_desde))
-        if fecha_hasta:
-            query = query.filter(Transaccion.fecha_hora <= datetime.fromisoformat(fecha_hasta))
-        
-        transacciones = query.order_by(Transaccion.fecha_hora.desc()).limit(limite).all()
+        transacciones, siguiente = historial.pagina_historial(
+            limite,
+            cursor=request.args.get('cursor'),
+            **_filtros_historial()
+        )
         
         return jsonify({
             'success': True,
             'data': [t.to_dict() for t in transacciones],
-            'total': len(transacciones)
+            'total': len(transacciones),
+            'siguiente_cursor': siguiente
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@transacciones_bp.route('/exportar', methods=['GET'])
+def exportar_transacciones():
+    """
+    Exporta el historial completo en streaming (memoria constante)
+    Query: ?cuenta=1&desde=2025-01-01&hasta=2025-12-31&formato=csv|ndjson
+    """
+    try:
+        formato = request.args.get('formato', 'ndjson').lower()
+        
+        if formato not in FORMATOS_EXPORTACION:
+            return jsonify({
+                'success': False,
+                'error': f'Formato no válido. Opciones: {", ".join(FORMATOS_EXPORTACION)}'
+            }), 400
+        
+        query = historial.consulta_historial(**_filtros_historial())
+        # yield_per usa un cursor del lado del servidor y no carga todo el resultado
+        filas = query.yield_per(current_app.config.get('HISTORIAL_EXPORTAR_LOTE', 1000))
+        
+        if formato == 'csv':
+            generador = _generar_csv(filas)
+        else:
+            generador = (json.dumps(t.to_dict()) + '\n' for t in filas)
+        
+        mimetype = FORMATOS_EXPORTACION[formato]
+        return Response(stream_with_context(generador), mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename=transacciones.{formato}'
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _generar_csv(filas):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNAS_CSV)
+    writer.writeheader()
+    
+    for t in filas:
+        writer.writerow(t.to_dict())
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    
+    yield buffer.getvalue()
+
+
 @transacciones_bp.route('/transferir', methods=['POST'])
+@idempotente('backend:transferir')
 def transferir():
     """
     Realiza transferencia entre cuentas
@@ -62,56 +135,166 @@ def transferir():
                     'error': f'Campo requerido: {campo}'
                 }), 400
         
-        origen = Cuenta.query.get(data['cuenta_origen'])
-        destino = Cuenta.query.get(data['cuenta_destino'])
+        try:
+            cuenta_origen = int(data['cuenta_origen'])
+            cuenta_destino = int(data['cuenta_destino'])
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'Cuenta origen o destino inválida'
+            }), 400
+        
+        transaccion, reintentos = motor.transferir(
+            cuenta_origen,
+            cuenta_destino,
+            data['monto'],
+            data.get('descripcion', 'Transferencia bancaria')
+        )
+        
+        return jsonify({
+            'success': True,
+            'message': 'Transferencia realizada',
+            'data': transaccion.to_dict(),
+            'reintentos': reintentos
+        }), 201
+        
+    except motor.TransferenciaError as e:
+        return jsonify({'success': False, 'error': e.mensaje}), e.codigo
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@transacciones_bp.route('/transferir/lote', methods=['POST'])
+@idempotente('backend:transferir_lote')
+def transferir_lote():
+    """
+    Realiza un lote de transferencias en una sola transacción (nómina, pagos a proveedores)
+    Body: {
+        "transferencias": [
+            { "cuenta_origen": 1, "cuenta_destino": 2, "monto": 100.00, "descripcion": "..." },
+            ...
+        ],
+        "atomico": false  (opcional: rechaza todo el lote si algún item falla)
+    }
+    """
+    try:
+        data = request.get_json()
         
-        if not origen:
+        if not data or not isinstance(data.get('transferencias'), list):
             return jsonify({
                 'success': False,
-                'error': 'Cuenta origen no encontrada'
-            }), 404
+                'error': 'Se requiere la lista transferencias'
+            }), 400
+        
+        items = data['transferencias']
+        maximo = current_app.config.get('TRANSFERENCIA_LOTE_MAX', 10000)
         
-        if not destino:
+        if not items:
             return jsonify({
                 'success': False,
-                'error': 'Cuenta destino no encontrada'
-            }), 404
+                'error': 'El lote está vacío'
+            }), 400
         
-        monto = Decimal(str(data['monto']))
+        if len(items) > maximo:
+            return jsonify({
+                'success': False,
+                'error': f'El lote excede el máximo de {maximo} transferencias'
+            }), 400
         
-        if origen.saldo_actual < monto:
+        atomico = data.get('atomico', False)
+        if not isinstance(atomico, bool):
             return jsonify({
                 'success': False,
-                'error': 'Saldo insuficiente'
+                'error': 'atomico debe ser true o false'
             }), 400
         
-        # Realizar transferencia
-        origen.saldo_actual -= monto
-        destino.saldo_actual += monto
+        resultados, reintentos = motor.transferir_lote(items, atomico)
+        exitosas = sum(1 for r in resultados if r['success'])
         
-        transaccion = Transaccion(
-            id_cuenta_origen=origen.id_cuenta,
-            id_cuenta_destino=destino.id_cuenta,
-            tipo_transaccion=Transaccion.TIPO_TRANSFERENCIA,
-            monto=monto,
-            descripcion=data.get('descripcion', 'Transferencia bancaria'),
-            referencia=Transaccion.generar_referencia()
-        )
+        return jsonify({
+            'success': exitosas == len(resultados),
+            'message': f'{exitosas} de {len(resultados)} transferencias realizadas',
+            'data': resultados,
+            'resumen': {
+                'total': len(resultados),
+                'exitosas': exitosas,
+                'fallidas': len(resultados) - exitosas
+            },
+            'reintentos': reintentos
+        }), 201 if exitosas else 400
         
-        db.session.add(transaccion)
-        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@transacciones_bp.route('/debitos/lote', methods=['POST'])
+def debitos_lote():
+    """
+    Debita un lote de pagos de servicios (outbox de la API de Servicios)
+    Body: {
+        "debitos": [
+            { "id_cuenta": 1, "monto": 46.00, "referencia": "BP2026...", "descripcion": "..." },
+            ...
+        ]
+    }
+    La referencia (comprobante del pago) hace idempotente cada débito.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('debitos'), list):
+            return jsonify({
+                'success': False,
+                'error': 'Se requiere la lista debitos'
+            }), 400
+        
+        items = data['debitos']
+        maximo = current_app.config.get('DEBITOS_LOTE_MAX', 1000)
+        
+        if not items:
+            return jsonify({
+                'success': False,
+                'error': 'El lote está vacío'
+            }), 400
         
+        if len(items) > maximo:
+            return jsonify({
+                'success': False,
+                'error': f'El lote excede el máximo de {maximo} débitos'
+            }), 400
+        
+        resultados, reintentos = debitar_lote(items)
+        exitosos = sum(1 for r in resultados if r['success'])
+        
+        # 200 aunque haya rechazos: el resultado de cada débito va en data
         return jsonify({
-            'success': True,
-            'message': 'Transferencia realizada',
-            'data': transaccion.to_dict()
-        }), 201
+            'success': exitosos == len(resultados),
+            'message': f'{exitosos} de {len(resultados)} débitos aplicados',
+            'data': resultados,
+            'resumen': {
+                'total': len(resultados),
+                'exitosos': exitosos,
+                'fallidos': len(resultados) - exitosos
+            },
+            'reintentos': reintentos
+        })
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@transacciones_bp.route('/transferir/estadisticas', methods=['GET'])
+def estadisticas_transferencias():
+    """Contadores del motor de transferencias (reintentos, deadlocks, etc.)"""
+    return jsonify({
+        'success': True,
+        'data': motor.estadisticas.to_dict()
+    })
+
+
 @transacciones_bp.route('/depositar', methods=['POST'])
 def depositar():
     """
@@ -121,7 +304,9 @@ def depositar():
     try:
         data = request.get_json()
         
-        cuenta = Cuenta.query.get(data.get('id_cuenta'))
+        cuenta = Cuenta.query.filter_by(
+            id_cuenta=data.get('id_cuenta')
+        ).with_for_update().first()
         
         if not cuenta:
             return jsonify({
@@ -132,6 +317,7 @@ def depositar():
         monto = Decimal(str(data['monto']))
         
         cuenta.saldo_actual += monto
+        registrar_movimiento(cuenta, credito=monto)
         
         transaccion = Transaccion(
             id_cuenta_destino=cuenta.id_cuenta,
@@ -0,0 +1,132 @@
+"""
+Verificación del número de consultas SQL por endpoint
+Crea una base SQLite temporal con personas de ambos tipos y sus cuentas,
+ejecuta cada endpoint con el cliente de pruebas de Flask y cuenta las
+sentencias que emite. Termina con código 1 si algún endpoint supera su máximo (N+1).
+
+No usa la base configurada en .env. Ejecutar:
+    python verify_consultas.py
+    python verify_consultas.py -v    # muestra las sentencias emitidas
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+
+ARCHIVO_DB = os.path.join(tempfile.mkdtemp(prefix='verify_consultas_'), 'verify.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{ARCHIVO_DB}'
+os.environ['LIMITES_RECONCILIAR'] = 'false'
+os.environ['EXPIRACION_RETIROS_WORKER'] = 'false'
+
+from app import create_app
+from extensions import db
+from models.persona import Persona, PersonaNatural, PersonaJuridica
+from models.cuenta import Cuenta
+from comun.consultas import contar_consultas
+
+PASSWORD = '1234'
+
+
+def crear_datos():
+    for i in range(5):
+        persona = Persona(celular=f'09900000{i}', correo=f'natural{i}@example.com')
+        persona.set_password(PASSWORD)
+        db.session.add(persona)
+        db.session.flush()
+        db.session.add(PersonaNatural(
+            id=persona.id, cedula=f'170000000{i}', nombre='NOMBRE', apellido=f'APELLIDO{i}',
+            fecha_nacimiento=date(1990, 1, 1)
+        ))
+
+    for i in range(5):
+        persona = Persona(celular=f'09800000{i}', correo=f'empresa{i}@example.com')
+        persona.set_password(PASSWORD)
+        db.session.add(persona)
+        db.session.flush()
+        db.session.add(PersonaJuridica(
+            id=persona.id, ruc=f'17900000000{i}', razon_social=f'EMPRESA {i} S.A.',
+            fecha_constitucion=date(2000, 1, 1), tipo_empresa='SA'
+        ))
+
+    # Dos cuentas por persona
+    for persona in Persona.query.all():
+        for j in range(2):
+            db.session.add(Cuenta(
+                id_persona=persona.id, numero_cuenta=f'22{persona.id:04d}{j:04d}',
+                tipo_cuenta='AHORROS', saldo_actual=100
+            ))
+
+    db.session.commit()
+
+
+def login(usuario):
+    return lambda cliente: cliente.post('/api/auth/login', json={'usuario': usuario, 'password': PASSWORD})
+
+
+def get(url):
+    return lambda cliente: cliente.get(url)
+
+
+def total_igual(esperado):
+    return lambda datos: datos.get('total') == esperado
+
+
+def todas_con_cuentas(datos):
+    return all(len(p.get('cuentas', [])) == 2 for p in datos['data'])
+
+
+# (nombre, petición, máximo de sentencias, validación opcional de la respuesta)
+CASOS = [
+    ('login por correo (natural)', login('natural0@example.com'), 2, None),
+    ('login por cédula', login('1700000003'), 2, None),
+    ('login por correo (jurídica)', login('empresa1@example.com'), 2, None),
+    ('listar personas', get('/api/personas'), 1, total_igual(10)),
+    ('listar personas NATURAL', get('/api/personas?tipo=NATURAL&limite=3'), 1, total_igual(3)),
+    ('listar personas JURIDICA', get('/api/personas?tipo=JURIDICA&limite=5'), 1, total_igual(5)),
+    ('listar personas con cuentas', get('/api/personas?cuentas=true'), 2, todas_con_cuentas),
+    ('obtener persona con cuentas', get('/api/personas/6?cuentas=true'),
+     2, lambda datos: len(datos['data']['cuentas']) == 2),
+    ('resumen de persona', get('/api/personas/1/resumen'),
+     2, lambda datos: datos['data']['totales'] == {'cuentas': 2, 'tarjetas': 0, 'saldo_total': 200.0}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verificación de consultas SQL por endpoint')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args()
+
+    app = create_app('production')
+    resultados = []
+
+    with app.app_context():
+        db.create_all()
+        crear_datos()
+
+        print("🔎 Consultas por endpoint:")
+        for nombre, peticion, maximo, validar in CASOS:
+            cliente = app.test_client()
+            with contar_consultas() as contador:
+                respuesta = peticion(cliente)
+
+            valida = respuesta.status_code < 400 and (validar is None or validar(respuesta.get_json()))
+            ok = valida and contador.total <= maximo
+            print(f"  [{'OK' if ok else 'FALLO'}] {nombre}: {contador.total} sentencias "
+                  f"(máximo {maximo}), HTTP {respuesta.status_code}"
+                  + ('' if valida else ', respuesta inesperada'))
+            if args.verbose or not ok:
+                for sentencia in contador.sentencias:
+                    print(f"        {' '.join(sentencia.split())[:160]}")
+            resultados.append(ok)
+
+    if all(resultados):
+        print("\n✅ Ningún endpoint supera su máximo de consultas")
+    else:
+        print("\n❌ Hay endpoints con consultas de más (N+1)")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
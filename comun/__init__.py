@@ -0,0 +1,7 @@
+"""
+Módulos compartidos por backend, services_api y frontend
+
+Cada servicio agrega la raíz del proyecto al sys.path al inicio de su app.py.
+Los módulos que usan la base (idempotencia, consultas) importan `extensions`
+del servicio que los carga: cada uno trabaja con su propio `db`.
+"""
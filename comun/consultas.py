@@ -0,0 +1,42 @@
+"""
+Conteo de sentencias SQL
+
+Utilidad para verificar que un endpoint emite un número acotado de consultas
+(detectar N+1). Registra cada sentencia que el engine envía a la base.
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from extensions import db
+
+
+class ContadorConsultas:
+    def __init__(self):
+        self.sentencias = []
+
+    @property
+    def total(self):
+        return len(self.sentencias)
+
+
+@contextmanager
+def contar_consultas(engine=None):
+    """
+    Uso:
+        with contar_consultas() as contador:
+            ...
+        contador.total, contador.sentencias
+    """
+    engine = engine or db.engine
+    contador = ContadorConsultas()
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        contador.sentencias.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield contador
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
@@ -0,0 +1,242 @@
+"""
+Idempotencia de POST con la cabecera Idempotency-Key
+
+La primera solicitud con una clave la reserva (fila EN_PROCESO, en su propia
+transacción para que la vean los reintentos concurrentes), ejecuta la vista
+y guarda el código y el cuerpo de la respuesta. Un reintento con la misma
+clave:
+  - y el mismo cuerpo recibe la respuesta guardada (Idempotent-Replayed: true)
+  - con otro cuerpo recibe 422
+  - mientras la original sigue en proceso recibe 409
+Las respuestas 5xx no se guardan: la clave se libera para poder reintentar.
+
+Mientras está EN_PROCESO la clave tiene un plazo de IDEMPOTENCIA_PROCESO_SEGUNDOS
+que un hilo renueva cada tercio de ese plazo mientras la vista corre: una
+solicitud larga (un lote de miles de items, una espera por bloqueos de filas)
+conserva su clave, y si el proceso cae el plazo vence y el cliente puede
+reintentar en lugar de recibir 409 hasta el vencimiento de la clave.
+Completada, la respuesta se guarda IDEMPOTENCIA_TTL_HORAS.
+
+completar y liberar solo tocan la fila que reservó la propia solicitud
+(misma fecha_creacion y huella): si su reserva venció y otra la tomó, no
+pisan ni borran el registro de la otra.
+
+Límite conocido: si el proceso cae después de que la vista confirmó su
+transacción pero antes de guardar la respuesta, la clave queda EN_PROCESO
+sin respuesta y, vencido el plazo, un reintento vuelve a ejecutar la vista.
+
+La huella del cuerpo es un HMAC con SECRET_KEY (el cuerpo puede contener el
+PIN). Backend y API de servicios comparten la tabla CLAVE_IDEMPOTENCIA
+(database/migrations/0003); el alcance lleva el prefijo de cada servicio.
+"""
+
+import hashlib
+import hmac
+import logging
+import threading
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+
+CABECERA = 'Idempotency-Key'
+LARGO_MAXIMO = 100
+
+
+class ClaveIdempotencia(db.Model):
+    """Solicitud POST ya procesada (database/migrations/0003)"""
+    __tablename__ = 'clave_idempotencia'
+    
+    ESTADO_EN_PROCESO = 'EN_PROCESO'
+    ESTADO_COMPLETADA = 'COMPLETADA'
+    
+    alcance = db.Column(db.String(50), primary_key=True)
+    clave = db.Column(db.String(100), primary_key=True)
+    hash_solicitud = db.Column(db.String(64), nullable=False)
+    estado = db.Column(db.String(20), default=ESTADO_EN_PROCESO, nullable=False)
+    codigo_http = db.Column(db.Integer)
+    respuesta = db.Column(db.Text)
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    fecha_expiracion = db.Column(db.DateTime, nullable=False)
+
+
+tabla = ClaveIdempotencia.__table__
+
+logger = logging.getLogger(__name__)
+
+
+def huella_solicitud():
+    mensaje = request.method.encode() + b' ' + request.path.encode() + b'\n' + request.get_data()
+    secreto = current_app.config['SECRET_KEY'].encode()
+    return hmac.new(secreto, mensaje, hashlib.sha256).hexdigest()
+
+
+def _propia(alcance, clave, reserva, huella):
+    """Condición de la fila reservada por esta solicitud"""
+    return (
+        tabla.c.alcance == alcance,
+        tabla.c.clave == clave,
+        tabla.c.fecha_creacion == reserva,
+        tabla.c.hash_solicitud == huella,
+        tabla.c.estado == ClaveIdempotencia.ESTADO_EN_PROCESO
+    )
+
+
+def reservar(alcance, clave, huella):
+    """
+    Intenta reservar la clave. Retorna (reserva, existente): `reserva` es la
+    fecha_creacion de la fila si quedó reservada para esta solicitud (None si
+    no), `existente` la fila vigente si la clave ya fue usada.
+    """
+    ahora = datetime.utcnow()
+    expira = ahora + timedelta(seconds=current_app.config.get('IDEMPOTENCIA_PROCESO_SEGUNDOS', 60))
+
+    with db.engine.begin() as conn:
+        # Una clave vencida (completada o en proceso sin renovar: proceso caído) se puede volver a usar
+        conn.execute(delete(tabla).where(
+            tabla.c.alcance == alcance,
+            tabla.c.clave == clave,
+            tabla.c.fecha_expiracion < ahora
+        ))
+
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(tabla.insert().values(
+                alcance=alcance,
+                clave=clave,
+                hash_solicitud=huella,
+                estado=ClaveIdempotencia.ESTADO_EN_PROCESO,
+                fecha_creacion=ahora,
+                fecha_expiracion=expira
+            ))
+        return ahora, None
+    except IntegrityError:
+        with db.engine.connect() as conn:
+            return None, conn.execute(select(tabla).where(
+                tabla.c.alcance == alcance,
+                tabla.c.clave == clave
+            )).first()
+
+
+class Renovacion:
+    """Hilo que extiende el plazo de la reserva mientras la vista se ejecuta"""
+
+    def __init__(self, alcance, clave, reserva, huella, segundos):
+        self._condicion = _propia(alcance, clave, reserva, huella)
+        self._segundos = segundos
+        self._engine = db.engine
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name='idempotencia-renovacion', daemon=True)
+
+    def _bucle(self):
+        while not self._detener.wait(self._segundos / 3):
+            try:
+                with self._engine.begin() as conn:
+                    conn.execute(update(tabla).where(*self._condicion).values(
+                        fecha_expiracion=datetime.utcnow() + timedelta(seconds=self._segundos)
+                    ))
+            except Exception:
+                logger.warning('No se pudo renovar la reserva de Idempotency-Key', exc_info=True)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._detener.set()
+        self._hilo.join()
+
+
+def completar(alcance, clave, reserva, huella, respuesta):
+    expira = datetime.utcnow() + timedelta(hours=current_app.config.get('IDEMPOTENCIA_TTL_HORAS', 24))
+    with db.engine.begin() as conn:
+        conn.execute(update(tabla).where(
+            *_propia(alcance, clave, reserva, huella)
+        ).values(
+            estado=ClaveIdempotencia.ESTADO_COMPLETADA,
+            codigo_http=respuesta.status_code,
+            respuesta=respuesta.get_data(as_text=True),
+            fecha_expiracion=expira
+        ))
+
+
+def liberar(alcance, clave, reserva, huella):
+    with db.engine.begin() as conn:
+        conn.execute(delete(tabla).where(*_propia(alcance, clave, reserva, huella)))
+
+
+def purgar_expiradas():
+    """Elimina las claves vencidas. Retorna cuántas se eliminaron"""
+    with db.engine.begin() as conn:
+        return conn.execute(delete(tabla).where(
+            tabla.c.fecha_expiracion < datetime.utcnow()
+        )).rowcount
+
+
+def _respuesta_guardada(fila):
+    respuesta = make_response(fila.respuesta, fila.codigo_http)
+    respuesta.mimetype = 'application/json'
+    respuesta.headers['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+
+def idempotente(alcance):
+    """
+    Decorador de vistas POST. Sin cabecera Idempotency-Key la vista se
+    ejecuta normalmente.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envuelta(*args, **kwargs):
+            clave = request.headers.get(CABECERA)
+            if not clave:
+                return vista(*args, **kwargs)
+
+            if len(clave) > LARGO_MAXIMO:
+                return jsonify({
+                    'success': False,
+                    'error': f'{CABECERA} excede {LARGO_MAXIMO} caracteres'
+                }), 400
+
+            huella = huella_solicitud()
+            reserva, existente = reservar(alcance, clave, huella)
+
+            if reserva is None:
+                if existente is None:
+                    # La otra solicitud liberó la clave entre el INSERT y la lectura
+                    return jsonify({
+                        'success': False,
+                        'error': 'La solicitud original sigue en proceso'
+                    }), 409
+                if existente.hash_solicitud != huella:
+                    return jsonify({
+                        'success': False,
+                        'error': f'{CABECERA} ya fue usada con otra solicitud'
+                    }), 422
+                if existente.estado != ClaveIdempotencia.ESTADO_COMPLETADA:
+                    return jsonify({
+                        'success': False,
+                        'error': 'La solicitud original sigue en proceso'
+                    }), 409
+                return _respuesta_guardada(existente)
+
+            segundos = current_app.config.get('IDEMPOTENCIA_PROCESO_SEGUNDOS', 60)
+            try:
+                with Renovacion(alcance, clave, reserva, huella, segundos):
+                    respuesta = make_response(vista(*args, **kwargs))
+            except Exception:
+                liberar(alcance, clave, reserva, huella)
+                raise
+
+            if respuesta.status_code >= 500:
+                liberar(alcance, clave, reserva, huella)
+            else:
+                completar(alcance, clave, reserva, huella, respuesta)
+            return respuesta
+
+        return envuelta
+    return decorador
@@ -0,0 +1,84 @@
+"""
+Métricas de latencia en memoria
+
+Histograma con buckets fijos (en milisegundos) al estilo Prometheus: cada
+observación incrementa el primer bucket cuyo límite la contiene. Los
+percentiles se estiman con el límite superior del bucket correspondiente.
+"""
+
+import bisect
+import threading
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histograma:
+    """Histograma de latencias seguro entre hilos"""
+
+    def __init__(self, buckets_ms=BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self._conteos = [0] * (len(self.buckets_ms) + 1)
+            self._total = 0
+            self._suma_ms = 0.0
+            self._maximo_ms = 0.0
+
+    def observar(self, segundos):
+        ms = segundos * 1000
+        with self._lock:
+            self._conteos[bisect.bisect_left(self.buckets_ms, ms)] += 1
+            self._total += 1
+            self._suma_ms += ms
+            self._maximo_ms = max(self._maximo_ms, ms)
+
+    def _percentil(self, p):
+        if not self._total:
+            return None
+        objetivo = p * self._total
+        acumulado = 0
+        for i, conteo in enumerate(self._conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return self.buckets_ms[i] if i < len(self.buckets_ms) else self._maximo_ms
+        return self._maximo_ms
+
+    def to_dict(self):
+        with self._lock:
+            # Conteos acumulados: observaciones <= le_ms (None = infinito)
+            acumulado = 0
+            buckets = []
+            for limite, conteo in zip(self.buckets_ms + (None,), self._conteos):
+                acumulado += conteo
+                buckets.append({'le_ms': limite, 'conteo': acumulado})
+
+            return {
+                'total': self._total,
+                'promedio_ms': round(self._suma_ms / self._total, 2) if self._total else None,
+                'maximo_ms': round(self._maximo_ms, 2),
+                'p50_ms': self._percentil(0.50),
+                'p95_ms': self._percentil(0.95),
+                'p99_ms': self._percentil(0.99),
+                'buckets': buckets
+            }
+
+
+_histogramas = {}
+_lock = threading.Lock()
+
+
+def histograma(nombre):
+    """Obtiene (o crea) el histograma registrado con `nombre`"""
+    with _lock:
+        if nombre not in _histogramas:
+            _histogramas[nombre] = Histograma()
+        return _histogramas[nombre]
+
+
+def resumen(prefijo=''):
+    with _lock:
+        nombres = [n for n in _histogramas if n.startswith(prefijo)]
+    return {n: histograma(n).to_dict() for n in sorted(nombres)}
@@ -0,0 +1,17 @@
+-- migrar: sin-transaccion
+/*==============================================================*/
+/* Índices compuestos para el historial por cuenta              */
+/* El historial consulta por cuenta origen y por cuenta destino */
+/* (UNION ALL) ordenando por fecha_hora, id_transaccion DESC.   */
+/* Cada rama se resuelve con un Index Scan ya ordenado.         */
+/*==============================================================*/
+CREATE INDEX CONCURRENTLY IF NOT EXISTS IDX_TRANS_CUENTA_O_FECHA
+   ON TRANSACCIONES (ID_CUENTA_ORIGEN, FECHA_HORA DESC, ID_TRANSACCION DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS IDX_TRANS_CUENTA_D_FECHA
+   ON TRANSACCIONES (ID_CUENTA_DESTINO, FECHA_HORA DESC, ID_TRANSACCION DESC);
+
+-- IDX_TRANS_CUENTA_O queda cubierto por el prefijo de IDX_TRANS_CUENTA_O_FECHA
+DROP INDEX CONCURRENTLY IF EXISTS IDX_TRANS_CUENTA_O;
+
+ANALYZE TRANSACCIONES;
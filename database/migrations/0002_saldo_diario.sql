@@ -0,0 +1,49 @@
+/*==============================================================*/
+/* Table: SALDO_DIARIO                                          */
+/* Snapshot del saldo de cierre por cuenta y día. Se mantiene   */
+/* de forma incremental con cada movimiento (backend/core/      */
+/* saldos.py) y permite consultar el saldo a una fecha sin      */
+/* recorrer todas las transacciones.                            */
+/*==============================================================*/
+CREATE TABLE IF NOT EXISTS SALDO_DIARIO (
+   ID_CUENTA            INTEGER              NOT NULL,
+   FECHA                DATE                 NOT NULL,
+   SALDO_CIERRE         DECIMAL(18,2)        NOT NULL,
+   TOTAL_CREDITOS       DECIMAL(18,2)        NOT NULL DEFAULT 0,
+   TOTAL_DEBITOS        DECIMAL(18,2)        NOT NULL DEFAULT 0,
+   NUM_MOVIMIENTOS      INTEGER              NOT NULL DEFAULT 0,
+   CONSTRAINT PK_SALDO_DIARIO PRIMARY KEY (ID_CUENTA, FECHA),
+   CONSTRAINT FK_SALDO_DIARIO_CUENTA FOREIGN KEY (ID_CUENTA) REFERENCES CUENTA(ID_CUENTA)
+);
+
+/*==============================================================*/
+/* Carga inicial desde el historial existente                   */
+/* El saldo de cierre de un día es el saldo actual menos el     */
+/* neto de todos los días posteriores.                          */
+/*==============================================================*/
+INSERT INTO SALDO_DIARIO (ID_CUENTA, FECHA, SALDO_CIERRE, TOTAL_CREDITOS, TOTAL_DEBITOS, NUM_MOVIMIENTOS)
+WITH MOVIMIENTOS AS (
+   SELECT ID_CUENTA_DESTINO AS ID_CUENTA, CAST(FECHA_HORA AS DATE) AS FECHA, MONTO AS CREDITO, 0 AS DEBITO
+   FROM TRANSACCIONES
+   WHERE ID_CUENTA_DESTINO IS NOT NULL AND ESTADO = 'COMPLETADA'
+   UNION ALL
+   SELECT ID_CUENTA_ORIGEN, CAST(FECHA_HORA AS DATE), 0, MONTO
+   FROM TRANSACCIONES
+   WHERE ID_CUENTA_ORIGEN IS NOT NULL AND ESTADO = 'COMPLETADA'
+), POR_DIA AS (
+   SELECT ID_CUENTA, FECHA, SUM(CREDITO) AS CREDITOS, SUM(DEBITO) AS DEBITOS, COUNT(*) AS MOVIMIENTOS
+   FROM MOVIMIENTOS
+   GROUP BY ID_CUENTA, FECHA
+)
+SELECT D.ID_CUENTA,
+       D.FECHA,
+       C.SALDO_ACTUAL - COALESCE(SUM(D.CREDITOS - D.DEBITOS) OVER (
+           PARTITION BY D.ID_CUENTA ORDER BY D.FECHA DESC
+           ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+       ), 0),
+       D.CREDITOS,
+       D.DEBITOS,
+       D.MOVIMIENTOS
+FROM POR_DIA D
+JOIN CUENTA C ON C.ID_CUENTA = D.ID_CUENTA
+ON CONFLICT (ID_CUENTA, FECHA) DO NOTHING;
@@ -0,0 +1,21 @@
+/*==============================================================*/
+/* Table: CLAVE_IDEMPOTENCIA                                    */
+/* Respuestas guardadas de POST con cabecera Idempotency-Key    */
+/* (transferencias, retiros con tarjeta y pagos de servicios).  */
+/* Un reintento con la misma clave y el mismo cuerpo recibe la  */
+/* respuesta original sin volver a ejecutar la operación.       */
+/* ALCANCE separa las claves por servicio y endpoint.           */
+/*==============================================================*/
+CREATE TABLE IF NOT EXISTS CLAVE_IDEMPOTENCIA (
+   ALCANCE              VARCHAR(50)          NOT NULL,
+   CLAVE                VARCHAR(100)         NOT NULL,
+   HASH_SOLICITUD       VARCHAR(64)          NOT NULL,
+   ESTADO               VARCHAR(20)          NOT NULL DEFAULT 'EN_PROCESO',
+   CODIGO_HTTP          INTEGER              NULL,
+   RESPUESTA            TEXT                 NULL,
+   FECHA_CREACION       TIMESTAMP            NOT NULL DEFAULT CURRENT_TIMESTAMP,
+   FECHA_EXPIRACION     TIMESTAMP            NOT NULL,
+   CONSTRAINT PK_CLAVE_IDEMPOTENCIA PRIMARY KEY (ALCANCE, CLAVE)
+);
+
+CREATE INDEX IF NOT EXISTS IDX_IDEMPOTENCIA_EXPIRACION ON CLAVE_IDEMPOTENCIA (FECHA_EXPIRACION);
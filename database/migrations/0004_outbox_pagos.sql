@@ -0,0 +1,40 @@
+/*==============================================================*/
+/* Table: OUTBOX_PAGO                                           */
+/* Débitos pendientes de los pagos de servicios con cuenta.     */
+/* La API de Servicios inserta la fila en la misma transacción  */
+/* que el PAGO_SERVICIO; un worker las envía por lotes al       */
+/* backend (POST /api/transacciones/debitos/lote), que crea la  */
+/* TRANSACCIONES de tipo PAGO_SERVICIO con REFERENCIA igual al  */
+/* comprobante del pago.                                        */
+/*==============================================================*/
+CREATE TABLE IF NOT EXISTS OUTBOX_PAGO (
+   ID_OUTBOX            SERIAL               NOT NULL,
+   ID_PAGO              INTEGER              NOT NULL,
+   ID_CUENTA            INTEGER              NOT NULL,
+   MONTO                DECIMAL(12,2)        NOT NULL,
+   REFERENCIA           VARCHAR(50)          NOT NULL,
+   DESCRIPCION          VARCHAR(256)         NULL,
+   ESTADO               VARCHAR(20)          NOT NULL DEFAULT 'PENDIENTE',
+   INTENTOS             INTEGER              NOT NULL DEFAULT 0,
+   ULTIMO_ERROR         VARCHAR(256)         NULL,
+   FECHA_CREACION       TIMESTAMP            NOT NULL DEFAULT CURRENT_TIMESTAMP,
+   FECHA_PROXIMO_INTENTO TIMESTAMP           NOT NULL DEFAULT CURRENT_TIMESTAMP,
+   FECHA_ACTUALIZACION  TIMESTAMP            NOT NULL DEFAULT CURRENT_TIMESTAMP,
+   CONSTRAINT PK_OUTBOX_PAGO PRIMARY KEY (ID_OUTBOX),
+   CONSTRAINT FK_OUTBOX_PAGO FOREIGN KEY (ID_PAGO) REFERENCES PAGO_SERVICIO(ID_PAGO),
+   CONSTRAINT UQ_OUTBOX_PAGO UNIQUE (ID_PAGO)
+);
+
+-- El worker solo recorre filas por enviar; el índice parcial no crece con el histórico
+CREATE INDEX IF NOT EXISTS IDX_OUTBOX_PENDIENTES
+   ON OUTBOX_PAGO (FECHA_PROXIMO_INTENTO, ID_OUTBOX)
+   WHERE ESTADO IN ('PENDIENTE', 'PROCESANDO');
+
+/*==============================================================*/
+/* Un pago de servicio se debita una sola vez: la referencia de */
+/* las transacciones PAGO_SERVICIO (comprobante) es única, así  */
+/* un reenvío del worker no duplica el débito.                  */
+/*==============================================================*/
+CREATE UNIQUE INDEX IF NOT EXISTS IDX_TRANS_PAGO_REFERENCIA
+   ON TRANSACCIONES (REFERENCIA)
+   WHERE TIPO_TRANSACCION = 'PAGO_SERVICIO';
@@ -0,0 +1,15 @@
+/*==============================================================*/
+/* Constraint: CK_CAJERO_SALDO_NO_NEGATIVO                      */
+/* El efectivo del cajero se descuenta en cada retiro con un    */
+/* UPDATE condicional (SALDO >= monto); la restricción lo       */
+/* garantiza también ante cualquier otra escritura.             */
+/*==============================================================*/
+ALTER TABLE CAJERO DROP CONSTRAINT IF EXISTS CK_CAJERO_SALDO_NO_NEGATIVO;
+ALTER TABLE CAJERO ADD CONSTRAINT CK_CAJERO_SALDO_NO_NEGATIVO CHECK (SALDO >= 0);
+
+/*==============================================================*/
+/* Index: IDX_CAJERO_EFECTIVO_BAJO                              */
+/* Feed de cajeros activos con poco efectivo, ordenado por      */
+/* saldo (GET /api/cajeros/efectivo-bajo).                      */
+/*==============================================================*/
+CREATE INDEX IF NOT EXISTS IDX_CAJERO_EFECTIVO_BAJO ON CAJERO (SALDO) WHERE ACTIVO;
@@ -0,0 +1,12 @@
+-- migrar: sin-transaccion
+/*==============================================================*/
+/* Index: IDX_RST_CODIGO_PENDIENTE                              */
+/* El código de retiro sin tarjeta debe ser único solo entre    */
+/* los retiros PENDIENTE. El UNIQUE sobre todos los códigos     */
+/* agotaba el espacio de 10^6 con códigos usados o expirados.   */
+/* El canje busca por código + PENDIENTE con este índice.       */
+/*==============================================================*/
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS IDX_RST_CODIGO_PENDIENTE
+   ON RETIRO_SIN_TARJETA (CODIGO) WHERE ESTADO = 'PENDIENTE';
+
+ALTER TABLE RETIRO_SIN_TARJETA DROP CONSTRAINT IF EXISTS RETIRO_SIN_TARJETA_CODIGO_KEY;
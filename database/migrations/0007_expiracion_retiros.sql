@@ -0,0 +1,8 @@
+-- migrar: sin-transaccion
+/*==============================================================*/
+/* Index: IDX_RST_PENDIENTE_EXPIRACION                          */
+/* El barrido de expiración busca los retiros PENDIENTE con     */
+/* FECHA_EXPIRACION vencida. Parcial: solo indexa pendientes.   */
+/*==============================================================*/
+CREATE INDEX CONCURRENTLY IF NOT EXISTS IDX_RST_PENDIENTE_EXPIRACION
+   ON RETIRO_SIN_TARJETA (FECHA_EXPIRACION) WHERE ESTADO = 'PENDIENTE';
@@ -0,0 +1,53 @@
+/*==============================================================*/
+/* Column: CUENTA.SALDO_RETENIDO                                */
+/* Suma de las retenciones activas de la cuenta. Se mantiene    */
+/* con cada retención (backend/core/retenciones.py): el saldo   */
+/* disponible es SALDO_ACTUAL - SALDO_RETENIDO, sin sumar filas.*/
+/*==============================================================*/
+ALTER TABLE CUENTA ADD COLUMN IF NOT EXISTS SALDO_RETENIDO DECIMAL(18,2) NOT NULL DEFAULT 0;
+
+ALTER TABLE CUENTA DROP CONSTRAINT IF EXISTS CK_CUENTA_SALDO_RETENIDO;
+ALTER TABLE CUENTA ADD CONSTRAINT CK_CUENTA_SALDO_RETENIDO CHECK (SALDO_RETENIDO >= 0);
+
+/*==============================================================*/
+/* Table: RETENCION_FONDOS                                      */
+/* Monto reservado de una cuenta por un código de retiro sin    */
+/* tarjeta. ACTIVA hasta que el código se usa (USADA), se       */
+/* cancela (CANCELADA) o expira (EXPIRADA).                     */
+/*==============================================================*/
+CREATE TABLE IF NOT EXISTS RETENCION_FONDOS (
+   ID_RETENCION         SERIAL               NOT NULL,
+   ID_CUENTA            INTEGER              NOT NULL,
+   ID_RETIRO            INTEGER              NULL UNIQUE,
+   MONTO                DECIMAL(18,2)        NOT NULL,
+   ESTADO               VARCHAR(20)          NOT NULL DEFAULT 'ACTIVA',
+   FECHA_CREACION       TIMESTAMP            NOT NULL DEFAULT CURRENT_TIMESTAMP,
+   FECHA_EXPIRACION     TIMESTAMP            NULL,
+   FECHA_LIBERACION     TIMESTAMP            NULL,
+   CONSTRAINT PK_RETENCION_FONDOS PRIMARY KEY (ID_RETENCION),
+   CONSTRAINT FK_RETENCION_CUENTA FOREIGN KEY (ID_CUENTA) REFERENCES CUENTA(ID_CUENTA),
+   CONSTRAINT FK_RETENCION_RETIRO FOREIGN KEY (ID_RETIRO) REFERENCES RETIRO_SIN_TARJETA(ID_RETIRO)
+);
+
+CREATE INDEX IF NOT EXISTS IDX_RETENCION_CUENTA_ACTIVA ON RETENCION_FONDOS (ID_CUENTA) WHERE ESTADO = 'ACTIVA';
+
+/*==============================================================*/
+/* Carga inicial: retener los códigos pendientes aún vigentes   */
+/* (las fechas de expiración se guardan en UTC).                */
+/*==============================================================*/
+INSERT INTO RETENCION_FONDOS (ID_CUENTA, ID_RETIRO, MONTO, ESTADO, FECHA_CREACION, FECHA_EXPIRACION)
+SELECT R.ID_CUENTA, R.ID_RETIRO, R.MONTO, 'ACTIVA', R.FECHA_GENERACION, R.FECHA_EXPIRACION
+FROM RETIRO_SIN_TARJETA R
+WHERE R.ESTADO = 'PENDIENTE'
+  AND R.FECHA_EXPIRACION > (NOW() AT TIME ZONE 'UTC')
+ON CONFLICT (ID_RETIRO) DO NOTHING;
+
+UPDATE CUENTA C
+SET SALDO_RETENIDO = T.TOTAL
+FROM (
+   SELECT ID_CUENTA, SUM(MONTO) AS TOTAL
+   FROM RETENCION_FONDOS
+   WHERE ESTADO = 'ACTIVA'
+   GROUP BY ID_CUENTA
+) T
+WHERE C.ID_CUENTA = T.ID_CUENTA;
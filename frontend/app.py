@@ -4,37 +4,93 @@ Interfaz web para banca en línea
 Puerto: 5000
 """
 
-from flask import Flask, render_template, redirect, url_for, flash, session, request
+from flask import Flask, render_template, redirect, url_for, flash, session, request, Response, stream_with_context, jsonify
 import requests
 from config import Config
 import os
+import sys
+import uuid
+
+# Módulos compartidos entre servicios (comun/, en la raíz del proyecto)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cliente_api
+import cache_resumen
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Clientes HTTP con pool keep-alive hacia backend y API de servicios
+cliente_api.init_app(app)
 
-def api_request(method, endpoint, data=None, api='backend'):
-    """Realiza peticiones a las APIs"""
-    base_url = Config.BACKEND_URL if api == 'backend' else Config.SERVICES_API_URL
-    url = f"{base_url}{endpoint}"
-    
+# Caché por sesión del resumen de la persona (cuentas, tarjetas, movimientos)
+cache_resumen.init_app(app)
+
+
+def api_request(method, endpoint, data=None, api='backend', clave_idempotencia=None):
+    """
+    Realiza peticiones a las APIs. Con `clave_idempotencia` se envía la
+    cabecera Idempotency-Key y el POST se puede reintentar sin duplicarse.
+    """
+    headers = {cliente_api.CABECERA_IDEMPOTENCIA: clave_idempotencia} if clave_idempotencia else None
     try:
-        if method == 'GET':
-            response = requests.get(url, timeout=10)
-        elif method == 'POST':
-            response = requests.post(url, json=data, timeout=10)
-        elif method == 'PUT':
-            response = requests.put(url, json=data, timeout=10)
-        elif method == 'DELETE':
-            response = requests.delete(url, timeout=10)
-        
+        response = cliente_api.cliente(api).solicitar(
+            method, endpoint, json=data if method in ('POST', 'PUT') else None, headers=headers
+        )
         return response.json()
+    except cliente_api.CircuitoAbierto:
+        return {'success': False, 'error': 'Servicio no disponible temporalmente, intenta en unos segundos'}
     except requests.exceptions.ConnectionError:
         return {'success': False, 'error': 'No se pudo conectar con el servidor'}
+    except requests.exceptions.Timeout:
+        return {'success': False, 'error': 'El servidor tardó demasiado en responder'}
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
 
+def api_requests(**llamadas):
+    """
+    Varias api_request independientes en paralelo
+    Uso: api_requests(cuenta=('GET', '/api/cuentas/1'), tipos=('GET', '/api/v1/tipos-servicio', None, 'services'))
+    Retorna {nombre: resultado}; cada resultado falla por separado.
+    """
+    return cliente_api.en_paralelo(
+        {nombre: (api_request,) + tuple(args) for nombre, args in llamadas.items()},
+        timeout=app.config.get('API_FANOUT_TIMEOUT')
+    )
+
+
+def resumen_persona(clave, id_persona):
+    """Resumen de la persona (backend /api/personas/<id>/resumen) con caché por sesión"""
+    resumen = cache_resumen.cache.obtener(clave)
+    if resumen is None:
+        resumen = api_request('GET', f'/api/personas/{id_persona}/resumen')
+        if resumen.get('success'):
+            cache_resumen.cache.guardar(clave, resumen)
+    return resumen
+
+
+def resumen_usuario():
+    """Datos del resumen del usuario en sesión ({} si el backend falla)"""
+    resumen = resumen_persona(cache_resumen.clave_sesion(session), session['usuario']['id'])
+    return resumen.get('data') or {}
+
+
+def clave_formulario():
+    """
+    Idempotency-Key del formulario enviado. Cada formulario lleva la suya en
+    un campo oculto generado al mostrarlo: un doble envío repite la clave y
+    la API responde una sola vez.
+    """
+    return request.form.get('idempotency_key') or uuid.uuid4().hex
+
+
+def invalidar_resumen():
+    """Descarta el resumen en caché tras una operación que mueve saldo"""
+    if 'cache_id' in session:
+        cache_resumen.cache.invalidar(session['cache_id'])
+
+
 # ============== RUTAS PÚBLICAS ==============
 
 @app.route('/')
@@ -58,6 +114,8 @@ def login():
         })
         
         if result.get('success'):
+            invalidar_resumen()
+            session.pop('cache_id', None)
             session['usuario'] = result['data']['usuario']
             flash('Bienvenido', 'success')
             return redirect(url_for('dashboard'))
@@ -70,6 +128,7 @@ def login():
 @app.route('/logout')
 def logout():
     """Cerrar sesión"""
+    invalidar_resumen()
     session.clear()
     flash('Sesión cerrada', 'info')
     return redirect(url_for('index'))
@@ -85,12 +144,13 @@ def dashboard():
     
     usuario = session['usuario']
     
-    # Obtener cuentas del usuario
-    cuentas = api_request('GET', f'/api/cuentas?persona={usuario["id"]}')
+    # Cuentas y últimos movimientos del usuario
+    resumen = resumen_usuario()
     
     return render_template('dashboard.html', 
         usuario=usuario,
-        cuentas=cuentas.get('data', [])
+        cuentas=resumen.get('cuentas', []),
+        transacciones=resumen.get('transacciones', [])
     )
 
 
@@ -101,11 +161,10 @@ def cuentas():
         return redirect(url_for('login'))
     
     usuario = session['usuario']
-    result = api_request('GET', f'/api/cuentas?persona={usuario["id"]}')
     
     return render_template('cuentas.html',
         usuario=usuario,
-        cuentas=result.get('data', [])
+        cuentas=resumen_usuario().get('cuentas', [])
     )
 
 
@@ -115,13 +174,59 @@ def detalle_cuenta(id):
     if 'usuario' not in session:
         return redirect(url_for('login'))
     
-    cuenta = api_request('GET', f'/api/cuentas/{id}?tarjetas=true')
-    transacciones = api_request('GET', f'/api/transacciones?cuenta={id}&limite=20')
+    cursor = request.args.get('cursor')
+    endpoint = f'/api/transacciones?cuenta={id}&limite=20'
+    if cursor:
+        endpoint += f'&cursor={cursor}'
+    
+    resultados = api_requests(
+        cuenta=('GET', f'/api/cuentas/{id}?tarjetas=true'),
+        transacciones=('GET', endpoint)
+    )
+    cuenta = resultados['cuenta']
+    transacciones = resultados['transacciones']
+    
+    if not cuenta.get('success'):
+        flash(cuenta.get('error', 'No se pudo cargar la cuenta'), 'danger')
+        return redirect(url_for('cuentas'))
+    
+    if not transacciones.get('success'):
+        flash('No se pudo cargar el historial de movimientos', 'warning')
     
     return render_template('cuenta_detalle.html',
         usuario=session['usuario'],
         cuenta=cuenta.get('data'),
-        transacciones=transacciones.get('data', [])
+        transacciones=transacciones.get('data', []),
+        siguiente_cursor=transacciones.get('siguiente_cursor')
+    )
+
+
+@app.route('/cuenta/<int:id>/estado-cuenta')
+def exportar_estado_cuenta(id):
+    """Descarga el estado de cuenta (CSV) transmitido desde el backend"""
+    if 'usuario' not in session:
+        return redirect(url_for('login'))
+    
+    params = {'cuenta': id, 'formato': 'csv'}
+    for filtro in ('desde', 'hasta'):
+        if request.args.get(filtro):
+            params[filtro] = request.args[filtro]
+    
+    try:
+        upstream = cliente_api.cliente('backend').solicitar(
+            'GET', '/api/transacciones/exportar', params=params, stream=True
+        )
+    except (requests.exceptions.RequestException, cliente_api.CircuitoAbierto):
+        flash('No se pudo conectar con el servidor', 'danger')
+        return redirect(url_for('detalle_cuenta', id=id))
+    
+    if upstream.status_code != 200:
+        flash('No se pudo generar el estado de cuenta', 'danger')
+        return redirect(url_for('detalle_cuenta', id=id))
+    
+    return Response(stream_with_context(upstream.iter_content(chunk_size=8192)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename=estado_cuenta_{id}.csv'}
     )
 
 
@@ -132,7 +237,6 @@ def transferir():
         return redirect(url_for('login'))
     
     usuario = session['usuario']
-    cuentas = api_request('GET', f'/api/cuentas?persona={usuario["id"]}')
     
     if request.method == 'POST':
         result = api_request('POST', '/api/transacciones/transferir', {
@@ -140,17 +244,20 @@ def transferir():
             'cuenta_destino': int(request.form['cuenta_destino']),
             'monto': float(request.form['monto']),
             'descripcion': request.form.get('descripcion', '')
-        })
+        }, clave_idempotencia=clave_formulario())
         
         if result.get('success'):
+            invalidar_resumen()
             flash('Transferencia realizada exitosamente', 'success')
             return redirect(url_for('dashboard'))
         else:
             flash(result.get('error', 'Error en transferencia'), 'danger')
     
+    # Si la transferencia falló los saldos no cambiaron: el resumen en caché sigue vigente
     return render_template('transferir.html',
         usuario=usuario,
-        cuentas=cuentas.get('data', [])
+        cuentas=resumen_usuario().get('cuentas', []),
+        idempotency_key=uuid.uuid4().hex
     )
 
 
@@ -176,14 +283,26 @@ def servicios_categoria(categoria):
     if 'usuario' not in session:
         return redirect(url_for('login'))
     
-    proveedores = api_request('GET', f'/api/v1/proveedores/categoria/{categoria}', api='services')
-    cuentas = api_request('GET', f'/api/cuentas?persona={session["usuario"]["id"]}')
+    # El resumen va último: si está en caché se resuelve en este hilo sin esperar
+    resultados = cliente_api.en_paralelo({
+        'proveedores': (api_request, 'GET', f'/api/v1/proveedores/categoria/{categoria}', None, 'services'),
+        'resumen': (resumen_persona, cache_resumen.clave_sesion(session), session['usuario']['id'])
+    }, timeout=app.config.get('API_FANOUT_TIMEOUT'))
+    proveedores = resultados['proveedores']
+    resumen = resultados['resumen']
+    
+    if not proveedores.get('success'):
+        flash(proveedores.get('error', 'No se pudieron cargar los proveedores'), 'danger')
+    
+    if not resumen.get('success'):
+        flash('No se pudieron cargar tus cuentas', 'warning')
     
     return render_template('servicios_categoria.html',
         usuario=session['usuario'],
         categoria=categoria,
         proveedores=proveedores.get('data', []),
-        cuentas=cuentas.get('data', [])
+        cuentas=(resumen.get('data') or {}).get('cuentas', []),
+        idempotency_key=uuid.uuid4().hex
     )
 
 
@@ -198,9 +317,14 @@ def pagar_servicio():
         'referencia': request.form['referencia'],
         'monto': float(request.form['monto']),
         'id_cuenta': int(request.form['id_cuenta'])
-    }, api='services')
+    }, api='services', clave_idempotencia=clave_formulario())
     
     if result.get('success'):
+        invalidar_resumen()
+    
+    if result.get('success') and result['data']['estado'] == 'PENDIENTE':
+        flash(f'Pago registrado, el débito de tu cuenta está en proceso. Comprobante: {result["data"]["comprobante"]}', 'success')
+    elif result.get('success'):
         flash(f'Pago realizado. Comprobante: {result["data"]["comprobante"]}', 'success')
     else:
         flash(result.get('error', 'Error en el pago'), 'danger')
@@ -217,7 +341,6 @@ def retiro_sin_tarjeta():
         return redirect(url_for('login'))
     
     usuario = session['usuario']
-    cuentas = api_request('GET', f'/api/cuentas?persona={usuario["id"]}')
     
     if request.method == 'POST':
         result = api_request('POST', '/api/retiros/sin-tarjeta/generar', {
@@ -226,6 +349,7 @@ def retiro_sin_tarjeta():
         })
         
         if result.get('success'):
+            invalidar_resumen()
             return render_template('retiro_codigo.html',
                 usuario=usuario,
                 codigo=result['data']
@@ -235,10 +359,22 @@ def retiro_sin_tarjeta():
     
     return render_template('retiro_sin_tarjeta.html',
         usuario=usuario,
-        cuentas=cuentas.get('data', [])
+        cuentas=resumen_usuario().get('cuentas', [])
     )
 
 
+# ============== MÉTRICAS ==============
+
+@app.route('/metricas/apis')
+def metricas_apis():
+    """Uso de los pools, latencia y circuit breaker de cada API"""
+    return jsonify({
+        'success': True,
+        'data': cliente_api.resumen(),
+        'cache_resumen': cache_resumen.cache.to_dict()
+    })
+
+
 # ============== ERRORES ==============
 
 @app.errorhandler(404)
@@ -0,0 +1,112 @@
+"""
+Benchmark de fan-out de las páginas con varias llamadas a las APIs
+Levanta una API simulada local con latencia configurable (backend y
+servicios apuntan a ella), renderiza cada página con el cliente de pruebas
+de Flask y compara p50/p95 de la página con las llamadas en secuencia
+(API_FANOUT_HILOS=0) contra el fan-out en paralelo.
+
+No necesita el backend ni la API de servicios. Ejecutar:
+    python benchmark_fanout.py --latencia 40 --paginas 100
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CUENTA = {
+    'id': 1, 'numero_cuenta': '2200000001', 'tipo_cuenta': 'AHORROS',
+    'saldo_actual': 1500.0, 'estado': 'ACTIVA', 'tarjetas': []
+}
+
+
+def respuesta_simulada(ruta):
+    """Cuerpo JSON de la API simulada según la ruta"""
+    if re.match(r'^/api/personas/\d+/resumen', ruta):
+        return {'success': True, 'data': {'cuentas': [CUENTA], 'transacciones': []}}
+    if re.match(r'^/api/cuentas/\d+', ruta):
+        return {'success': True, 'data': CUENTA}
+    if ruta.startswith('/api/cuentas'):
+        return {'success': True, 'data': [CUENTA], 'total': 1}
+    if ruta.startswith('/api/transacciones'):
+        return {'success': True, 'data': [], 'total': 0, 'siguiente_cursor': None}
+    if ruta.startswith('/api/v1/proveedores/categoria/'):
+        return {'success': True, 'data': [], 'total': 0}
+    return {'success': False, 'error': 'Ruta no simulada'}
+
+
+def iniciar_api_simulada(latencia_ms):
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            # Latencia con jitter (±50%) para que las llamadas no terminen alineadas
+            time.sleep(latencia_ms / 1000 * random.uniform(0.5, 1.5))
+            cuerpo = json.dumps(respuesta_simulada(self.path)).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de fan-out de páginas')
+    parser.add_argument('--latencia', type=float, default=40, help='Latencia media de la API simulada (ms)')
+    parser.add_argument('--paginas', type=int, default=100, help='Renderizados por página y modo')
+    args = parser.parse_args()
+
+    servidor = iniciar_api_simulada(args.latencia)
+    url = f'http://127.0.0.1:{servidor.server_address[1]}'
+    os.environ['BACKEND_URL'] = url
+    os.environ['SERVICES_API_URL'] = url
+
+    from app import app
+    import cliente_api
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion['usuario'] = {'id': 1, 'nombre': 'Benchmark'}
+
+    paginas = [('detalle de cuenta', '/cuenta/1'), ('servicios por categoría', '/servicios/SERVICIOS')]
+
+    print(f"⏱️  API simulada con {args.latencia:.0f} ms de latencia media, {args.paginas} renderizados\n")
+    print(f"  {'página':<26}{'modo':<12}{'p50 ms':>9}{'p95 ms':>9}{'media ms':>10}")
+    for nombre, ruta in paginas:
+        for modo, hilos in (('secuencia', 0), ('fan-out', 16)):
+            cliente_api.configurar_fanout(hilos)
+            cliente.get(ruta)  # Calentar el pool keep-alive
+            tiempos = []
+            for _ in range(args.paginas):
+                inicio = time.perf_counter()
+                respuesta = cliente.get(ruta)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+                if respuesta.status_code != 200:
+                    parser.error(f'{ruta} respondió HTTP {respuesta.status_code}')
+            print(f"  {nombre:<26}{modo:<12}{percentil(tiempos, 0.50):9.1f}"
+                  f"{percentil(tiempos, 0.95):9.1f}{statistics.mean(tiempos):10.1f}")
+
+    servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
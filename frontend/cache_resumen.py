@@ -0,0 +1,69 @@
+"""
+Caché por sesión del resumen de la persona (/api/personas/<id>/resumen)
+
+Las páginas que muestran las cuentas del usuario leen el resumen de aquí en
+lugar de pedirlo al backend en cada carga. Cada entrada vive RESUMEN_TTL
+segundos y se invalida explícitamente después de cualquier operación que
+mueva saldo (transferencia, retiro, pago) y al cerrar sesión. La clave es
+un identificador aleatorio guardado en la sesión, no el id de la persona:
+dos sesiones del mismo usuario no comparten entrada.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheResumen:
+    """Caché LRU con TTL, segura entre hilos"""
+
+    def __init__(self, ttl=30, maximo=5000):
+        self.ttl = ttl
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._contadores = dict.fromkeys(('aciertos', 'fallos', 'invalidaciones'), 0)
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada and entrada[0] > time.monotonic():
+                self._entradas.move_to_end(clave)
+                self._contadores['aciertos'] += 1
+                return entrada[1]
+            if entrada:
+                del self._entradas[clave]
+            self._contadores['fallos'] += 1
+            return None
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + self.ttl, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, clave):
+        with self._lock:
+            if self._entradas.pop(clave, None) is not None:
+                self._contadores['invalidaciones'] += 1
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self._contadores, entradas=len(self._entradas), ttl=self.ttl)
+
+
+cache = CacheResumen()
+
+
+def init_app(app):
+    global cache
+    cache = CacheResumen(app.config.get('RESUMEN_TTL', 30), app.config.get('RESUMEN_CACHE_MAX', 5000))
+
+
+def clave_sesion(session):
+    """Identificador de caché de la sesión actual (se crea al primer uso)"""
+    if 'cache_id' not in session:
+        session['cache_id'] = secrets.token_urlsafe(16)
+    return session['cache_id']
@@ -0,0 +1,318 @@
+"""
+Cliente HTTP compartido hacia las APIs (backend y servicios)
+
+Cada API tiene su propia requests.Session con un pool de conexiones
+keep-alive de tamaño configurable, así una página no paga el handshake TCP
+en cada llamada. Sobre cada API:
+
+- timeout de conexión global y de lectura por endpoint (prefijo de ruta)
+- reintentos con espera exponencial y jitter ante errores de red o
+  502/503/504, solo en GET y en POST con cabecera Idempotency-Key (la API
+  deduplica por la clave, así un reintento nunca aplica la operación dos
+  veces). Un POST con clave también se reintenta ante 409 (la solicitud
+  original sigue en proceso)
+- circuit breaker: tras API_CIRCUITO_FALLOS fallos seguidos (errores de
+  red, timeouts o 502/503/504; un 500 por datos inválidos no cuenta) las
+  llamadas fallan de inmediato durante API_CIRCUITO_APERTURA segundos; luego pasa
+  una sola petición de prueba que lo cierra o lo vuelve a abrir
+- métricas de latencia (histograma por API) y de uso del pool
+
+en_paralelo() hace fan-out de llamadas independientes de una misma página
+en un pool de hilos: la página espera a la más lenta y no a la suma.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from comun.metricas import histograma
+
+ESTADOS_REINTENTABLES = (502, 503, 504)
+CABECERA_IDEMPOTENCIA = 'Idempotency-Key'
+
+
+class CircuitoAbierto(Exception):
+    """La API está marcada como caída; no se intenta la petición"""
+
+    def __init__(self, api):
+        super().__init__(f'Circuito abierto para {api}')
+        self.api = api
+
+
+class Circuito:
+    """Circuit breaker por API, seguro entre hilos"""
+
+    CERRADO = 'CERRADO'
+    ABIERTO = 'ABIERTO'
+    SEMI_ABIERTO = 'SEMI_ABIERTO'
+
+    def __init__(self, umbral_fallos=5, segundos_apertura=30):
+        self.umbral_fallos = umbral_fallos
+        self.segundos_apertura = segundos_apertura
+        self._lock = threading.Lock()
+        self.estado = self.CERRADO
+        self._fallos = 0
+        self._abierto_desde = 0.0
+        self._prueba_en_curso = False
+        self.aperturas = 0
+        self.rechazadas = 0
+
+    def permitir(self):
+        """True si la petición puede salir hacia la API"""
+        with self._lock:
+            if self.estado == self.ABIERTO and time.monotonic() - self._abierto_desde >= self.segundos_apertura:
+                self.estado = self.SEMI_ABIERTO
+                self._prueba_en_curso = False
+
+            if self.estado == self.CERRADO:
+                return True
+
+            # Semiabierto: deja pasar una sola petición de prueba
+            if self.estado == self.SEMI_ABIERTO and not self._prueba_en_curso:
+                self._prueba_en_curso = True
+                return True
+
+            self.rechazadas += 1
+            return False
+
+    def exito(self):
+        with self._lock:
+            self.estado = self.CERRADO
+            self._fallos = 0
+            self._prueba_en_curso = False
+
+    def liberar_prueba(self):
+        """La petición no dice nada sobre la salud de la API (p. ej. URL inválida)"""
+        with self._lock:
+            self._prueba_en_curso = False
+
+    def fallo(self):
+        with self._lock:
+            self._fallos += 1
+            if self.estado == self.SEMI_ABIERTO or self._fallos >= self.umbral_fallos:
+                if self.estado != self.ABIERTO:
+                    self.aperturas += 1
+                self.estado = self.ABIERTO
+                self._abierto_desde = time.monotonic()
+                self._prueba_en_curso = False
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'estado': self.estado,
+                'fallos_consecutivos': self._fallos,
+                'aperturas': self.aperturas,
+                'rechazadas': self.rechazadas
+            }
+
+
+class ClienteAPI:
+    """Sesión HTTP con pool keep-alive, reintentos y circuit breaker para una API"""
+
+    def __init__(self, nombre, base_url, tamano_pool=20, timeout_conexion=3.05,
+                 timeout_lectura=10, timeouts=None, reintentos_get=2, espera_base=0.1,
+                 circuito=None):
+        self.nombre = nombre
+        self.base_url = base_url.rstrip('/')
+        self.tamano_pool = tamano_pool
+        self.timeout_conexion = timeout_conexion
+        self.timeout_lectura = timeout_lectura
+        # Prefijos más largos primero: '/api/transacciones/exportar' antes que '/api/transacciones'
+        self.timeouts = sorted((timeouts or {}).items(), key=lambda t: len(t[0]), reverse=True)
+        self.reintentos_get = reintentos_get
+        self.espera_base = espera_base
+        self.circuito = circuito or Circuito()
+        self.latencia = histograma(f'api.{nombre}')
+
+        self.sesion = requests.Session()
+        self._adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=tamano_pool, max_retries=0)
+        self.sesion.mount('http://', self._adaptador)
+        self.sesion.mount('https://', self._adaptador)
+
+        self._lock = threading.Lock()
+        self._en_curso = 0
+        self._maximo_en_curso = 0
+        self._contadores = dict.fromkeys(('peticiones', 'errores', 'reintentos'), 0)
+
+    def _timeout(self, endpoint):
+        ruta = endpoint.split('?', 1)[0]
+        for prefijo, segundos in self.timeouts:
+            if ruta.startswith(prefijo):
+                return (self.timeout_conexion, segundos)
+        return (self.timeout_conexion, self.timeout_lectura)
+
+    def _contar(self, campo, delta=1):
+        with self._lock:
+            if campo == 'en_curso':
+                self._en_curso += delta
+                self._maximo_en_curso = max(self._maximo_en_curso, self._en_curso)
+            else:
+                self._contadores[campo] += delta
+
+    def _intento(self, metodo, url, timeout, **kwargs):
+        if not self.circuito.permitir():
+            raise CircuitoAbierto(self.nombre)
+
+        self._contar('peticiones')
+        self._contar('en_curso')
+        inicio = time.perf_counter()
+        try:
+            respuesta = self.sesion.request(metodo, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            self._contar('errores')
+            self.circuito.fallo()
+            raise
+        except requests.RequestException:
+            self._contar('errores')
+            self.circuito.liberar_prueba()
+            raise
+        finally:
+            self._contar('en_curso', -1)
+            self.latencia.observar(time.perf_counter() - inicio)
+
+        if respuesta.status_code >= 500:
+            self._contar('errores')
+        # Solo la API caída o saturada abre el circuito: cualquier otra respuesta
+        # (incluido un 500 por un dato inválido) prueba que está atendiendo
+        if respuesta.status_code in ESTADOS_REINTENTABLES:
+            self.circuito.fallo()
+        else:
+            self.circuito.exito()
+        return respuesta
+
+    def solicitar(self, metodo, endpoint, **kwargs):
+        """
+        Envía la petición y retorna el requests.Response.
+        Lanza CircuitoAbierto o las excepciones de requests.
+        """
+        url = f'{self.base_url}{endpoint}'
+        timeout = kwargs.pop('timeout', None) or self._timeout(endpoint)
+        con_clave = CABECERA_IDEMPOTENCIA in (kwargs.get('headers') or {})
+        reintentos = self.reintentos_get if metodo == 'GET' or con_clave else 0
+        reintentables = ESTADOS_REINTENTABLES + (409,) if con_clave else ESTADOS_REINTENTABLES
+
+        for intento in range(reintentos + 1):
+            ultimo = intento == reintentos
+            try:
+                respuesta = self._intento(metodo, url, timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if ultimo:
+                    raise
+            else:
+                if ultimo or respuesta.status_code not in reintentables:
+                    return respuesta
+                respuesta.close()
+
+            # Full jitter: espera aleatoria entre 0 y base * 2^intento
+            self._contar('reintentos')
+            time.sleep(random.uniform(0, self.espera_base * (2 ** intento)))
+
+    def _pool(self):
+        """Conexiones creadas y libres del pool de urllib3"""
+        creadas = libres = 0
+        pools = self._adaptador.poolmanager.pools
+        for clave in pools.keys():
+            pool = pools.get(clave)
+            if pool is None:
+                continue
+            creadas += pool.num_connections
+            # La cola del pool guarda None en los espacios sin conexión abierta
+            libres += sum(1 for conexion in list(pool.pool.queue) if conexion is not None)
+        return creadas, libres
+
+    def to_dict(self):
+        creadas, libres = self._pool()
+        with self._lock:
+            datos = dict(self._contadores)
+            datos['pool'] = {
+                'tamano': self.tamano_pool,
+                'en_curso': self._en_curso,
+                'maximo_en_curso': self._maximo_en_curso,
+                'conexiones_creadas': creadas,
+                'conexiones_libres': libres,
+                'uso': round(self._en_curso / self.tamano_pool, 2) if self.tamano_pool else None
+            }
+        datos['base_url'] = self.base_url
+        datos['circuito'] = self.circuito.to_dict()
+        datos['latencia'] = self.latencia.to_dict()
+        return datos
+
+
+clientes = {}
+_ejecutor = None
+
+
+def init_app(app):
+    """Crea un cliente por API y el pool de fan-out según la configuración de la app"""
+    configurar_fanout(app.config.get('API_FANOUT_HILOS', 16))
+    for nombre, clave_url in (('backend', 'BACKEND_URL'), ('services', 'SERVICES_API_URL')):
+        clientes[nombre] = ClienteAPI(
+            nombre,
+            app.config[clave_url],
+            tamano_pool=app.config.get('API_POOL_CONEXIONES', 20),
+            timeout_conexion=app.config.get('API_TIMEOUT_CONEXION', 3.05),
+            timeout_lectura=app.config.get('API_TIMEOUT_LECTURA', 10),
+            timeouts=app.config.get('API_TIMEOUTS'),
+            reintentos_get=app.config.get('API_REINTENTOS_GET', 2),
+            espera_base=app.config.get('API_REINTENTO_ESPERA_BASE', 0.1),
+            circuito=Circuito(
+                app.config.get('API_CIRCUITO_FALLOS', 5),
+                app.config.get('API_CIRCUITO_APERTURA', 30)
+            )
+        )
+
+
+def cliente(api):
+    return clientes[api]
+
+
+def configurar_fanout(hilos):
+    """Reemplaza el pool de fan-out; con 0 hilos en_paralelo llama en secuencia"""
+    global _ejecutor
+    anterior = _ejecutor
+    _ejecutor = ThreadPoolExecutor(hilos, thread_name_prefix='fanout') if hilos else None
+    if anterior:
+        anterior.shutdown(wait=False)
+
+
+def _ejecutar(funcion, args):
+    try:
+        return funcion(*args)
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
+def en_paralelo(tareas, timeout=None):
+    """
+    Ejecuta en paralelo tareas independientes {nombre: (funcion, *args)} y
+    retorna {nombre: resultado}. Una tarea que lanza una excepción o no
+    termina dentro de `timeout` segundos no tumba a las demás: su resultado
+    es {'success': False, 'error': ...}. La última tarea corre en el hilo
+    que llama, así dos llamadas ocupan un solo hilo del pool.
+    """
+    nombres = list(tareas)
+    if _ejecutor is None or len(nombres) < 2:
+        return {nombre: _ejecutar(tareas[nombre][0], tareas[nombre][1:]) for nombre in nombres}
+
+    futuros = {
+        nombre: _ejecutor.submit(_ejecutar, tareas[nombre][0], tareas[nombre][1:])
+        for nombre in nombres[:-1]
+    }
+    resultados = {nombres[-1]: _ejecutar(tareas[nombres[-1]][0], tareas[nombres[-1]][1:])}
+
+    wait(futuros.values(), timeout=timeout)
+    for nombre, futuro in futuros.items():
+        if futuro.done():
+            resultados[nombre] = futuro.result()
+        else:
+            futuro.cancel()
+            resultados[nombre] = {'success': False, 'error': 'Tiempo de espera agotado'}
+    return {nombre: resultados[nombre] for nombre in nombres}
+
+
+def resumen():
+    return {nombre: c.to_dict() for nombre, c in clientes.items()}
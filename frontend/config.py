@@ -11,6 +11,29 @@ class Config:
     BACKEND_URL = os.environ.get('BACKEND_URL', 'http://localhost:5001')
     SERVICES_API_URL = os.environ.get('SERVICES_API_URL', 'http://localhost:5002')
     
+    # Cliente HTTP hacia las APIs (pool keep-alive por API)
+    API_POOL_CONEXIONES = int(os.environ.get('API_POOL_CONEXIONES', 20))
+    API_TIMEOUT_CONEXION = float(os.environ.get('API_TIMEOUT_CONEXION', 3.05))
+    API_TIMEOUT_LECTURA = float(os.environ.get('API_TIMEOUT_LECTURA', 10))
+    # Timeout de lectura por prefijo de endpoint (segundos)
+    API_TIMEOUTS = {
+        '/api/auth/login': 15,
+        '/api/transacciones/exportar': 60,
+        '/api/v1/tipos-servicio': 5,
+        '/api/v1/proveedores': 5,
+    }
+    API_REINTENTOS_GET = int(os.environ.get('API_REINTENTOS_GET', 2))
+    API_REINTENTO_ESPERA_BASE = float(os.environ.get('API_REINTENTO_ESPERA_BASE', 0.1))
+    API_CIRCUITO_FALLOS = int(os.environ.get('API_CIRCUITO_FALLOS', 5))
+    API_CIRCUITO_APERTURA = float(os.environ.get('API_CIRCUITO_APERTURA', 30))
+    # Hilos para llamadas concurrentes de una misma página (0 = en secuencia)
+    API_FANOUT_HILOS = int(os.environ.get('API_FANOUT_HILOS', 16))
+    API_FANOUT_TIMEOUT = float(os.environ.get('API_FANOUT_TIMEOUT', 15))
+    
+    # Caché por sesión del resumen de la persona (segundos)
+    RESUMEN_TTL = int(os.environ.get('RESUMEN_TTL', 30))
+    RESUMEN_CACHE_MAX = int(os.environ.get('RESUMEN_CACHE_MAX', 5000))
+    
     # Sesión
     SESSION_PERMANENT = False
     SESSION_TYPE = 'filesystem'
@@ -0,0 +1,161 @@
+"""
+Migraciones versionadas de la base de datos
+Aplica en orden los archivos database/migrations/NNNN_nombre.sql pendientes
+y registra cada versión aplicada en la tabla SCHEMA_MIGRATIONS.
+
+Ejecutar:
+    python migrar.py            # Aplica migraciones pendientes
+    python migrar.py --estado   # Lista migraciones aplicadas y pendientes
+
+Conexión: DATABASE_URL o DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+(mismas variables que backend/.env).
+
+Una migración que comience con la línea `-- migrar: sin-transaccion` se
+ejecuta sentencia por sentencia en modo autocommit (necesario para
+CREATE INDEX CONCURRENTLY). El resto se ejecuta en una sola transacción.
+"""
+
+import argparse
+import os
+import re
+import sys
+
+import psycopg2
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRACIONES_DIR = os.path.join(BASE_DIR, 'database', 'migrations')
+MARCA_SIN_TRANSACCION = '-- migrar: sin-transaccion'
+PATRON_ARCHIVO = re.compile(r'^(\d{4})_[\w-]+\.sql$')
+
+
+def parametros_conexion():
+    """Parámetros de conexión tomados del entorno"""
+    if os.environ.get('DATABASE_URL'):
+        return {'dsn': os.environ['DATABASE_URL']}
+
+    return {
+        'host': os.environ.get('DB_HOST', 'localhost'),
+        'port': os.environ.get('DB_PORT', '5432'),
+        'dbname': os.environ.get('DB_NAME', 'banco_pichincha'),
+        'user': os.environ.get('DB_USER', 'postgres'),
+        'password': os.environ.get('DB_PASSWORD', 'postgres')
+    }
+
+
+def listar_migraciones():
+    """Retorna [(version, ruta)] ordenado por versión"""
+    migraciones = []
+    for archivo in sorted(os.listdir(MIGRACIONES_DIR)):
+        if PATRON_ARCHIVO.match(archivo):
+            migraciones.append((archivo[:-4], os.path.join(MIGRACIONES_DIR, archivo)))
+    return migraciones
+
+
+def asegurar_tabla_control(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS SCHEMA_MIGRATIONS (
+               VERSION              VARCHAR(100)         NOT NULL,
+               APLICADA_EN          TIMESTAMP            NOT NULL DEFAULT CURRENT_TIMESTAMP,
+               CONSTRAINT PK_SCHEMA_MIGRATIONS PRIMARY KEY (VERSION)
+            )
+        """)
+    conn.commit()
+
+
+def versiones_aplicadas(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT VERSION FROM SCHEMA_MIGRATIONS")
+        return {fila[0] for fila in cur.fetchall()}
+
+
+def registrar_version(conn, version):
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO SCHEMA_MIGRATIONS (VERSION) VALUES (%s)", (version,))
+
+
+def dividir_sentencias(sql):
+    """Divide un script en sentencias (sin soporte para bloques $$ ... $$)"""
+    sin_comentarios = re.sub(r'/\*.*?\*/', '', sql, flags=re.S)
+    sin_comentarios = re.sub(r'--[^\n]*', '', sin_comentarios)
+    return [s.strip() for s in sin_comentarios.split(';') if s.strip()]
+
+
+def aplicar_migracion(conn, version, ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        sql = f.read()
+
+    if sql.startswith(MARCA_SIN_TRANSACCION):
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                for sentencia in dividir_sentencias(sql):
+                    cur.execute(sentencia)
+        finally:
+            conn.autocommit = False
+        registrar_version(conn, version)
+        conn.commit()
+    else:
+        try:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+            registrar_version(conn, version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def migrar(conn):
+    """Aplica las migraciones pendientes. Retorna la lista de versiones aplicadas"""
+    asegurar_tabla_control(conn)
+    aplicadas = versiones_aplicadas(conn)
+    nuevas = []
+
+    for version, ruta in listar_migraciones():
+        if version in aplicadas:
+            continue
+        print(f"🔄 Aplicando {version}...")
+        aplicar_migracion(conn, version, ruta)
+        print(f"✅ {version} aplicada")
+        nuevas.append(version)
+
+    if not nuevas:
+        print("ℹ️  No hay migraciones pendientes")
+
+    return nuevas
+
+
+def mostrar_estado(conn):
+    asegurar_tabla_control(conn)
+    aplicadas = versiones_aplicadas(conn)
+    for version, _ in listar_migraciones():
+        estado = 'aplicada ' if version in aplicadas else 'pendiente'
+        print(f"  [{estado}] {version}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migraciones de la base de datos')
+    parser.add_argument('--estado', action='store_true', help='Solo mostrar el estado de las migraciones')
+    args = parser.parse_args()
+
+    try:
+        conn = psycopg2.connect(**parametros_conexion())
+    except Exception as e:
+        print(f"❌ Error de conexión: {e}")
+        sys.exit(1)
+
+    try:
+        if args.estado:
+            mostrar_estado(conn)
+        else:
+            migrar(conn)
+    except Exception as e:
+        print(f"❌ Error aplicando migraciones: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,10 @@ from flask_cors import CORS
 from extensions import db
 from config import config
 import os
+import sys
+
+# Módulos compartidos entre servicios (comun/, en la raíz del proyecto)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 def create_app(config_name=None):
     """Factory para crear la aplicación Flask"""
@@ -26,6 +30,18 @@ def create_app(config_name=None):
     from routes import register_blueprints
     register_blueprints(app)
     
+    # Precargar el catálogo de servicios en memoria
+    from core import catalogo
+    catalogo.init_app(app)
+    
+    # Caché de respuestas de los endpoints del catálogo
+    from core import cache_respuestas
+    cache_respuestas.init_app(app)
+    
+    # Worker de la outbox de débitos (si OUTBOX_WORKER está activo)
+    from core import outbox
+    outbox.init_app(app)
+    
     # Ruta raíz
     @app.route('/')
     def index():
@@ -0,0 +1,88 @@
+"""
+Benchmark de pagos por lote
+Compara el throughput de registrar N pagos uno por uno (POST /api/v1/pagos,
+un commit por pago) contra el mismo volumen en lotes (POST /api/v1/pagos/lote).
+Usa el cliente de pruebas de Flask, sin servidor HTTP de por medio.
+
+Requiere PostgreSQL configurado en .env y el catálogo cargado. Ejecutar:
+    python benchmark_pagos_lote.py --pagos 2000 --tamano-lote 500 --limpiar
+"""
+
+import argparse
+import random
+import time
+
+from app import create_app
+from extensions import db
+from models.pago import PagoServicio
+from core.catalogo import catalogo
+
+DETALLE_BENCHMARK = 'BENCHMARK PAGOS LOTE'
+
+
+def generar_items(servicio, cantidad):
+    minimo = float(servicio.monto_minimo or 1)
+    maximo = min(float(servicio.monto_maximo or 500), 500)
+    return [{
+        'codigo_servicio': servicio.codigo,
+        'referencia': str(random.randint(100000, 999999)),
+        'monto': round(random.uniform(minimo, max(minimo, maximo)), 2),
+        'detalle': DETALLE_BENCHMARK
+    } for _ in range(cantidad)]
+
+
+def medir(nombre, funcion, cantidad):
+    inicio = time.perf_counter()
+    exitosos = funcion()
+    duracion = time.perf_counter() - inicio
+    print(f"  {nombre:<12} {exitosos:>6}/{cantidad} pagos en {duracion:7.2f}s  "
+          f"{exitosos / duracion:10.1f} pagos/s")
+    return exitosos / duracion if duracion else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de pagos por lote')
+    parser.add_argument('--pagos', type=int, default=2000)
+    parser.add_argument('--tamano-lote', type=int, default=500)
+    parser.add_argument('--servicio', default='EEQ_LUZ', help='Código del servicio a pagar')
+    parser.add_argument('--limpiar', action='store_true', help='Eliminar los pagos generados al terminar')
+    args = parser.parse_args()
+
+    app = create_app('production')
+    cliente = app.test_client()
+
+    with app.app_context():
+        servicio = catalogo.servicio(args.servicio)
+        if not servicio:
+            parser.error(f'Servicio {args.servicio} no encontrado en el catálogo')
+
+        individuales = generar_items(servicio, args.pagos)
+        por_lote = generar_items(servicio, args.pagos)
+
+    def uno_por_uno():
+        return sum(
+            1 for item in individuales
+            if cliente.post('/api/v1/pagos', json=item).status_code == 201
+        )
+
+    def en_lotes():
+        exitosos = 0
+        for i in range(0, len(por_lote), args.tamano_lote):
+            respuesta = cliente.post('/api/v1/pagos/lote', json={'pagos': por_lote[i:i + args.tamano_lote]})
+            exitosos += respuesta.get_json()['resumen']['exitosos']
+        return exitosos
+
+    print(f"💳 {args.pagos} pagos de {servicio.codigo}, lotes de {args.tamano_lote}\n")
+    individual = medir('individual', uno_por_uno, args.pagos)
+    lote = medir('lote', en_lotes, args.pagos)
+    print(f"\n📊 Mejora: x{lote / individual:.1f}")
+
+    if args.limpiar:
+        with app.app_context():
+            eliminados = PagoServicio.query.filter_by(detalle=DETALLE_BENCHMARK).delete()
+            db.session.commit()
+            print(f"🧹 {eliminados} pagos de prueba eliminados")
+
+
+if __name__ == '__main__':
+    main()
@@ -24,6 +24,36 @@ class Config:
     
     # Configuración CORS
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*')
+    
+    # Caché del catálogo de servicios (segundos)
+    CATALOGO_TTL = int(os.environ.get('CATALOGO_TTL', 300))
+    
+    # Caché de respuestas del catálogo (vacío = en memoria; redis://... requiere el paquete redis)
+    CACHE_RESPUESTAS_URL = os.environ.get('CACHE_RESPUESTAS_URL', '')
+    CACHE_RESPUESTAS_TTL = int(os.environ.get('CACHE_RESPUESTAS_TTL', 300))
+    CACHE_RESPUESTAS_MAX = int(os.environ.get('CACHE_RESPUESTAS_MAX', 1000))
+    CACHE_RESPUESTAS_MAX_AGE = int(os.environ.get('CACHE_RESPUESTAS_MAX_AGE', 60))
+    
+    # Pagos por lote
+    PAGOS_LOTE_MAX = int(os.environ.get('PAGOS_LOTE_MAX', 1000))
+    
+    # Backend principal (débitos de pagos con cuenta)
+    BACKEND_URL = os.environ.get('BACKEND_URL', 'http://localhost:5001')
+    
+    # Outbox de débitos (worker en proceso opcional; también procesar_outbox.py)
+    OUTBOX_WORKER = os.environ.get('OUTBOX_WORKER', 'false').lower() == 'true'
+    OUTBOX_INTERVALO = float(os.environ.get('OUTBOX_INTERVALO', 2))
+    OUTBOX_LOTE = int(os.environ.get('OUTBOX_LOTE', 100))
+    OUTBOX_TIMEOUT = float(os.environ.get('OUTBOX_TIMEOUT', 10))
+    OUTBOX_MAX_INTENTOS = int(os.environ.get('OUTBOX_MAX_INTENTOS', 5))
+    OUTBOX_ESPERA_BASE = float(os.environ.get('OUTBOX_ESPERA_BASE', 5))
+    OUTBOX_ESPERA_MAX = float(os.environ.get('OUTBOX_ESPERA_MAX', 600))
+    OUTBOX_PROCESANDO_TIMEOUT = int(os.environ.get('OUTBOX_PROCESANDO_TIMEOUT', 300))
+    
+    # Idempotency-Key (horas que se guardan las respuestas y segundos que una
+    # solicitud en proceso retiene su clave si el proceso cae a mitad)
+    IDEMPOTENCIA_TTL_HORAS = int(os.environ.get('IDEMPOTENCIA_TTL_HORAS', 24))
+    IDEMPOTENCIA_PROCESO_SEGUNDOS = int(os.environ.get('IDEMPOTENCIA_PROCESO_SEGUNDOS', 60))
 
 
 class DevelopmentConfig(Config):
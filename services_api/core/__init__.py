@@ -0,0 +1 @@
+"""Lógica de negocio compartida de la API de Servicios"""
@@ -0,0 +1,248 @@
+"""
+Caché de respuestas de los endpoints de solo lectura del catálogo
+
+`@cache_respuesta(nombre)` guarda la respuesta 200 ya serializada (cuerpo,
+tipo y ETag) con una clave que incluye la ruta y los query args ordenados,
+así ?activos=false y ?activos=true son entradas distintas. Un acierto no
+toca la base ni vuelve a serializar; con If-None-Match vigente responde 304.
+
+El almacén es intercambiable y expone el subconjunto de la API de Redis que
+se usa (get, set con ex, incr, delete):
+
+- MemoriaLRU (por defecto): en el proceso, LRU con expiración por entrada.
+  Cada worker tiene la suya: un cambio confirmado en otro worker no la
+  invalida y puede servir respuestas viejas hasta CACHE_RESPUESTAS_TTL.
+- Redis: CACHE_RESPUESTAS_URL=redis://... (requiere el paquete `redis`);
+  la caché se comparte entre procesos.
+
+Invalidación: las claves llevan un número de versión guardado en el mismo
+almacén. Cuando se confirma un cambio en TipoServicio, ProveedorServicio o
+Servicio (o se llama a POST /servicios/catalogo/invalidar), la versión se
+incrementa y todas las entradas anteriores dejan de usarse; vencen solas
+por TTL.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from itertools import chain
+
+from flask import Response, current_app, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.tipo_servicio import TipoServicio
+from models.proveedor import ProveedorServicio
+from models.servicio import Servicio
+from core.catalogo import catalogo
+
+logger = logging.getLogger(__name__)
+
+CLAVE_VERSION = 'resp:version'
+MODELOS_CATALOGO = (TipoServicio, ProveedorServicio, Servicio)
+
+
+class MemoriaLRU:
+    """Almacén en memoria con la interfaz de Redis usada por la caché"""
+
+    def __init__(self, maximo=1000):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._datos = OrderedDict()
+
+    def _vigente(self, clave):
+        entrada = self._datos.get(clave)
+        if entrada is None:
+            return None
+        valor, expira = entrada
+        if expira is not None and expira <= time.monotonic():
+            del self._datos[clave]
+            return None
+        self._datos.move_to_end(clave)
+        return valor
+
+    def get(self, clave):
+        with self._lock:
+            return self._vigente(clave)
+
+    def set(self, clave, valor, ex=None):
+        if isinstance(valor, str):
+            valor = valor.encode()
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + ex if ex else None)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+        return True
+
+    def incr(self, clave):
+        with self._lock:
+            valor = int(self._vigente(clave) or 0) + 1
+            # Los contadores (versión) no cuentan para el LRU ni vencen
+            self._datos[clave] = (str(valor).encode(), None)
+            self._datos.move_to_end(clave, last=False)
+            return valor
+
+    def delete(self, *claves):
+        with self._lock:
+            return sum(1 for clave in claves if self._datos.pop(clave, None) is not None)
+
+    def __len__(self):
+        return len(self._datos)
+
+
+class CacheRespuestas:
+    """Caché de respuestas sobre un almacén compatible con Redis"""
+
+    def __init__(self, almacen=None, ttl=300, max_age=60):
+        self.almacen = almacen if almacen is not None else MemoriaLRU()
+        self.ttl = ttl
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._contadores = dict.fromkeys(('aciertos', 'fallos', 'no_modificadas', 'invalidaciones'), 0)
+
+    def _contar(self, campo):
+        with self._lock:
+            self._contadores[campo] += 1
+
+    def version(self):
+        return int(self.almacen.get(CLAVE_VERSION) or 0)
+
+    def clave(self, nombre):
+        argumentos = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+        return f'resp:{self.version()}:{nombre}:{request.path}?{argumentos}'
+
+    def obtener(self, clave):
+        guardada = self.almacen.get(clave)
+        if guardada is None:
+            return None
+        return json.loads(guardada)
+
+    def guardar(self, clave, respuesta):
+        cuerpo = respuesta.get_data(as_text=True)
+        entrada = {
+            'cuerpo': cuerpo,
+            'mimetype': respuesta.mimetype,
+            'etag': hashlib.sha1(cuerpo.encode()).hexdigest()
+        }
+        self.almacen.set(clave, json.dumps(entrada), ex=self.ttl)
+        return entrada
+
+    def invalidar(self):
+        """Descarta todas las respuestas guardadas (nueva versión de claves)"""
+        self.almacen.incr(CLAVE_VERSION)
+        self._contar('invalidaciones')
+
+    def responder(self, entrada):
+        respuesta = Response(entrada['cuerpo'], mimetype=entrada['mimetype'])
+        respuesta.set_etag(entrada['etag'])
+        respuesta.headers['Cache-Control'] = f'public, max-age={self.max_age}'
+        respuesta.make_conditional(request)
+        if respuesta.status_code == 304:
+            self._contar('no_modificadas')
+        return respuesta
+
+    def estado(self):
+        with self._lock:
+            datos = dict(self._contadores)
+        datos.update({
+            'almacen': type(self.almacen).__name__,
+            'version': self.version(),
+            'ttl': self.ttl,
+            'max_age': self.max_age
+        })
+        if isinstance(self.almacen, MemoriaLRU):
+            datos['entradas'] = len(self.almacen)
+        return datos
+
+
+cache = CacheRespuestas()
+
+
+def cache_respuesta(nombre):
+    """
+    Decorador para endpoints GET de solo lectura del catálogo.
+    Solo se guardan respuestas 200; los errores pasan sin cachear.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            try:
+                clave = cache.clave(nombre)
+                entrada = cache.obtener(clave)
+            except Exception as e:
+                # Un almacén caído (Redis) no debe tumbar el endpoint
+                logger.warning('Caché de respuestas no disponible: %s', e)
+                return vista(*args, **kwargs)
+
+            if entrada is not None:
+                cache._contar('aciertos')
+                return cache.responder(entrada)
+
+            cache._contar('fallos')
+            respuesta = current_app.make_response(vista(*args, **kwargs))
+            if respuesta.status_code != 200:
+                return respuesta
+
+            try:
+                entrada = cache.guardar(clave, respuesta)
+            except Exception as e:
+                logger.warning('No se pudo guardar la respuesta en caché: %s', e)
+                return respuesta
+            return cache.responder(entrada)
+        return envoltura
+    return decorador
+
+
+def invalidar_catalogo():
+    """Descarta el catálogo en memoria y las respuestas cacheadas"""
+    catalogo.invalidar()
+    cache.invalidar()
+
+
+def _marcar_cambios(session, flush_context, instances):
+    # session.dirty incluye objetos con atributos asignados sin cambio neto
+    modificados = (obj for obj in session.dirty if session.is_modified(obj))
+    if any(isinstance(obj, MODELOS_CATALOGO) for obj in chain(session.new, modificados, session.deleted)):
+        session.info['catalogo_modificado'] = True
+
+
+def _despues_commit(session):
+    if session.info.pop('catalogo_modificado', False):
+        invalidar_catalogo()
+
+
+def _despues_rollback(session):
+    session.info.pop('catalogo_modificado', None)
+
+
+def _crear_almacen(app):
+    url = app.config.get('CACHE_RESPUESTAS_URL')
+    if not url:
+        return MemoriaLRU(app.config.get('CACHE_RESPUESTAS_MAX', 1000))
+
+    try:
+        import redis
+    except ImportError:
+        app.logger.warning('CACHE_RESPUESTAS_URL requiere el paquete redis; se usa la caché en memoria')
+        return MemoriaLRU(app.config.get('CACHE_RESPUESTAS_MAX', 1000))
+    return redis.Redis.from_url(url)
+
+
+def init_app(app):
+    """Configura el almacén y la invalidación automática al cambiar el catálogo"""
+    global cache
+    cache = CacheRespuestas(
+        _crear_almacen(app),
+        ttl=app.config.get('CACHE_RESPUESTAS_TTL', 300),
+        max_age=app.config.get('CACHE_RESPUESTAS_MAX_AGE', 60)
+    )
+
+    if not event.contains(Session, 'before_flush', _marcar_cambios):
+        event.listen(Session, 'before_flush', _marcar_cambios)
+        event.listen(Session, 'after_commit', _despues_commit)
+        event.listen(Session, 'after_rollback', _despues_rollback)
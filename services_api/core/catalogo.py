@@ -0,0 +1,142 @@
+"""
+Caché en memoria del catálogo (TipoServicio / ProveedorServicio / Servicio)
+
+El catálogo cambia muy poco y cada pago lo consultaba 3-4 veces (servicio,
+proveedor, tipo). Se carga completo en una sola consulta con sus relaciones
+y se guarda como objetos desasociados de la sesión, indexados por código e
+id. Se recarga al vencer CATALOGO_TTL o al invalidarlo explícitamente.
+Una sola solicitud recarga a la vez; las demás esperan y usan el índice
+nuevo. Si la recarga falla (base caída) se sigue sirviendo el índice
+anterior y se reintenta pasados REINTENTO_RECARGA segundos.
+
+Los objetos en caché son de solo lectura: para relacionar un pago con un
+servicio se usa id_servicio, nunca la instancia cacheada.
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy.orm import Session, joinedload
+
+from extensions import db
+from models.servicio import Servicio
+from models.proveedor import ProveedorServicio
+
+logger = logging.getLogger(__name__)
+
+REINTENTO_RECARGA = 10
+
+
+class Catalogo:
+    """Índices del catálogo reemplazados de forma atómica en cada recarga"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._recarga = threading.Lock()
+        self._indices = None
+        self._cargado_en = 0.0
+        self._vence_en = 0.0
+
+    def _cargar(self):
+        with Session(db.engine, expire_on_commit=False) as session:
+            servicios = session.query(Servicio).options(
+                joinedload(Servicio.proveedor).joinedload(ProveedorServicio.tipo)
+            ).all()
+            # Proveedores y tipos sin servicios también forman parte del catálogo
+            proveedores = session.query(ProveedorServicio).options(
+                joinedload(ProveedorServicio.tipo)
+            ).all()
+
+        tipos = {p.tipo.id_tipo: p.tipo for p in proveedores if p.tipo}
+        return {
+            'servicio_codigo': {s.codigo: s for s in servicios},
+            'servicio_id': {s.id_servicio: s for s in servicios},
+            'proveedor_codigo': {p.codigo: p for p in proveedores},
+            'proveedor_id': {p.id_proveedor: p for p in proveedores},
+            'tipo_codigo': {t.codigo: t for t in tipos.values()},
+        }
+
+    def recargar(self):
+        indices = self._cargar()
+        with self._lock:
+            self._indices = indices
+            self._cargado_en = time.monotonic()
+            self._vence_en = self._cargado_en + self.ttl
+        return len(indices['servicio_id'])
+
+    def invalidar(self):
+        """Fuerza la recarga en la próxima consulta (el índice actual queda de respaldo)"""
+        with self._lock:
+            self._vence_en = 0.0
+
+    def _vencido(self):
+        return self._indices is None or time.monotonic() >= self._vence_en
+
+    def _vigentes(self):
+        """Retorna los índices vigentes, recargando si es necesario"""
+        with self._lock:
+            indices = self._indices
+            vencido = self._vencido()
+        if vencido:
+            # Una sola recarga a la vez; los demás esperan y usan la nueva
+            with self._recarga:
+                with self._lock:
+                    vencido = self._vencido()
+                if vencido:
+                    try:
+                        self.recargar()
+                    except Exception:
+                        if indices is None:
+                            raise
+                        logger.warning('No se pudo recargar el catálogo, se sirve el anterior', exc_info=True)
+                        with self._lock:
+                            self._vence_en = time.monotonic() + REINTENTO_RECARGA
+            with self._lock:
+                indices = self._indices
+        return indices
+
+    def _obtener(self, indice, clave):
+        return self._vigentes()[indice].get(clave)
+
+    def servicio(self, codigo):
+        return self._obtener('servicio_codigo', codigo.upper())
+
+    def servicio_por_id(self, id_servicio):
+        return self._obtener('servicio_id', id_servicio)
+
+    def proveedor(self, codigo):
+        return self._obtener('proveedor_codigo', codigo.upper())
+
+    def proveedor_por_id(self, id_proveedor):
+        return self._obtener('proveedor_id', id_proveedor)
+
+    def tipo(self, codigo):
+        return self._obtener('tipo_codigo', codigo.upper())
+
+    def estado(self):
+        with self._lock:
+            cargado = self._indices is not None
+            return {
+                'cargado': cargado,
+                'servicios': len(self._indices['servicio_id']) if cargado else 0,
+                'proveedores': len(self._indices['proveedor_id']) if cargado else 0,
+                'edad_segundos': round(time.monotonic() - self._cargado_en, 1) if cargado else None,
+                'ttl': self.ttl
+            }
+
+
+catalogo = Catalogo()
+
+
+def init_app(app):
+    """Configura el TTL y precarga el catálogo"""
+    catalogo.ttl = app.config.get('CATALOGO_TTL', 300)
+    catalogo.invalidar()
+
+    try:
+        with app.app_context():
+            catalogo.recargar()
+    except Exception as e:
+        app.logger.warning(f'No se pudo precargar el catálogo de servicios: {e}')
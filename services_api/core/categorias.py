@@ -0,0 +1,83 @@
+"""
+Resolución de categoría → proveedores → servicios en una sola consulta
+
+Los listados por categoría consultaban TipoServicio, luego los proveedores y
+luego los servicios de cada proveedor (más las cargas perezosas de
+proveedor/tipo al serializar). Aquí se resuelve todo con JOINs y las
+relaciones quedan cargadas para to_dict().
+"""
+
+from sqlalchemy import and_
+from sqlalchemy.orm import contains_eager
+
+from extensions import db
+from models.tipo_servicio import TipoServicio
+from models.proveedor import ProveedorServicio
+from models.servicio import Servicio
+
+
+def consultar_servicios(categoria=None, proveedor=None, codigos=None, solo_activos=True):
+    """
+    Servicios filtrados por categoría, proveedor y/o lista de códigos, con
+    proveedor y tipo cargados (listos para to_dict(include_proveedor=True)).
+    Con `solo_activos` se excluyen servicios y proveedores inactivos.
+    """
+    query = Servicio.query.join(Servicio.proveedor).join(ProveedorServicio.tipo).options(
+        contains_eager(Servicio.proveedor).contains_eager(ProveedorServicio.tipo)
+    )
+
+    if categoria:
+        query = query.filter(TipoServicio.codigo == categoria.upper())
+    if proveedor:
+        query = query.filter(ProveedorServicio.codigo == proveedor.upper())
+    if codigos:
+        query = query.filter(Servicio.codigo.in_(codigos))
+    if solo_activos:
+        query = query.filter(Servicio.activo.is_(True), ProveedorServicio.activo.is_(True))
+
+    return query.order_by(ProveedorServicio.id_proveedor, Servicio.id_servicio).all()
+
+
+def consultar_proveedores(categoria=None, solo_activos=True):
+    """Proveedores (opcionalmente de una categoría) con su tipo cargado"""
+    query = ProveedorServicio.query.join(ProveedorServicio.tipo).options(
+        contains_eager(ProveedorServicio.tipo)
+    )
+
+    if categoria:
+        query = query.filter(TipoServicio.codigo == categoria.upper())
+    if solo_activos:
+        query = query.filter(ProveedorServicio.activo.is_(True))
+
+    return query.order_by(ProveedorServicio.id_proveedor).all()
+
+
+def resolver_categoria(categoria):
+    """
+    Retorna (tipo, [(proveedor, servicios_activos)]) con todos los proveedores
+    de la categoría (activos o no), o None si la categoría no existe.
+    """
+    filas = db.session.query(TipoServicio, ProveedorServicio, Servicio).outerjoin(
+        ProveedorServicio, ProveedorServicio.id_tipo == TipoServicio.id_tipo
+    ).outerjoin(
+        Servicio, and_(
+            Servicio.id_proveedor == ProveedorServicio.id_proveedor,
+            Servicio.activo.is_(True)
+        )
+    ).filter(
+        TipoServicio.codigo == categoria.upper()
+    ).order_by(ProveedorServicio.id_proveedor, Servicio.id_servicio).all()
+
+    if not filas:
+        return None
+
+    tipo = filas[0][0]
+    proveedores = {}
+    for _, proveedor, servicio in filas:
+        if proveedor is None:
+            continue
+        servicios = proveedores.setdefault(proveedor, [])
+        if servicio is not None:
+            servicios.append(servicio)
+
+    return tipo, list(proveedores.items())
@@ -0,0 +1,291 @@
+"""
+Outbox de débitos de pagos de servicios
+
+Un pago con id_cuenta queda PENDIENTE y, en la misma transacción, se inserta
+su fila en OUTBOX_PAGO. Así registrar el pago no depende de que el backend
+esté disponible. El worker toma lotes de la outbox (SELECT ... FOR UPDATE
+SKIP LOCKED, de modo que varios workers no se pisan), los envía al backend en
+un solo POST /api/transacciones/debitos/lote y completa cada pago con su
+id_transaccion o lo marca FALLIDO (saldo insuficiente, cuenta inexistente).
+
+Estados del pago: PENDIENTE -> PROCESANDO -> COMPLETADO / FALLIDO.
+
+Si el backend no responde, el lote vuelve a PENDIENTE con espera exponencial
+hasta OUTBOX_MAX_INTENTOS. Una fila que quedó PROCESANDO (worker caído a
+mitad del envío) se vuelve a tomar pasado OUTBOX_PROCESANDO_TIMEOUT. El
+backend deduplica por referencia (comprobante), así reenviar un débito nunca
+lo aplica dos veces.
+"""
+
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+
+import requests
+from flask import current_app
+from sqlalchemy import and_, func, insert, or_, select, update
+
+from extensions import db
+from models.pago import PagoServicio
+from models.outbox import OutboxPago
+
+logger = logging.getLogger(__name__)
+
+RUTA_DEBITOS = '/api/transacciones/debitos/lote'
+
+# Conexión keep-alive reutilizada entre lotes
+_http = requests.Session()
+
+
+class EstadisticasOutbox:
+    """Contadores del worker, seguros entre hilos"""
+
+    CAMPOS = ('lotes', 'enviados', 'completados', 'fallidos', 'reintentos', 'errores_backend')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores = dict.fromkeys(self.CAMPOS, 0)
+
+    def registrar(self, campo, cantidad=1):
+        with self._lock:
+            self._valores[campo] += cantidad
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self._valores)
+
+
+estadisticas = EstadisticasOutbox()
+
+
+def encolar(pagos):
+    """
+    Inserta la fila de outbox de cada pago con cuenta.
+    Debe llamarse dentro de la transacción del pago, antes del commit.
+    """
+    filas = [{
+        'id_pago': pago.id_pago,
+        'id_cuenta': pago.id_cuenta,
+        'monto': pago.monto_total,
+        'referencia': pago.comprobante,
+        'descripcion': pago.detalle
+    } for pago in pagos if pago.id_cuenta is not None]
+
+    if filas:
+        db.session.execute(insert(OutboxPago), filas)
+
+
+def reclamar(limite):
+    """
+    Toma hasta `limite` débitos listos para enviar y los marca PROCESANDO
+    (junto con sus pagos). Retorna las filas reclamadas.
+    """
+    ahora = datetime.utcnow()
+    vencidas = ahora - timedelta(seconds=current_app.config.get('OUTBOX_PROCESANDO_TIMEOUT', 300))
+
+    ids = db.session.scalars(
+        select(OutboxPago.id_outbox).where(or_(
+            and_(OutboxPago.estado == OutboxPago.ESTADO_PENDIENTE,
+                 OutboxPago.fecha_proximo_intento <= ahora),
+            and_(OutboxPago.estado == OutboxPago.ESTADO_PROCESANDO,
+                 OutboxPago.fecha_actualizacion < vencidas)
+        )).order_by(
+            OutboxPago.fecha_proximo_intento, OutboxPago.id_outbox
+        ).limit(limite).with_for_update(skip_locked=True)
+    ).all()
+
+    if not ids:
+        db.session.rollback()
+        return []
+
+    filas = db.session.execute(
+        update(OutboxPago).where(OutboxPago.id_outbox.in_(ids)).values(
+            estado=OutboxPago.ESTADO_PROCESANDO,
+            intentos=OutboxPago.intentos + 1,
+            fecha_actualizacion=ahora
+        ).returning(
+            OutboxPago.id_outbox, OutboxPago.id_pago, OutboxPago.id_cuenta, OutboxPago.monto,
+            OutboxPago.referencia, OutboxPago.descripcion, OutboxPago.intentos
+        )
+    ).all()
+
+    db.session.execute(
+        update(PagoServicio).where(
+            PagoServicio.id_pago.in_([f.id_pago for f in filas])
+        ).values(estado=PagoServicio.ESTADO_PROCESANDO)
+    )
+    db.session.commit()
+    return sorted(filas, key=lambda f: f.id_outbox)
+
+
+def enviar(filas):
+    """POST del lote al backend. Retorna la lista de resultados por débito"""
+    respuesta = _http.post(
+        current_app.config['BACKEND_URL'].rstrip('/') + RUTA_DEBITOS,
+        json={'debitos': [{
+            'id_cuenta': f.id_cuenta,
+            'monto': str(f.monto),
+            'referencia': f.referencia,
+            'descripcion': f.descripcion or 'Pago de servicio'
+        } for f in filas]},
+        timeout=current_app.config.get('OUTBOX_TIMEOUT', 10)
+    )
+
+    datos = respuesta.json() if respuesta.content else {}
+    resultados = datos.get('data')
+    if respuesta.status_code != 200 or not isinstance(resultados, list) or len(resultados) != len(filas):
+        raise RuntimeError(datos.get('error') or f'Backend respondió HTTP {respuesta.status_code}')
+    return resultados
+
+
+def _espera(intentos):
+    """Espera exponencial con jitter antes del siguiente intento"""
+    base = current_app.config.get('OUTBOX_ESPERA_BASE', 5)
+    maxima = current_app.config.get('OUTBOX_ESPERA_MAX', 600)
+    return min(maxima, base * (2 ** (intentos - 1))) * random.uniform(0.5, 1.5)
+
+
+def _aplicar(filas, resultados):
+    """Completa o marca fallido cada pago según la respuesta del backend"""
+    ahora = datetime.utcnow()
+    outbox = []
+    pagos = []
+    for fila, resultado in zip(filas, resultados):
+        if resultado.get('success'):
+            outbox.append({
+                'id_outbox': fila.id_outbox, 'estado': OutboxPago.ESTADO_COMPLETADO,
+                'ultimo_error': None, 'fecha_actualizacion': ahora
+            })
+            pagos.append({
+                'id_pago': fila.id_pago, 'estado': PagoServicio.ESTADO_COMPLETADO,
+                'id_transaccion': resultado['id_transaccion']
+            })
+        else:
+            outbox.append({
+                'id_outbox': fila.id_outbox, 'estado': OutboxPago.ESTADO_FALLIDO,
+                'ultimo_error': str(resultado.get('error'))[:256], 'fecha_actualizacion': ahora
+            })
+            pagos.append({'id_pago': fila.id_pago, 'estado': PagoServicio.ESTADO_FALLIDO})
+
+    # UPDATE por clave primaria agrupado (executemany)
+    db.session.execute(update(OutboxPago), outbox)
+    db.session.execute(update(PagoServicio), pagos)
+    db.session.commit()
+
+    completados = sum(1 for p in pagos if p['estado'] == PagoServicio.ESTADO_COMPLETADO)
+    estadisticas.registrar('completados', completados)
+    estadisticas.registrar('fallidos', len(pagos) - completados)
+    return completados
+
+
+def _devolver(filas, error):
+    """El backend no procesó el lote: reprograma cada débito o lo da por fallido"""
+    ahora = datetime.utcnow()
+    maximo = current_app.config.get('OUTBOX_MAX_INTENTOS', 5)
+    mensaje = str(error)[:256]
+    outbox = []
+    pagos = []
+    for fila in filas:
+        agotado = fila.intentos >= maximo
+        outbox.append({
+            'id_outbox': fila.id_outbox,
+            'estado': OutboxPago.ESTADO_FALLIDO if agotado else OutboxPago.ESTADO_PENDIENTE,
+            'ultimo_error': mensaje,
+            'fecha_actualizacion': ahora,
+            'fecha_proximo_intento': ahora + timedelta(seconds=0 if agotado else _espera(fila.intentos))
+        })
+        pagos.append({
+            'id_pago': fila.id_pago,
+            'estado': PagoServicio.ESTADO_FALLIDO if agotado else PagoServicio.ESTADO_PENDIENTE
+        })
+
+    db.session.execute(update(OutboxPago), outbox)
+    db.session.execute(update(PagoServicio), pagos)
+    db.session.commit()
+
+    fallidos = sum(1 for p in pagos if p['estado'] == PagoServicio.ESTADO_FALLIDO)
+    estadisticas.registrar('fallidos', fallidos)
+    estadisticas.registrar('reintentos', len(pagos) - fallidos)
+
+
+def procesar_pendientes(limite=None):
+    """
+    Procesa un lote de la outbox. Retorna un resumen del lote
+    ({'procesados', 'completados', 'fallidos', 'reprogramados'}).
+    """
+    limite = limite or current_app.config.get('OUTBOX_LOTE', 100)
+    filas = reclamar(limite)
+    resumen = {'procesados': len(filas), 'completados': 0, 'fallidos': 0, 'reprogramados': 0}
+    if not filas:
+        return resumen
+
+    estadisticas.registrar('lotes')
+    estadisticas.registrar('enviados', len(filas))
+    try:
+        resultados = enviar(filas)
+    except (requests.RequestException, ValueError, RuntimeError) as e:
+        logger.warning('Outbox: lote de %s débitos no enviado: %s', len(filas), e)
+        estadisticas.registrar('errores_backend')
+        _devolver(filas, e)
+        maximo = current_app.config.get('OUTBOX_MAX_INTENTOS', 5)
+        resumen['fallidos'] = sum(1 for f in filas if f.intentos >= maximo)
+        resumen['reprogramados'] = len(filas) - resumen['fallidos']
+        return resumen
+
+    resumen['completados'] = _aplicar(filas, resultados)
+    resumen['fallidos'] = len(filas) - resumen['completados']
+    return resumen
+
+
+def procesar_todo(limite=None):
+    """Procesa lotes hasta vaciar lo que está listo para enviar. Retorna el resumen acumulado"""
+    total = {'procesados': 0, 'completados': 0, 'fallidos': 0, 'reprogramados': 0}
+    while True:
+        resumen = procesar_pendientes(limite)
+        for campo in total:
+            total[campo] += resumen[campo]
+        # Un lote reprogramado significa backend caído: esperar al siguiente ciclo
+        if not resumen['procesados'] or resumen['reprogramados']:
+            return total
+
+
+def contar_por_estado():
+    """Cantidad de filas de la outbox por estado"""
+    filas = db.session.execute(
+        select(OutboxPago.estado, func.count()).group_by(OutboxPago.estado)
+    ).all()
+    conteos = dict.fromkeys((
+        OutboxPago.ESTADO_PENDIENTE, OutboxPago.ESTADO_PROCESANDO,
+        OutboxPago.ESTADO_COMPLETADO, OutboxPago.ESTADO_FALLIDO
+    ), 0)
+    conteos.update({estado: cantidad for estado, cantidad in filas})
+    return conteos
+
+
+def _bucle(app, intervalo, detener):
+    while not detener.is_set():
+        with app.app_context():
+            try:
+                procesar_todo()
+            except Exception:
+                db.session.rollback()
+                logger.exception('Outbox: error procesando débitos')
+        detener.wait(intervalo)
+
+
+def iniciar_worker(app):
+    """Lanza el worker en un hilo daemon. Retorna el Event que lo detiene"""
+    detener = threading.Event()
+    hilo = threading.Thread(
+        target=_bucle, args=(app, app.config.get('OUTBOX_INTERVALO', 2), detener),
+        name='outbox-pagos', daemon=True
+    )
+    hilo.start()
+    return detener
+
+
+def init_app(app):
+    """Inicia el worker dentro del proceso si OUTBOX_WORKER está activo"""
+    if app.config.get('OUTBOX_WORKER'):
+        app.extensions['outbox_worker'] = iniciar_worker(app)
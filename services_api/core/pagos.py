@@ -0,0 +1,135 @@
+"""
+Validación y registro de pagos de servicios (individuales y por lote)
+
+La validación usa el catálogo en memoria (core.catalogo), así que un lote
+de cientos de pagos no consulta la base por cada servicio. Los pagos válidos
+de un lote se insertan con un único INSERT ... RETURNING en una sola
+transacción.
+
+Un pago con id_cuenta queda PENDIENTE hasta que el backend aplica el débito
+(ver core.outbox); sin cuenta (API externa) se registra COMPLETADO.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import insert
+
+from extensions import db
+from models.pago import PagoServicio
+from core.catalogo import catalogo
+from core import outbox
+
+CAMPOS_REQUERIDOS = ('codigo_servicio', 'referencia', 'monto')
+
+
+class PagoError(Exception):
+    """Error de validación de un pago; `codigo` es el HTTP status sugerido"""
+
+    def __init__(self, mensaje, codigo=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.codigo = codigo
+
+
+def validar_pago(data, id_cuenta=None):
+    """
+    Valida un pago contra el catálogo y los límites del servicio.
+    `id_cuenta` es la cuenta por defecto (lote) si el pago no indica la suya.
+    Retorna (servicio, monto_base). Lanza PagoError.
+    """
+    if not isinstance(data, dict):
+        raise PagoError('Cada pago debe ser un objeto JSON')
+
+    for campo in CAMPOS_REQUERIDOS:
+        if campo not in data:
+            raise PagoError(f'Campo requerido: {campo}')
+
+    servicio = catalogo.servicio(str(data['codigo_servicio']))
+
+    if not servicio:
+        raise PagoError(f'Servicio "{data["codigo_servicio"]}" no encontrado', 404)
+
+    if not servicio.activo:
+        raise PagoError('Este servicio no está disponible actualmente')
+
+    try:
+        monto_base = Decimal(str(data['monto']))
+    except InvalidOperation:
+        raise PagoError('Monto inválido')
+
+    if not monto_base.is_finite() or monto_base <= 0:
+        raise PagoError('El monto debe ser mayor a cero')
+
+    if servicio.monto_minimo and monto_base < servicio.monto_minimo:
+        raise PagoError(f'Monto mínimo permitido: ${servicio.monto_minimo}')
+
+    if servicio.monto_maximo and monto_base > servicio.monto_maximo:
+        raise PagoError(f'Monto máximo permitido: ${servicio.monto_maximo}')
+    
+    id_cuenta = data.get('id_cuenta', id_cuenta)
+    if id_cuenta is not None:
+        try:
+            int(id_cuenta)
+        except (TypeError, ValueError):
+            raise PagoError('id_cuenta inválido')
+
+    return servicio, monto_base
+
+
+def valores_pago(servicio, monto_base, data, id_cuenta=None):
+    """Columnas del PagoServicio a insertar"""
+    comision = servicio.comision or Decimal('0')
+    id_cuenta = data.get('id_cuenta', id_cuenta)
+    return {
+        'id_servicio': servicio.id_servicio,
+        'id_cuenta': int(id_cuenta) if id_cuenta is not None else None,
+        'referencia_cliente': str(data['referencia']),
+        'monto_base': monto_base,
+        'comision': comision,
+        'monto_total': monto_base + comision,
+        # Con cuenta, el débito lo completa el worker de la outbox
+        'estado': PagoServicio.ESTADO_PENDIENTE if id_cuenta is not None else PagoServicio.ESTADO_COMPLETADO,
+        'comprobante': PagoServicio.generar_comprobante(),
+        'detalle': data.get('detalle', f'Pago de {servicio.nombre}')
+    }
+
+
+def procesar_lote(items, atomico=False, id_cuenta=None):
+    """
+    Registra un lote de pagos en una sola transacción.
+    Con `atomico=True` el lote completo se rechaza si algún item es inválido.
+    `id_cuenta` se usa para los items que no indican la suya.
+    Retorna resultados en el orden de `items`.
+    """
+    resultados = [None] * len(items)
+    validos = []
+
+    for indice, item in enumerate(items):
+        try:
+            servicio, monto_base = validar_pago(item, id_cuenta)
+            validos.append((indice, valores_pago(servicio, monto_base, item, id_cuenta)))
+        except PagoError as e:
+            resultados[indice] = {'indice': indice, 'success': False, 'error': e.mensaje}
+
+    if atomico and len(validos) < len(items):
+        for indice, _ in validos:
+            resultados[indice] = {'indice': indice, 'success': False, 'error': 'Lote rechazado'}
+        return resultados
+
+    if validos:
+        pagos = db.session.scalars(
+            insert(PagoServicio).returning(PagoServicio, sort_by_parameter_order=True),
+            [valores for _, valores in validos]
+        ).all()
+        outbox.encolar(pagos)
+
+        # Serializar antes del commit evita recargar cada fila después
+        for (indice, _), pago in zip(validos, pagos):
+            resultados[indice] = {
+                'indice': indice,
+                'success': True,
+                'data': pago.to_dict(include_servicio=True)
+            }
+        db.session.commit()
+
+    return resultados
@@ -0,0 +1,52 @@
+"""
+Modelo OutboxPago - Débitos pendientes de enviar al backend
+"""
+
+from extensions import db
+from datetime import datetime
+
+
+class OutboxPago(db.Model):
+    """Débito de un pago con cuenta, pendiente de aplicar en el backend (database/migrations/0004)"""
+    __tablename__ = 'outbox_pago'
+    
+    # Estados posibles
+    ESTADO_PENDIENTE = 'PENDIENTE'
+    ESTADO_PROCESANDO = 'PROCESANDO'
+    ESTADO_COMPLETADO = 'COMPLETADO'
+    ESTADO_FALLIDO = 'FALLIDO'
+    
+    id_outbox = db.Column(db.Integer, primary_key=True)
+    id_pago = db.Column(db.Integer, db.ForeignKey('pago_servicio.id_pago'), nullable=False, unique=True)
+    id_cuenta = db.Column(db.Integer, nullable=False)
+    monto = db.Column(db.Numeric(12, 2), nullable=False)
+    referencia = db.Column(db.String(50), nullable=False)
+    descripcion = db.Column(db.String(256))
+    estado = db.Column(db.String(20), default=ESTADO_PENDIENTE, nullable=False)
+    intentos = db.Column(db.Integer, default=0, nullable=False)
+    ultimo_error = db.Column(db.String(256))
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    fecha_proximo_intento = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.Index('idx_outbox_pendientes', fecha_proximo_intento, id_outbox,
+                 postgresql_where=estado.in_([ESTADO_PENDIENTE, ESTADO_PROCESANDO])),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id_outbox,
+            'id_pago': self.id_pago,
+            'id_cuenta': self.id_cuenta,
+            'monto': float(self.monto),
+            'referencia': self.referencia,
+            'estado': self.estado,
+            'intentos': self.intentos,
+            'ultimo_error': self.ultimo_error,
+            'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
+            'fecha_proximo_intento': self.fecha_proximo_intento.isoformat() if self.fecha_proximo_intento else None
+        }
+    
+    def __repr__(self):
+        return f'<OutboxPago {self.referencia} {self.estado}>'
@@ -3,6 +3,7 @@ Modelo PagoServicio - Registro de pagos realizados
 """
 
 from extensions import db
+from core.catalogo import catalogo
 from datetime import datetime
 import uuid
 
@@ -55,20 +56,25 @@ class PagoServicio(db.Model):
             'id_transaccion': self.id_transaccion
         }
         
-        if include_servicio and self.servicio:
+        # El servicio (con proveedor y tipo) sale del catálogo en memoria
+        servicio = None
+        if include_servicio:
+            servicio = catalogo.servicio_por_id(self.id_servicio) or self.servicio
+        
+        if servicio:
             data['servicio'] = {
-                'codigo': self.servicio.codigo,
-                'nombre': self.servicio.nombre
+                'codigo': servicio.codigo,
+                'nombre': servicio.nombre
             }
-            if self.servicio.proveedor:
+            if servicio.proveedor:
                 data['proveedor'] = {
-                    'codigo': self.servicio.proveedor.codigo,
-                    'nombre': self.servicio.proveedor.nombre
+                    'codigo': servicio.proveedor.codigo,
+                    'nombre': servicio.proveedor.nombre
                 }
-                if self.servicio.proveedor.tipo:
+                if servicio.proveedor.tipo:
                     data['tipo_servicio'] = {
-                        'codigo': self.servicio.proveedor.tipo.codigo,
-                        'nombre': self.servicio.proveedor.tipo.nombre
+                        'codigo': servicio.proveedor.tipo.codigo,
+                        'nombre': servicio.proveedor.tipo.nombre
                     }
         
         return data
@@ -22,7 +22,7 @@ class ProveedorServicio(db.Model):
     # Relación con servicios
     servicios = db.relationship('Servicio', backref='proveedor', lazy='dynamic')
     
-    def to_dict(self, include_tipo=False, include_servicios=False):
+    def to_dict(self, include_tipo=False, include_servicios=False, servicios=None):
         """Serializar a diccionario"""
         data = {
             'id': self.id_proveedor,
@@ -43,7 +43,10 @@ class ProveedorServicio(db.Model):
             }
         
         if include_servicios:
-            data['servicios'] = [s.to_dict() for s in self.servicios.filter_by(activo=True)]
+            # `servicios` permite pasar los servicios activos ya cargados
+            if servicios is None:
+                servicios = self.servicios.filter_by(activo=True)
+            data['servicios'] = [s.to_dict() for s in servicios]
             data['cantidad_servicios'] = len(data['servicios'])
         
         return data
@@ -3,6 +3,7 @@ Modelo TipoServicio - Categorías de servicios
 """
 
 from extensions import db
+from sqlalchemy import func
 
 
 class TipoServicio(db.Model):
@@ -20,8 +21,30 @@ class TipoServicio(db.Model):
     # Relación con proveedores
     proveedores = db.relationship('ProveedorServicio', backref='tipo', lazy='dynamic')
     
-    def to_dict(self):
+    @staticmethod
+    def listar_con_conteo(solo_activos=True):
+        """
+        Retorna [(tipo, cantidad_proveedores)] en una sola consulta
+        (LEFT JOIN + GROUP BY) en lugar de un COUNT por categoría
+        """
+        from models.proveedor import ProveedorServicio
+        
+        query = db.session.query(
+            TipoServicio, func.count(ProveedorServicio.id_proveedor)
+        ).outerjoin(
+            ProveedorServicio, ProveedorServicio.id_tipo == TipoServicio.id_tipo
+        ).group_by(TipoServicio.id_tipo)
+        
+        if solo_activos:
+            query = query.filter(TipoServicio.activo.is_(True))
+        
+        return query.order_by(TipoServicio.orden).all()
+    
+    def to_dict(self, cantidad_proveedores=None):
         """Serializar a diccionario"""
+        if cantidad_proveedores is None:
+            cantidad_proveedores = self.proveedores.count()
+        
         return {
             'id': self.id_tipo,
             'codigo': self.codigo,
@@ -30,7 +53,7 @@ class TipoServicio(db.Model):
             'icono': self.icono,
             'activo': self.activo,
             'orden': self.orden,
-            'cantidad_proveedores': self.proveedores.count()
+            'cantidad_proveedores': cantidad_proveedores
         }
     
     def __repr__(self):
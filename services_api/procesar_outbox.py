@@ -0,0 +1,50 @@
+"""
+Worker de la outbox de débitos de pagos de servicios
+Envía al backend (BACKEND_URL) los débitos de los pagos con cuenta y
+completa cada pago con su id_transaccion. Se pueden correr varios workers a
+la vez: cada lote se reclama con FOR UPDATE SKIP LOCKED.
+
+Ejecutar:
+    python procesar_outbox.py               # Bucle continuo cada OUTBOX_INTERVALO segundos
+    python procesar_outbox.py --una-vez     # Vacía lo pendiente y termina
+    python procesar_outbox.py --estado      # Muestra la outbox por estado
+"""
+
+import argparse
+import time
+
+from app import create_app
+from core import outbox
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Worker de la outbox de débitos')
+    parser.add_argument('--una-vez', action='store_true', help='Procesar lo pendiente y terminar')
+    parser.add_argument('--estado', action='store_true', help='Mostrar la outbox por estado y terminar')
+    parser.add_argument('--intervalo', type=float, help='Segundos entre ciclos (por defecto OUTBOX_INTERVALO)')
+    parser.add_argument('--lote', type=int, help='Débitos por envío (por defecto OUTBOX_LOTE)')
+    args = parser.parse_args()
+
+    app = create_app('production')
+
+    with app.app_context():
+        if args.estado:
+            for estado, cantidad in outbox.contar_por_estado().items():
+                print(f"  {estado:<12} {cantidad:>8}")
+            return
+
+        intervalo = args.intervalo or app.config.get('OUTBOX_INTERVALO', 2)
+        print(f"📤 Outbox de débitos -> {app.config['BACKEND_URL']}")
+
+        while True:
+            resumen = outbox.procesar_todo(args.lote)
+            if resumen['procesados']:
+                print(f"  {resumen['procesados']} débitos: {resumen['completados']} completados, "
+                      f"{resumen['fallidos']} fallidos, {resumen['reprogramados']} reprogramados")
+            if args.una_vez:
+                return
+            time.sleep(intervalo)
+
+
+if __name__ == '__main__':
+    main()
@@ -8,9 +8,10 @@ GET /api/v1/impuestos/consultar - Consultar deuda de impuestos
 from flask import Blueprint, jsonify, request
 from extensions import db
 from models.pago import PagoServicio
-from models.servicio import Servicio
-from models.proveedor import ProveedorServicio
-from models.tipo_servicio import TipoServicio
+from core.catalogo import catalogo
+from core.pagos import valores_pago
+from core import outbox
+from core.categorias import consultar_servicios
 from decimal import Decimal
 import random
 
@@ -19,15 +20,7 @@ impuestos_bp = Blueprint('impuestos', __name__)
 
 def _obtener_servicios_impuestos():
     """Obtiene todos los servicios de la categoría IMPUESTOS"""
-    tipo = TipoServicio.query.filter_by(codigo='IMPUESTOS').first()
-    if not tipo:
-        return []
-    
-    proveedores = ProveedorServicio.query.filter_by(id_tipo=tipo.id_tipo, activo=True).all()
-    servicios = []
-    for prov in proveedores:
-        servicios.extend(Servicio.query.filter_by(id_proveedor=prov.id_proveedor, activo=True).all())
-    return servicios
+    return consultar_servicios(categoria='IMPUESTOS')
 
 
 @impuestos_bp.route('', methods=['GET'])
@@ -76,7 +69,7 @@ def consultar_impuesto():
                 'error': f'Tipo no válido. Opciones: {", ".join(codigo_map.keys())}'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo=codigo_map[tipo]).first()
+        servicio = catalogo.servicio(codigo_map[tipo])
         
         if not servicio:
             return jsonify({
@@ -124,7 +117,7 @@ def pagar_predial():
                 'error': 'Se requiere numero_predio y monto'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo='QUITO_PREDIAL').first()
+        servicio = catalogo.servicio('QUITO_PREDIAL')
         
         if not servicio:
             return jsonify({
@@ -133,30 +126,28 @@ def pagar_predial():
             }), 404
         
         monto_base = Decimal(str(data['monto']))
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
-        
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=data['numero_predio'],
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
+        
+        # Con id_cuenta queda PENDIENTE hasta que la outbox aplica el débito
+        pago = PagoServicio(**valores_pago(servicio, monto_base, dict(
+            data,
+            referencia=data['numero_predio'],
             detalle=f'Pago Impuesto Predial - Predio: {data["numero_predio"]}'
-        )
+        )))
         
         db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Impuesto predial pagado exitosamente',
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Impuesto predial pagado exitosamente',
             'data': pago.to_dict(include_servicio=True)
         }), 201
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -177,7 +168,7 @@ def pagar_municipal():
                 'error': 'Se requiere ruc_cedula y monto'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo='QUITO_PATENTE').first()
+        servicio = catalogo.servicio('QUITO_PATENTE')
         
         if not servicio:
             return jsonify({
@@ -186,30 +177,28 @@ def pagar_municipal():
             }), 404
         
         monto_base = Decimal(str(data['monto']))
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
-        
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=data['ruc_cedula'],
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
+        
+        # Con id_cuenta queda PENDIENTE hasta que la outbox aplica el débito
+        pago = PagoServicio(**valores_pago(servicio, monto_base, dict(
+            data,
+            referencia=data['ruc_cedula'],
             detalle=f'Pago Patente Municipal - RUC/Cédula: {data["ruc_cedula"]}'
-        )
+        )))
         
         db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Patente municipal pagada exitosamente',
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Patente municipal pagada exitosamente',
             'data': pago.to_dict(include_servicio=True)
         }), 201
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -7,7 +7,10 @@ GET /api/v1/matricula/consultar - Consultar valor de matrícula
 from flask import Blueprint, jsonify, request
 from extensions import db
 from models.pago import PagoServicio
-from models.servicio import Servicio
+from core.catalogo import catalogo
+from core.pagos import valores_pago
+from core import outbox
+from core.categorias import consultar_servicios
 from decimal import Decimal
 import random
 
@@ -18,9 +21,9 @@ matricula_bp = Blueprint('matricula', __name__)
 def listar_servicios_matricula():
     """Lista servicios de matrícula vehicular disponibles"""
     try:
-        servicios = Servicio.query.filter(
-            Servicio.codigo.in_(['MATRICULA_VEHICULAR', 'IMP_VEHICULAR'])
-        ).all()
+        servicios = consultar_servicios(
+            codigos=['MATRICULA_VEHICULAR', 'IMP_VEHICULAR'], solo_activos=False
+        )
         
         return jsonify({
             'success': True,
@@ -53,8 +56,8 @@ def consultar_matricula():
         valor_matricula = round(random.uniform(80.00, 350.00), 2)
         impuesto_vehicular = round(random.uniform(20.00, 150.00), 2)
         
-        servicio_matricula = Servicio.query.filter_by(codigo='MATRICULA_VEHICULAR').first()
-        servicio_impuesto = Servicio.query.filter_by(codigo='IMP_VEHICULAR').first()
+        servicio_matricula = catalogo.servicio('MATRICULA_VEHICULAR')
+        servicio_impuesto = catalogo.servicio('IMP_VEHICULAR')
         
         comision_matricula = float(servicio_matricula.comision) if servicio_matricula else 1.00
         
@@ -104,7 +107,7 @@ def pagar_matricula():
                 'error': 'Se requiere placa y monto'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo='MATRICULA_VEHICULAR').first()
+        servicio = catalogo.servicio('MATRICULA_VEHICULAR')
         
         if not servicio:
             return jsonify({
@@ -114,30 +117,28 @@ def pagar_matricula():
         
         placa = data['placa'].upper().replace(' ', '-')
         monto_base = Decimal(str(data['monto']))
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
-        
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=placa,
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
+        
+        # Con id_cuenta queda PENDIENTE hasta que la outbox aplica el débito
+        pago = PagoServicio(**valores_pago(servicio, monto_base, dict(
+            data,
+            referencia=placa,
             detalle=f'Pago Matrícula Vehicular - Placa: {placa}'
-        )
+        )))
         
         db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Matrícula vehicular pagada exitosamente',
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Matrícula vehicular pagada exitosamente',
             'data': pago.to_dict(include_servicio=True)
         }), 201
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -158,7 +159,7 @@ def pagar_impuesto_vehicular():
                 'error': 'Se requiere placa y monto'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo='IMP_VEHICULAR').first()
+        servicio = catalogo.servicio('IMP_VEHICULAR')
         
         if not servicio:
             return jsonify({
@@ -168,30 +169,28 @@ def pagar_impuesto_vehicular():
         
         placa = data['placa'].upper().replace(' ', '-')
         monto_base = Decimal(str(data['monto']))
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
-        
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=placa,
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
+        
+        # Con id_cuenta queda PENDIENTE hasta que la outbox aplica el débito
+        pago = PagoServicio(**valores_pago(servicio, monto_base, dict(
+            data,
+            referencia=placa,
             detalle=f'Pago Impuesto Vehicular - Placa: {placa}'
-        )
+        )))
         
         db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Impuesto vehicular pagado exitosamente',
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Impuesto vehicular pagado exitosamente',
             'data': pago.to_dict(include_servicio=True)
         }), 201
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -9,7 +9,10 @@ GET /api/v1/multas/consultar - Consultar multas pendientes
 from flask import Blueprint, jsonify, request
 from extensions import db
 from models.pago import PagoServicio
-from models.servicio import Servicio
+from core.catalogo import catalogo
+from core.pagos import valores_pago
+from core import outbox
+from core.categorias import consultar_servicios
 from decimal import Decimal
 import random
 
@@ -20,12 +23,10 @@ multas_bp = Blueprint('multas', __name__)
 def listar_servicios_multas():
     """Lista servicios de multas disponibles"""
     try:
-        servicios = Servicio.query.filter(
-            Servicio.codigo.in_([
-                'ANT_MULTA_TRANSITO', 'AMT_CITACION',
-                'CNT_FACTURA', 'CLARO_FACTURA', 'MOVISTAR_FACTURA'
-            ])
-        ).all()
+        servicios = consultar_servicios(codigos=[
+            'ANT_MULTA_TRANSITO', 'AMT_CITACION',
+            'CNT_FACTURA', 'CLARO_FACTURA', 'MOVISTAR_FACTURA'
+        ], solo_activos=False)
         
         return jsonify({
             'success': True,
@@ -68,7 +69,7 @@ def consultar_multas():
                 'error': f'Tipo no válido. Opciones: {", ".join(codigo_map.keys())}'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo=codigo_map[tipo]).first()
+        servicio = catalogo.servicio(codigo_map[tipo])
         
         if not servicio:
             return jsonify({
@@ -152,7 +153,7 @@ def pagar_multa_ant():
                 'error': 'Se requiere cedula_placa y monto'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo='ANT_MULTA_TRANSITO').first()
+        servicio = catalogo.servicio('ANT_MULTA_TRANSITO')
         
         if not servicio:
             return jsonify({
@@ -161,30 +162,28 @@ def pagar_multa_ant():
             }), 404
         
         monto_base = Decimal(str(data['monto']))
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
-        
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=data['cedula_placa'],
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
+        
+        # Con id_cuenta queda PENDIENTE hasta que la outbox aplica el débito
+        pago = PagoServicio(**valores_pago(servicio, monto_base, dict(
+            data,
+            referencia=data['cedula_placa'],
             detalle=f'Pago Multa ANT - Ref: {data["cedula_placa"]}'
-        )
+        )))
         
         db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Multa ANT pagada exitosamente',
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Multa ANT pagada exitosamente',
             'data': pago.to_dict(include_servicio=True)
         }), 201
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -205,7 +204,7 @@ def pagar_cnt():
                 'error': 'Se requiere numero_telefono y monto'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo='CNT_FACTURA').first()
+        servicio = catalogo.servicio('CNT_FACTURA')
         
         if not servicio:
             return jsonify({
@@ -214,30 +213,28 @@ def pagar_cnt():
             }), 404
         
         monto_base = Decimal(str(data['monto']))
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
-        
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=data['numero_telefono'],
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
+        
+        # Con id_cuenta queda PENDIENTE hasta que la outbox aplica el débito
+        pago = PagoServicio(**valores_pago(servicio, monto_base, dict(
+            data,
+            referencia=data['numero_telefono'],
             detalle=f'Pago Factura CNT - Tel: {data["numero_telefono"]}'
-        )
+        )))
         
         db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Factura CNT pagada exitosamente',
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Factura CNT pagada exitosamente',
             'data': pago.to_dict(include_servicio=True)
         }), 201
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -258,7 +255,7 @@ def pagar_claro():
                 'error': 'Se requiere numero_linea y monto'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo='CLARO_FACTURA').first()
+        servicio = catalogo.servicio('CLARO_FACTURA')
         
         if not servicio:
             return jsonify({
@@ -267,30 +264,28 @@ def pagar_claro():
             }), 404
         
         monto_base = Decimal(str(data['monto']))
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
-        
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=data['numero_linea'],
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
+        
+        # Con id_cuenta queda PENDIENTE hasta que la outbox aplica el débito
+        pago = PagoServicio(**valores_pago(servicio, monto_base, dict(
+            data,
+            referencia=data['numero_linea'],
             detalle=f'Pago Factura Claro - Línea: {data["numero_linea"]}'
-        )
+        )))
         
         db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Factura Claro pagada exitosamente',
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Factura Claro pagada exitosamente',
             'data': pago.to_dict(include_servicio=True)
         }), 201
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
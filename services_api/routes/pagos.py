@@ -3,14 +3,18 @@ Rutas para Pagos de Servicios
 GET /api/v1/pagos - Lista historial de pagos
 GET /api/v1/pagos/<id> - Obtiene detalle de un pago
 POST /api/v1/pagos - Procesa un nuevo pago
+POST /api/v1/pagos/lote - Procesa un lote de pagos en una sola transacción
+GET /api/v1/pagos/outbox - Estado de la outbox de débitos al backend
+POST /api/v1/pagos/outbox/procesar - Envía al backend los débitos pendientes
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from extensions import db
 from models.pago import PagoServicio
-from models.servicio import Servicio
+from core.pagos import PagoError, validar_pago, valores_pago, procesar_lote
+from comun.idempotencia import idempotente
+from core import outbox
 from datetime import datetime
-from decimal import Decimal
 
 pagos_bp = Blueprint('pagos', __name__)
 
@@ -92,6 +96,7 @@ def obtener_por_comprobante(comprobante):
 
 
 @pagos_bp.route('', methods=['POST'])
+@idempotente('servicios:pagos')
 def procesar_pago():
     """
     Procesa un nuevo pago de servicio
@@ -114,73 +119,122 @@ def procesar_pago():
                 'error': 'Se requiere un cuerpo JSON'
             }), 400
         
-        # Validar campos requeridos
-        campos_requeridos = ['codigo_servicio', 'referencia', 'monto']
-        for campo in campos_requeridos:
-            if campo not in data:
-                return jsonify({
-                    'success': False,
-                    'error': f'Campo requerido: {campo}'
-                }), 400
+        servicio, monto_base = validar_pago(data)
         
-        # Buscar servicio
-        servicio = Servicio.query.filter_by(codigo=data['codigo_servicio'].upper()).first()
+        # Crear registro de pago
+        pago = PagoServicio(**valores_pago(servicio, monto_base, data))
         
-        if not servicio:
-            return jsonify({
-                'success': False,
-                'error': f'Servicio "{data["codigo_servicio"]}" no encontrado'
-            }), 404
+        db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Pago procesado exitosamente',
+            'data': pago.to_dict(include_servicio=True)
+        }), 201
+        
+    except PagoError as e:
+        return jsonify({'success': False, 'error': e.mensaje}), e.codigo
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@pagos_bp.route('/lote', methods=['POST'])
+@idempotente('servicios:pagos_lote')
+def procesar_pagos_lote():
+    """
+    Procesa un lote de pagos de servicios (empresas que pagan cientos de planillas)
+    
+    Body JSON:
+    {
+        "pagos": [
+            { "codigo_servicio": "EEQ_LUZ", "referencia": "123456789", "monto": 45.50, "detalle": "..." },
+            ...
+        ],
+        "id_cuenta": 1,  (opcional: cuenta por defecto de los pagos)
+        "atomico": false  (opcional: rechaza todo el lote si algún pago es inválido)
+    }
+    """
+    try:
+        data = request.get_json()
         
-        if not servicio.activo:
+        if not data or not isinstance(data.get('pagos'), list):
             return jsonify({
                 'success': False,
-                'error': 'Este servicio no está disponible actualmente'
+                'error': 'Se requiere la lista pagos'
             }), 400
         
-        # Validar monto
-        monto_base = Decimal(str(data['monto']))
+        items = data['pagos']
+        maximo = current_app.config.get('PAGOS_LOTE_MAX', 1000)
         
-        if servicio.monto_minimo and monto_base < servicio.monto_minimo:
+        if not items:
             return jsonify({
                 'success': False,
-                'error': f'Monto mínimo permitido: ${servicio.monto_minimo}'
+                'error': 'El lote está vacío'
             }), 400
         
-        if servicio.monto_maximo and monto_base > servicio.monto_maximo:
+        if len(items) > maximo:
             return jsonify({
                 'success': False,
-                'error': f'Monto máximo permitido: ${servicio.monto_maximo}'
+                'error': f'El lote excede el máximo de {maximo} pagos'
             }), 400
         
-        # Calcular comisión y total
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
+        atomico = data.get('atomico', False)
+        if not isinstance(atomico, bool):
+            return jsonify({
+                'success': False,
+                'error': 'atomico debe ser true o false'
+            }), 400
         
-        # Crear registro de pago
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=data['referencia'],
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
-            detalle=data.get('detalle', f'Pago de {servicio.nombre}')
-        )
+        resultados = procesar_lote(items, atomico, data.get('id_cuenta'))
+        exitosos = [r for r in resultados if r['success']]
         
-        db.session.add(pago)
-        db.session.commit()
+        return jsonify({
+            'success': len(exitosos) == len(resultados),
+            'message': f'{len(exitosos)} de {len(resultados)} pagos procesados',
+            'data': resultados,
+            'resumen': {
+                'total': len(resultados),
+                'exitosos': len(exitosos),
+                'fallidos': len(resultados) - len(exitosos),
+                'monto_total': round(sum(r['data']['monto_total'] for r in exitosos), 2)
+            }
+        }), 201 if exitosos else 400
         
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@pagos_bp.route('/outbox', methods=['GET'])
+def estado_outbox():
+    """Débitos de la outbox por estado y contadores del worker"""
+    try:
         return jsonify({
             'success': True,
-            'message': 'Pago procesado exitosamente',
-            'data': pago.to_dict(include_servicio=True)
-        }), 201
-        
-    except ValueError as e:
-        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
+            'data': {
+                'estados': outbox.contar_por_estado(),
+                'worker': outbox.estadisticas.to_dict()
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@pagos_bp.route('/outbox/procesar', methods=['POST'])
+def procesar_outbox():
+    """Procesa ahora los débitos listos para enviar (sin esperar al worker)"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': outbox.procesar_todo()
+        })
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
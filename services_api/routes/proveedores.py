@@ -7,29 +7,21 @@ GET /api/v1/proveedores/categoria/<categoria> - Lista proveedores por categoría
 
 from flask import Blueprint, jsonify, request
 from models.proveedor import ProveedorServicio
-from models.tipo_servicio import TipoServicio
+from core.categorias import consultar_proveedores, resolver_categoria
+from core.cache_respuestas import cache_respuesta
 
 proveedores_bp = Blueprint('proveedores', __name__)
 
 
 @proveedores_bp.route('', methods=['GET'])
+@cache_respuesta('proveedores')
 def listar_proveedores():
     """Lista todos los proveedores de servicios"""
     try:
         solo_activos = request.args.get('activos', 'true').lower() == 'true'
         categoria = request.args.get('categoria')
         
-        query = ProveedorServicio.query
-        
-        if solo_activos:
-            query = query.filter_by(activo=True)
-        
-        if categoria:
-            tipo = TipoServicio.query.filter_by(codigo=categoria.upper()).first()
-            if tipo:
-                query = query.filter_by(id_tipo=tipo.id_tipo)
-        
-        proveedores = query.all()
+        proveedores = consultar_proveedores(categoria, solo_activos)
         
         return jsonify({
             'success': True,
@@ -63,29 +55,26 @@ def obtener_proveedor(codigo):
 
 
 @proveedores_bp.route('/categoria/<string:categoria>', methods=['GET'])
+@cache_respuesta('proveedores_categoria')
 def listar_por_categoria(categoria):
     """Lista proveedores por categoría (IMPUESTOS, MATRICULA, MULTAS, SERVICIOS)"""
     try:
-        tipo = TipoServicio.query.filter_by(codigo=categoria.upper()).first()
+        resultado = resolver_categoria(categoria)
         
-        if not tipo:
+        if not resultado:
             return jsonify({
                 'success': False,
                 'error': f'Categoría "{categoria}" no encontrada. Categorías válidas: IMPUESTOS, MATRICULA, MULTAS, SERVICIOS'
             }), 404
         
+        tipo, todos = resultado
         solo_activos = request.args.get('activos', 'true').lower() == 'true'
-        query = ProveedorServicio.query.filter_by(id_tipo=tipo.id_tipo)
-        
-        if solo_activos:
-            query = query.filter_by(activo=True)
-        
-        proveedores = query.all()
+        proveedores = [(p, s) for p, s in todos if p.activo or not solo_activos]
         
         return jsonify({
             'success': True,
-            'categoria': tipo.to_dict(),
-            'data': [p.to_dict(include_servicios=True) for p in proveedores],
+            'categoria': tipo.to_dict(cantidad_proveedores=len(todos)),
+            'data': [p.to_dict(include_servicios=True, servicios=s) for p, s in proveedores],
             'total': len(proveedores)
         })
     except Exception as e:
@@ -3,35 +3,28 @@ Rutas para Servicios
 GET /api/v1/servicios - Lista todos los servicios
 GET /api/v1/servicios/<codigo> - Obtiene un servicio por código
 POST /api/v1/servicios/consultar - Consulta deuda por referencia
+POST /api/v1/servicios/catalogo/invalidar - Recarga el catálogo en memoria
 """
 
 from flask import Blueprint, jsonify, request
-from models.servicio import Servicio
-from models.proveedor import ProveedorServicio
+from core.catalogo import catalogo
+from core.categorias import consultar_servicios
+from core import cache_respuestas
+from core.cache_respuestas import cache_respuesta
 import random
-from decimal import Decimal
 
 servicios_bp = Blueprint('servicios', __name__)
 
 
 @servicios_bp.route('', methods=['GET'])
+@cache_respuesta('servicios')
 def listar_servicios():
     """Lista todos los servicios disponibles"""
     try:
         solo_activos = request.args.get('activos', 'true').lower() == 'true'
         proveedor = request.args.get('proveedor')
         
-        query = Servicio.query
-        
-        if solo_activos:
-            query = query.filter_by(activo=True)
-        
-        if proveedor:
-            prov = ProveedorServicio.query.filter_by(codigo=proveedor.upper()).first()
-            if prov:
-                query = query.filter_by(id_proveedor=prov.id_proveedor)
-        
-        servicios = query.all()
+        servicios = consultar_servicios(proveedor=proveedor, solo_activos=solo_activos)
         
         return jsonify({
             'success': True,
@@ -46,7 +39,7 @@ def listar_servicios():
 def obtener_servicio(codigo):
     """Obtiene un servicio por su código"""
     try:
-        servicio = Servicio.query.filter_by(codigo=codigo.upper()).first()
+        servicio = catalogo.servicio(codigo)
         
         if not servicio:
             return jsonify({
@@ -89,7 +82,7 @@ def consultar_deuda():
                 'error': 'Se requieren codigo_servicio y referencia'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo=codigo_servicio.upper()).first()
+        servicio = catalogo.servicio(codigo_servicio)
         
         if not servicio:
             return jsonify({
@@ -125,3 +118,20 @@ def consultar_deuda():
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@servicios_bp.route('/catalogo/invalidar', methods=['POST'])
+def invalidar_catalogo():
+    """Descarta el catálogo en memoria y las respuestas cacheadas, y recarga el catálogo"""
+    try:
+        cache_respuestas.invalidar_catalogo()
+        catalogo.recargar()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Catálogo recargado',
+            'data': catalogo.estado(),
+            'cache_respuestas': cache_respuestas.cache.estado()
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -10,9 +10,10 @@ GET /api/v1/servicios-publicos/consultar - Consultar planillas
 from flask import Blueprint, jsonify, request
 from extensions import db
 from models.pago import PagoServicio
-from models.servicio import Servicio
-from models.proveedor import ProveedorServicio
-from models.tipo_servicio import TipoServicio
+from core.catalogo import catalogo
+from core.pagos import valores_pago
+from core import outbox
+from core.categorias import consultar_servicios
 from decimal import Decimal
 import random
 
@@ -23,19 +24,7 @@ servicios_publicos_bp = Blueprint('servicios_publicos', __name__)
 def listar_servicios_publicos():
     """Lista todos los servicios públicos disponibles"""
     try:
-        tipo = TipoServicio.query.filter_by(codigo='SERVICIOS').first()
-        
-        if not tipo:
-            return jsonify({
-                'success': True,
-                'data': [],
-                'total': 0
-            })
-        
-        proveedores = ProveedorServicio.query.filter_by(id_tipo=tipo.id_tipo, activo=True).all()
-        servicios = []
-        for prov in proveedores:
-            servicios.extend(Servicio.query.filter_by(id_proveedor=prov.id_proveedor, activo=True).all())
+        servicios = consultar_servicios(categoria='SERVICIOS')
         
         return jsonify({
             'success': True,
@@ -80,7 +69,7 @@ def consultar_planilla():
         # Buscar el primer servicio disponible del tipo
         servicio = None
         for codigo in codigo_map[tipo]:
-            servicio = Servicio.query.filter_by(codigo=codigo).first()
+            servicio = catalogo.servicio(codigo)
             if servicio:
                 break
         
@@ -139,7 +128,7 @@ def pagar_luz():
         proveedor = data.get('proveedor', 'EEQ').upper()
         codigo = 'EEQ_LUZ' if proveedor == 'EEQ' else 'CNEL_LUZ'
         
-        servicio = Servicio.query.filter_by(codigo=codigo).first()
+        servicio = catalogo.servicio(codigo)
         
         if not servicio:
             return jsonify({
@@ -148,30 +137,28 @@ def pagar_luz():
             }), 404
         
         monto_base = Decimal(str(data['monto']))
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
-        
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=data['numero_suministro'],
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
+        
+        # Con id_cuenta queda PENDIENTE hasta que la outbox aplica el débito
+        pago = PagoServicio(**valores_pago(servicio, monto_base, dict(
+            data,
+            referencia=data['numero_suministro'],
             detalle=f'Pago Luz {proveedor} - Suministro: {data["numero_suministro"]}'
-        )
+        )))
         
         db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Servicio de luz pagado exitosamente',
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Servicio de luz pagado exitosamente',
             'data': pago.to_dict(include_servicio=True)
         }), 201
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -200,7 +187,7 @@ def pagar_agua():
         }
         
         codigo = codigo_map.get(proveedor, 'EMAAP_AGUA')
-        servicio = Servicio.query.filter_by(codigo=codigo).first()
+        servicio = catalogo.servicio(codigo)
         
         if not servicio:
             return jsonify({
@@ -209,30 +196,28 @@ def pagar_agua():
             }), 404
         
         monto_base = Decimal(str(data['monto']))
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
-        
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=data['numero_cuenta'],
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
+        
+        # Con id_cuenta queda PENDIENTE hasta que la outbox aplica el débito
+        pago = PagoServicio(**valores_pago(servicio, monto_base, dict(
+            data,
+            referencia=data['numero_cuenta'],
             detalle=f'Pago Agua {proveedor} - Cuenta: {data["numero_cuenta"]}'
-        )
+        )))
         
         db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Servicio de agua pagado exitosamente',
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Servicio de agua pagado exitosamente',
             'data': pago.to_dict(include_servicio=True)
         }), 201
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -253,7 +238,7 @@ def pagar_telefono():
                 'error': 'Se requiere numero_telefono y monto'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo='CNT_TELEFONO').first()
+        servicio = catalogo.servicio('CNT_TELEFONO')
         
         if not servicio:
             return jsonify({
@@ -262,30 +247,28 @@ def pagar_telefono():
             }), 404
         
         monto_base = Decimal(str(data['monto']))
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
-        
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=data['numero_telefono'],
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
+        
+        # Con id_cuenta queda PENDIENTE hasta que la outbox aplica el débito
+        pago = PagoServicio(**valores_pago(servicio, monto_base, dict(
+            data,
+            referencia=data['numero_telefono'],
             detalle=f'Pago Teléfono CNT - Tel: {data["numero_telefono"]}'
-        )
+        )))
         
         db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Servicio de telefonía pagado exitosamente',
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Servicio de telefonía pagado exitosamente',
             'data': pago.to_dict(include_servicio=True)
         }), 201
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -306,7 +289,7 @@ def pagar_internet():
                 'error': 'Se requiere numero_cuenta y monto'
             }), 400
         
-        servicio = Servicio.query.filter_by(codigo='CNT_NET').first()
+        servicio = catalogo.servicio('CNT_NET')
         
         if not servicio:
             return jsonify({
@@ -315,30 +298,28 @@ def pagar_internet():
             }), 404
         
         monto_base = Decimal(str(data['monto']))
-        comision = servicio.comision or Decimal('0')
-        monto_total = monto_base + comision
-        
-        pago = PagoServicio(
-            id_servicio=servicio.id_servicio,
-            id_cuenta=data.get('id_cuenta'),
-            referencia_cliente=data['numero_cuenta'],
-            monto_base=monto_base,
-            comision=comision,
-            monto_total=monto_total,
-            estado=PagoServicio.ESTADO_COMPLETADO,
-            comprobante=PagoServicio.generar_comprobante(),
+        
+        # Con id_cuenta queda PENDIENTE hasta que la outbox aplica el débito
+        pago = PagoServicio(**valores_pago(servicio, monto_base, dict(
+            data,
+            referencia=data['numero_cuenta'],
             detalle=f'Pago Internet CNT - Cuenta: {data["numero_cuenta"]}'
-        )
+        )))
         
         db.session.add(pago)
+        db.session.flush()
+        outbox.encolar([pago])
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'message': 'Servicio de internet pagado exitosamente',
+            'message': 'Pago registrado, débito de la cuenta en proceso'
+                       if pago.estado == PagoServicio.ESTADO_PENDIENTE else 'Servicio de internet pagado exitosamente',
             'data': pago.to_dict(include_servicio=True)
         }), 201
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Error en los datos: {str(e)}'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -6,26 +6,28 @@ GET /api/v1/tipos-servicio/<codigo> - Obtiene una categoría por código
 
 from flask import Blueprint, jsonify, request
 from models.tipo_servicio import TipoServicio
+from core.cache_respuestas import cache_respuesta
 
 tipos_bp = Blueprint('tipos_servicio', __name__)
 
 
 @tipos_bp.route('', methods=['GET'])
+@cache_respuesta('tipos')
 def listar_tipos():
-    """Lista todas las categorías de servicios"""
+    """
+    Lista todas las categorías de servicios
+    Responde con ETag; si el cliente envía If-None-Match vigente retorna 304.
+    El listado se calcula en una consulta y queda en la caché de respuestas.
+    """
     try:
         solo_activos = request.args.get('activos', 'true').lower() == 'true'
-        
-        query = TipoServicio.query
-        if solo_activos:
-            query = query.filter_by(activo=True)
-        
-        tipos = query.order_by(TipoServicio.orden).all()
+        tipos = TipoServicio.listar_con_conteo(solo_activos)
+        data = [t.to_dict(cantidad_proveedores=cantidad) for t, cantidad in tipos]
         
         return jsonify({
             'success': True,
-            'data': [t.to_dict() for t in tipos],
-            'total': len(tipos)
+            'data': data,
+            'total': len(data)
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
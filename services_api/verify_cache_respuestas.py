@@ -0,0 +1,159 @@
+"""
+Verificación de la caché de respuestas del catálogo (core/cache_respuestas.py)
+Crea una base SQLite temporal con un catálogo mínimo y usa como almacén un
+Redis falso en memoria (get, set con ex, incr, delete, valores en bytes como
+redis-py). Comprueba:
+  - un acierto no toca la base y responde con ETag y Cache-Control
+  - If-None-Match con el ETag vigente responde 304 sin cuerpo
+  - query args distintos son entradas distintas (?activos=false)
+  - confirmar un cambio del catálogo invalida las respuestas guardadas;
+    un rollback o una asignación sin cambio neto no las invalida
+
+No usa la base configurada en .env ni un Redis real. Ejecutar:
+    python verify_cache_respuestas.py
+"""
+
+import os
+import sys
+import tempfile
+
+ARCHIVO_DB = os.path.join(tempfile.mkdtemp(prefix='verify_cache_'), 'verify.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{ARCHIVO_DB}'
+os.environ['CACHE_RESPUESTAS_URL'] = ''
+
+from app import create_app
+from extensions import db
+from models.tipo_servicio import TipoServicio
+from models.proveedor import ProveedorServicio
+from models.servicio import Servicio
+from core import cache_respuestas
+from core.catalogo import catalogo
+from comun.consultas import contar_consultas
+
+
+class RedisFalso:
+    """Almacén con el subconjunto de la API de redis-py que usa la caché"""
+
+    def __init__(self):
+        self.datos = {}
+        self.expiraciones = {}
+
+    def get(self, clave):
+        return self.datos.get(clave)
+
+    def set(self, clave, valor, ex=None):
+        self.datos[clave] = valor.encode() if isinstance(valor, str) else valor
+        self.expiraciones[clave] = ex
+        return True
+
+    def incr(self, clave):
+        valor = int(self.datos.get(clave) or 0) + 1
+        self.datos[clave] = str(valor).encode()
+        return valor
+
+    def delete(self, *claves):
+        return sum(1 for clave in claves if self.datos.pop(clave, None) is not None)
+
+    def respuestas(self):
+        return [clave for clave in self.datos if clave != cache_respuestas.CLAVE_VERSION]
+
+
+def crear_datos():
+    tipo = TipoServicio(codigo='SERVICIOS', nombre='Servicios', orden=0)
+    db.session.add(tipo)
+    db.session.flush()
+    for codigo, activo in (('EEQ', True), ('CNT', True), ('INACTIVO', False)):
+        proveedor = ProveedorServicio(id_tipo=tipo.id_tipo, codigo=codigo, nombre=codigo, activo=activo)
+        db.session.add(proveedor)
+        db.session.flush()
+        db.session.add(Servicio(
+            id_proveedor=proveedor.id_proveedor, codigo=f'{codigo}_SERV', nombre=codigo,
+            comision=0.50, monto_minimo=1, monto_maximo=5000
+        ))
+    db.session.commit()
+
+
+def nombres(respuesta):
+    return sorted(p['nombre'] for p in respuesta.get_json()['data'])
+
+
+def main():
+    app = create_app('production')
+    almacen = RedisFalso()
+    cache_respuestas.cache.almacen = almacen
+    cliente = app.test_client()
+    resultados = []
+
+    def comprobar(descripcion, ok):
+        print(f"  [{'OK' if ok else 'FALLO'}] {descripcion}")
+        resultados.append(ok)
+
+    with app.app_context():
+        db.create_all()
+        crear_datos()
+        catalogo.recargar()
+
+        print("🔎 Caché de respuestas con almacén compatible con Redis:")
+        primera = cliente.get('/api/v1/proveedores')
+        etag = primera.headers.get('ETag')
+        comprobar('la primera respuesta es 200 con ETag y Cache-Control',
+                  primera.status_code == 200 and bool(etag) and 'max-age' in primera.headers.get('Cache-Control', ''))
+        comprobar('la entrada se guarda con TTL (set con ex)',
+                  len(almacen.respuestas()) == 1
+                  and all(almacen.expiraciones[c] == cache_respuestas.cache.ttl for c in almacen.respuestas()))
+
+        with contar_consultas() as contador:
+            acierto = cliente.get('/api/v1/proveedores')
+        comprobar(f'un acierto no consulta la base ({contador.total} sentencias) y repite el cuerpo',
+                  contador.total == 0 and acierto.get_data() == primera.get_data()
+                  and acierto.headers.get('ETag') == etag)
+
+        condicional = cliente.get('/api/v1/proveedores', headers={'If-None-Match': etag})
+        comprobar('If-None-Match con el ETag vigente responde 304 sin cuerpo',
+                  condicional.status_code == 304 and not condicional.get_data())
+
+        distinto = cliente.get('/api/v1/proveedores', headers={'If-None-Match': '"otro"'})
+        comprobar('If-None-Match con otro ETag responde 200', distinto.status_code == 200)
+
+        todos = cliente.get('/api/v1/proveedores?activos=false')
+        comprobar('?activos=false es otra entrada con otro contenido',
+                  len(almacen.respuestas()) == 2 and nombres(todos) == ['CNT', 'EEQ', 'INACTIVO']
+                  and nombres(primera) == ['CNT', 'EEQ'])
+
+        reordenados = cliente.get('/api/v1/proveedores?categoria=SERVICIOS&activos=false')
+        cliente.get('/api/v1/proveedores?activos=false&categoria=SERVICIOS')
+        comprobar('el orden de los query args no crea entradas nuevas',
+                  reordenados.status_code == 200 and len(almacen.respuestas()) == 3)
+
+        version = cache_respuestas.cache.version()
+        proveedor = ProveedorServicio.query.filter_by(codigo='EEQ').first()
+        proveedor.nombre = 'EEQ'
+        db.session.commit()
+        comprobar('una asignación sin cambio neto no invalida', cache_respuestas.cache.version() == version)
+
+        proveedor.nombre = 'Empresa Eléctrica'
+        db.session.flush()
+        db.session.rollback()
+        comprobar('un rollback no invalida', cache_respuestas.cache.version() == version)
+
+        proveedor = ProveedorServicio.query.filter_by(codigo='EEQ').first()
+        proveedor.nombre = 'Empresa Eléctrica'
+        db.session.commit()
+        comprobar('confirmar un cambio del catálogo incrementa la versión',
+                  cache_respuestas.cache.version() == version + 1)
+
+        with contar_consultas() as contador:
+            nueva = cliente.get('/api/v1/proveedores', headers={'If-None-Match': etag})
+        comprobar('tras el cambio el ETag anterior ya no responde 304 y se sirve el dato nuevo',
+                  nueva.status_code == 200 and nueva.headers.get('ETag') != etag
+                  and 'Empresa Eléctrica' in nombres(nueva) and contador.total > 0)
+
+    if all(resultados):
+        print("\n✅ La caché de respuestas funciona con un almacén compatible con Redis")
+    else:
+        print("\n❌ La caché de respuestas no se comporta como se espera")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Verificación del número de consultas SQL por endpoint de la API de Servicios
+Crea una base SQLite temporal con un catálogo de prueba (categorías,
+proveedores y servicios), ejecuta cada endpoint con el cliente de pruebas de
+Flask y cuenta las sentencias que emite. El catálogo en memoria se carga
+antes de medir, como ocurre en create_app. Termina con código 1 si algún
+endpoint supera su máximo (N+1).
+
+No usa la base configurada en .env. Ejecutar:
+    python verify_consultas.py
+    python verify_consultas.py -v    # muestra las sentencias emitidas
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+ARCHIVO_DB = os.path.join(tempfile.mkdtemp(prefix='verify_consultas_'), 'verify.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{ARCHIVO_DB}'
+
+from app import create_app
+from extensions import db
+from models.tipo_servicio import TipoServicio
+from models.proveedor import ProveedorServicio
+from models.servicio import Servicio
+from core.catalogo import catalogo
+from comun.consultas import contar_consultas
+
+# categoría -> proveedor -> servicios
+CATALOGO = {
+    'IMPUESTOS': {'MUNICIPIO_QUITO': ['QUITO_PREDIAL', 'QUITO_PATENTE'], 'SRI': ['SRI_RENTA', 'SRI_IVA']},
+    'MATRICULA': {'ANT_MATRICULA': ['MATRICULA_VEHICULAR', 'IMP_VEHICULAR']},
+    'MULTAS': {'ANT': ['ANT_MULTA_TRANSITO'], 'CNT_MOVIL': ['CNT_FACTURA'], 'CLARO': ['CLARO_FACTURA']},
+    'SERVICIOS': {
+        'EEQ': ['EEQ_LUZ'], 'CNEL': ['CNEL_LUZ'], 'EMAAP': ['EMAAP_AGUA'],
+        'CNT': ['CNT_TELEFONO', 'CNT_NET'], 'INACTIVO': ['INACTIVO_SERV']
+    },
+}
+
+
+def crear_datos():
+    for orden, (categoria, proveedores) in enumerate(CATALOGO.items()):
+        tipo = TipoServicio(codigo=categoria, nombre=categoria.title(), orden=orden)
+        db.session.add(tipo)
+        db.session.flush()
+        for codigo_proveedor, servicios in proveedores.items():
+            proveedor = ProveedorServicio(
+                id_tipo=tipo.id_tipo, codigo=codigo_proveedor, nombre=codigo_proveedor,
+                activo=codigo_proveedor != 'INACTIVO'
+            )
+            db.session.add(proveedor)
+            db.session.flush()
+            for codigo in servicios:
+                db.session.add(Servicio(
+                    id_proveedor=proveedor.id_proveedor, codigo=codigo, nombre=codigo,
+                    comision=0.50, monto_minimo=1, monto_maximo=5000
+                ))
+    db.session.commit()
+
+
+def get(url):
+    return lambda cliente: cliente.get(url)
+
+
+def post(url, body):
+    return lambda cliente: cliente.post(url, json=body)
+
+
+def total_igual(esperado):
+    return lambda datos: datos.get('total') == esperado
+
+
+# (nombre, petición, máximo de sentencias, validación opcional de la respuesta)
+CASOS = [
+    ('impuestos', get('/api/v1/impuestos'), 1, total_igual(4)),
+    ('servicios públicos', get('/api/v1/servicios-publicos'), 1, total_igual(5)),
+    ('matrícula', get('/api/v1/matricula'), 1, total_igual(2)),
+    ('multas', get('/api/v1/multas'), 1, total_igual(3)),
+    ('servicios por proveedor', get('/api/v1/servicios?proveedor=CNT'), 1, total_igual(2)),
+    ('proveedores', get('/api/v1/proveedores'), 1, total_igual(10)),
+    ('proveedores por categoría (filtro)', get('/api/v1/proveedores?categoria=SERVICIOS'), 1, total_igual(4)),
+    ('proveedores por categoría con servicios', get('/api/v1/proveedores/categoria/SERVICIOS'), 1,
+     lambda datos: datos['total'] == 4 and datos['categoria']['cantidad_proveedores'] == 5
+     and sum(len(p['servicios']) for p in datos['data']) == 5),
+    ('tipos de servicio', get('/api/v1/tipos-servicio'), 1, total_igual(4)),
+    ('pago (INSERT + refresh)', post('/api/v1/pagos', {
+        'codigo_servicio': 'EEQ_LUZ', 'referencia': '123456', 'monto': 20
+    }), 2, None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verificación de consultas SQL por endpoint')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args()
+
+    app = create_app('production')
+    resultados = []
+
+    with app.app_context():
+        db.create_all()
+        crear_datos()
+        catalogo.recargar()
+
+        print("🔎 Consultas por endpoint:")
+        for nombre, peticion, maximo, validar in CASOS:
+            cliente = app.test_client()
+            with contar_consultas() as contador:
+                respuesta = peticion(cliente)
+
+            valida = respuesta.status_code < 400 and (validar is None or validar(respuesta.get_json()))
+            ok = valida and contador.total <= maximo
+            print(f"  [{'OK' if ok else 'FALLO'}] {nombre}: {contador.total} sentencias "
+                  f"(máximo {maximo}), HTTP {respuesta.status_code}"
+                  + ('' if valida else ', respuesta inesperada'))
+            if args.verbose or not ok:
+                for sentencia in contador.sentencias:
+                    print(f"        {' '.join(sentencia.split())[:160]}")
+            resultados.append(ok)
+
+    if all(resultados):
+        print("\n✅ Ningún endpoint supera su máximo de consultas")
+    else:
+        print("\n❌ Hay endpoints con consultas de más (N+1)")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
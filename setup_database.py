@@ -1,5 +1,7 @@
 """
 Script para configurar la base de datos en CasaOS
+Crea la base de datos, aplica el schema base (una sola vez) y luego
+las migraciones versionadas pendientes (ver migrar.py).
 Ejecutar: python setup_database.py
 """
 
@@ -7,6 +9,7 @@ import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import sys
 import os
+import migrar
 
 # Configuración de CasaOS
 DB_HOST = "192.168.100.12"
@@ -16,6 +19,9 @@ DB_PASSWORD = "casaos"
 DB_NAME = "banco_pichincha"
 INITIAL_DB = "casaos"  # Base de datos para conectar inicialmente
 
+# Versión con la que se registra database/schema.sql en SCHEMA_MIGRATIONS
+VERSION_SCHEMA_BASE = '0000_schema'
+
 def test_connection():
     """Prueba la conexión a PostgreSQL"""
     print(f"\n🔄 Probando conexión a {DB_HOST}:{DB_PORT}...")
@@ -70,39 +76,57 @@ def create_database():
         print(f"❌ Error: {e}")
         return False
 
-def run_schema():
-    """Ejecuta el schema.sql"""
+def conectar():
+    return psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME
+    )
+
+def run_schema(conn):
+    """Ejecuta el schema.sql si aún no está registrado como aplicado"""
     schema_path = os.path.join(os.path.dirname(__file__), 'database', 'schema.sql')
     
     if not os.path.exists(schema_path):
         print(f"❌ No se encontró: {schema_path}")
         return False
     
+    migrar.asegurar_tabla_control(conn)
+    if VERSION_SCHEMA_BASE in migrar.versiones_aplicadas(conn):
+        print("\nℹ️  Schema base ya aplicado")
+        return True
+    
     print(f"\n🔄 Ejecutando schema.sql...")
     try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
         cur = conn.cursor()
         
         with open(schema_path, 'r', encoding='utf-8') as f:
             sql = f.read()
         
         cur.execute(sql)
+        migrar.registrar_version(conn, VERSION_SCHEMA_BASE)
         conn.commit()
         cur.close()
-        conn.close()
         
         print("✅ Schema ejecutado correctamente!")
         return True
     except Exception as e:
+        conn.rollback()
         print(f"❌ Error ejecutando schema: {e}")
         return False
 
+def run_migrations(conn):
+    """Aplica las migraciones versionadas pendientes"""
+    print(f"\n🔄 Aplicando migraciones...")
+    try:
+        migrar.migrar(conn)
+        return True
+    except Exception as e:
+        print(f"❌ Error aplicando migraciones: {e}")
+        return False
+
 def main():
     print("=" * 50)
     print("  BANCO PICHINCHA - Configuración de Base de Datos")
@@ -114,8 +138,15 @@ def main():
     if not create_database():
         sys.exit(1)
     
-    if not run_schema():
-        sys.exit(1)
+    conn = conectar()
+    try:
+        if not run_schema(conn):
+            sys.exit(1)
+        
+        if not run_migrations(conn):
+            sys.exit(1)
+    finally:
+        conn.close()
     
     print("\n" + "=" * 50)
     print("  ✅ BASE DE DATOS CONFIGURADA CORRECTAMENTE")
@@ -0,0 +1,154 @@
+"""
+Verificación de planes de ejecución del historial por cuenta
+Crea un esquema temporal con una tabla TRANSACCIONES sintética (10M filas
+por defecto), le aplica la migración 0001 y comprueba con EXPLAIN que la
+consulta que genera el backend usa los índices compuestos y no hace
+Seq Scan. Termina con código 1 si el plan no es el esperado.
+
+Requiere PostgreSQL configurado en backend/.env. Ejecutar:
+    python verify_indices.py                 # 10.000.000 filas
+    python verify_indices.py --filas 500000  # prueba rápida
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, 'backend'))
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+import migrar
+from app import create_app
+from extensions import db
+from core import historial
+
+ESQUEMA = 'verify_indices'
+MIGRACION = os.path.join(migrar.MIGRACIONES_DIR, '0001_indices_historial_cuenta.sql')
+INDICES_ESPERADOS = {'idx_trans_cuenta_o_fecha', 'idx_trans_cuenta_d_fecha'}
+
+
+def crear_tabla_sintetica(conn, filas, cuentas):
+    print(f"🔄 Generando {filas:,} transacciones sintéticas sobre {cuentas:,} cuentas...")
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {ESQUEMA}"))
+    conn.execute(text(f"SET search_path TO {ESQUEMA}"))
+    conn.execute(text("""
+        CREATE TABLE TRANSACCIONES (
+           ID_TRANSACCION       SERIAL               NOT NULL PRIMARY KEY,
+           ID_CUENTA_ORIGEN     INTEGER              NULL,
+           ID_CUENTA_DESTINO    INTEGER              NULL,
+           ID_TARJETA           INTEGER              NULL,
+           ID_CAJERO            INTEGER              NULL,
+           TIPO_TRANSACCION     VARCHAR(50)          NOT NULL,
+           MONTO                DECIMAL(12,2)        NOT NULL,
+           FECHA_HORA           TIMESTAMP            NOT NULL DEFAULT CURRENT_TIMESTAMP,
+           DESCRIPCION          VARCHAR(256)         NULL,
+           ESTADO               VARCHAR(20)          NOT NULL DEFAULT 'COMPLETADA',
+           REFERENCIA           VARCHAR(50)          NULL
+        )
+    """))
+    # Mezcla de transferencias, depósitos (sin origen) y retiros (sin destino)
+    conn.execute(text("""
+        INSERT INTO TRANSACCIONES (ID_CUENTA_ORIGEN, ID_CUENTA_DESTINO, TIPO_TRANSACCION, MONTO, FECHA_HORA)
+        SELECT
+            CASE WHEN g % 10 = 0 THEN NULL ELSE 1 + (random() * :cuentas)::int END,
+            CASE WHEN g % 10 = 1 THEN NULL ELSE 1 + (random() * :cuentas)::int END,
+            CASE g % 10 WHEN 0 THEN 'DEPOSITO' WHEN 1 THEN 'RETIRO' ELSE 'TRANSFERENCIA' END,
+            round((random() * 500)::numeric, 2),
+            now() - random() * interval '365 days'
+        FROM generate_series(1, :filas) AS g
+    """), {'filas': filas, 'cuentas': cuentas})
+
+
+def aplicar_migracion(conn):
+    print("🔄 Aplicando migración 0001 sobre la tabla sintética...")
+    with open(MIGRACION, 'r', encoding='utf-8') as f:
+        sql = f.read()
+    for sentencia in migrar.dividir_sentencias(sql):
+        conn.execute(text(sentencia))
+
+
+def sql_historial(**filtros):
+    """SQL exacto que genera el backend para el historial de una cuenta"""
+    query = historial.consulta_historial(**filtros).limit(51)
+    return str(query.statement.compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={'literal_binds': True}
+    ))
+
+
+def nodos(plan):
+    yield plan
+    for hijo in plan.get('Plans', []):
+        yield from nodos(hijo)
+
+
+def verificar(conn, nombre, sql):
+    fila = conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")).scalar()
+    resultado = fila if isinstance(fila, list) else json.loads(fila)
+    plan = resultado[0]['Plan']
+
+    seq_scans = [n for n in nodos(plan)
+                 if n['Node Type'] == 'Seq Scan' and n.get('Relation Name') == 'transacciones']
+    indices = {n.get('Index Name') for n in nodos(plan) if n.get('Index Name')}
+    faltantes = INDICES_ESPERADOS - indices
+    tiempo = resultado[0].get('Execution Time', 0)
+
+    ok = not seq_scans and not faltantes
+    print(f"  [{'OK' if ok else 'FALLO'}] {nombre}: {tiempo:.2f} ms, índices: {sorted(indices)}")
+    if seq_scans:
+        print("        Seq Scan sobre transacciones")
+    if faltantes:
+        print(f"        No se usaron: {sorted(faltantes)}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verificación EXPLAIN de índices del historial')
+    parser.add_argument('--filas', type=int, default=10_000_000)
+    parser.add_argument('--cuentas', type=int, default=100_000)
+    parser.add_argument('--conservar', action='store_true', help='No eliminar el esquema sintético al terminar')
+    args = parser.parse_args()
+
+    app = create_app('production')
+
+    with app.app_context():
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            try:
+                crear_tabla_sintetica(conn, args.filas, args.cuentas)
+                aplicar_migracion(conn)
+
+                cuenta = conn.execute(text(
+                    "SELECT ID_CUENTA_DESTINO FROM TRANSACCIONES "
+                    "WHERE ID_CUENTA_DESTINO IS NOT NULL LIMIT 1"
+                )).scalar()
+                cursor = historial.codificar_cursor(type('Fila', (), {
+                    'fecha_hora': datetime.now().replace(microsecond=0),
+                    'id_transaccion': args.filas // 2
+                })())
+
+                print(f"\n🔎 Planes para la cuenta {cuenta}:")
+                casos = [
+                    ('primera página', sql_historial(id_cuenta=cuenta)),
+                    ('página con cursor', sql_historial(id_cuenta=cuenta, cursor=cursor)),
+                    ('filtro por tipo', sql_historial(id_cuenta=cuenta, tipo='TRANSFERENCIA')),
+                ]
+                resultados = [verificar(conn, nombre, sql) for nombre, sql in casos]
+            finally:
+                if not args.conservar:
+                    conn.execute(text(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE"))
+
+    if all(resultados):
+        print("\n✅ El historial por cuenta usa los índices compuestos")
+    else:
+        print("\n❌ Regresión en el plan del historial por cuenta")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()